@@ -0,0 +1,16 @@
+"""
+Console backend selection
+The game talks to libtcod through the module exported here.  Setting the ROGUELIKE_BACKEND environment
+variable to 'headless' swaps in an in-memory implementation, so the game can run, be benchmarked and
+have its frames inspected without a window or the native library.
+"""
+import os
+
+BACKEND = os.environ.get('ROGUELIKE_BACKEND', 'libtcod')
+
+if BACKEND == 'headless':
+    from backends import headless as libtcod
+elif BACKEND == 'libtcod':
+    import libtcodpy as libtcod
+else:
+    raise ImportError('Unknown ROGUELIKE_BACKEND: {0}'.format(BACKEND))
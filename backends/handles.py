@@ -0,0 +1,156 @@
+"""
+Native handle pool
+libtcod maps, paths and consoles are allocated on the native heap and are only returned
+to it by an explicit delete.  The pool hands out handles, takes them back when a caller is done, keeps
+a few idle ones of each size for the next caller and frees the rest straight away.  Live handle counts
+show whether anything is leaking.
+"""
+from contextlib import contextmanager
+
+from backends import libtcod
+
+KINDS = ('map', 'path', 'console')
+
+
+class HandlePool:
+    """
+    Reuses native handles of matching size and frees them deterministically
+    Maps and consoles are matched on width and height; paths on the map they were built over and their
+    diagonal cost.
+    """
+
+    def __init__(self, max_idle=2):
+        """
+        :param int max_idle: Idle handles kept for each size, beyond which released handles are freed
+        """
+        self.max_idle = max_idle
+        self.idle = {}
+        self.in_use = {}
+        self.created = dict.fromkeys(KINDS, 0)
+        self.freed = dict.fromkeys(KINDS, 0)
+        self.reused = dict.fromkeys(KINDS, 0)
+
+    def acquire_map(self, width, height):
+        """
+        :return: A libtcod map with every cell opaque and blocked
+        """
+        fov_map = self._acquire(('map', width, height), lambda: libtcod.map_new(width, height))
+        libtcod.map_clear(fov_map)
+        return fov_map
+
+    def acquire_path(self, fov_map, diagonal_cost=1.41):
+        """
+        :param fov_map: Pooled libtcod map the path is computed over
+        :return: A libtcod A* path
+        """
+        return self._acquire(('path', id(fov_map), diagonal_cost),
+                             lambda: libtcod.path_new_using_map(fov_map, diagonal_cost))
+
+    def acquire_console(self, width, height):
+        """
+        :return: An off-screen console, cleared to white on black
+        """
+        con = self._acquire(('console', width, height), lambda: libtcod.console_new(width, height))
+        libtcod.console_set_default_foreground(con, libtcod.white)
+        libtcod.console_set_default_background(con, libtcod.black)
+        libtcod.console_clear(con)
+        return con
+
+    @contextmanager
+    def console(self, width, height):
+        """
+        Borrow an off-screen console for the duration of a with block
+        """
+        con = self.acquire_console(width, height)
+        try:
+            yield con
+        finally:
+            self.release(con)
+
+    def release(self, handle):
+        """
+        Return a handle to the pool, freeing it if enough of its size are already idle
+        Paths built over a map are freed along with it.
+        :param handle: A handle acquired from this pool
+        """
+        key = self.in_use.pop(id(handle))[0]
+        idle = self.idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(handle)
+        else:
+            self._free(key, handle)
+
+    def clear(self):
+        """
+        Free every idle handle
+        """
+        while self.idle:
+            key, idle = self.idle.popitem()
+            for handle in idle:
+                self._free(key, handle)
+
+    def close(self):
+        """
+        Free every handle, including the ones still in use
+        """
+        for key, handle in self.in_use.values():
+            self.idle.setdefault(key, []).append(handle)
+        self.in_use.clear()
+        self.clear()
+
+    def counts(self):
+        """
+        :return dict: For each kind of handle, the number live, in use and idle, and the totals created,
+            freed and reused
+        """
+        counts = {}
+        for kind in KINDS:
+            in_use = sum(1 for key, handle in self.in_use.values() if key[0] == kind)
+            idle = sum(len(handles) for key, handles in self.idle.items() if key[0] == kind)
+            counts[kind] = {
+                'live': self.created[kind] - self.freed[kind],
+                'in_use': in_use,
+                'idle': idle,
+                'created': self.created[kind],
+                'freed': self.freed[kind],
+                'reused': self.reused[kind]
+            }
+
+        return counts
+
+    def live(self):
+        """
+        :return int: Handles allocated and not yet freed, of every kind
+        """
+        return sum(self.created.values()) - sum(self.freed.values())
+
+    def _acquire(self, key, create):
+        idle = self.idle.get(key)
+        if idle:
+            handle = idle.pop()
+            self.reused[key[0]] += 1
+        else:
+            handle = create()
+            self.created[key[0]] += 1
+
+        self.in_use[id(handle)] = (key, handle)
+        return handle
+
+    def _free(self, key, handle):
+        kind = key[0]
+        if kind == 'map':
+            # Idle paths are keyed on the map and cannot outlive it
+            for dependent in [dependent for dependent in self.idle if dependent[0] == 'path' and
+                              dependent[1] == id(handle)]:
+                for path in self.idle.pop(dependent):
+                    self._free(dependent, path)
+            libtcod.map_delete(handle)
+        elif kind == 'path':
+            libtcod.path_delete(handle)
+        else:
+            libtcod.console_delete(handle)
+
+        self.freed[kind] += 1
+
+
+handles = HandlePool()
@@ -0,0 +1,1149 @@
+"""
+Headless console backend
+A pure-Python/NumPy stand-in for the parts of libtcodpy used by the game.  Consoles render into
+character, foreground and background arrays instead of a window, input comes from an event queue
+filled by the caller, and maps, field of view and A* paths are computed without the native library.
+
+Every console exposes its cells as arrays indexed [y, x]: ch (character codes), fg and bg (RGB).
+"""
+import heapq
+import math
+import textwrap
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from fov_shadowcasting import compute_fov
+
+# background rendering modes
+BKGND_NONE = 0
+BKGND_SET = 1
+BKGND_MULTIPLY = 2
+BKGND_LIGHTEN = 3
+BKGND_DARKEN = 4
+BKGND_SCREEN = 5
+BKGND_COLOR_DODGE = 6
+BKGND_COLOR_BURN = 7
+BKGND_ADD = 8
+BKGND_ADDA = 9
+BKGND_BURN = 10
+BKGND_OVERLAY = 11
+BKGND_ALPH = 12
+BKGND_DEFAULT = 13
+
+
+def BKGND_ALPHA(a):
+    return BKGND_ALPH | (int(a * 255) << 8)
+
+
+def BKGND_ADDALPHA(a):
+    return BKGND_ADDA | (int(a * 255) << 8)
+
+
+# key codes
+KEY_NONE = 0
+KEY_ESCAPE = 1
+KEY_BACKSPACE = 2
+KEY_TAB = 3
+KEY_ENTER = 4
+KEY_SHIFT = 5
+KEY_CONTROL = 6
+KEY_ALT = 7
+KEY_PAUSE = 8
+KEY_CAPSLOCK = 9
+KEY_PAGEUP = 10
+KEY_PAGEDOWN = 11
+KEY_END = 12
+KEY_HOME = 13
+KEY_UP = 14
+KEY_LEFT = 15
+KEY_RIGHT = 16
+KEY_DOWN = 17
+KEY_PRINTSCREEN = 18
+KEY_INSERT = 19
+KEY_DELETE = 20
+KEY_LWIN = 21
+KEY_RWIN = 22
+KEY_APPS = 23
+KEY_SPACE = 64
+KEY_CHAR = 65
+KEY_TEXT = 66
+
+# font flags
+FONT_LAYOUT_ASCII_INCOL = 1
+FONT_LAYOUT_ASCII_INROW = 2
+FONT_TYPE_GREYSCALE = 4
+FONT_TYPE_GRAYSCALE = 4
+FONT_LAYOUT_TCOD = 8
+
+# renderers
+RENDERER_GLSL = 0
+RENDERER_OPENGL = 1
+RENDERER_SDL = 2
+
+# alignment
+LEFT = 0
+RIGHT = 1
+CENTER = 2
+
+# events
+EVENT_NONE = 0
+EVENT_KEY_PRESS = 1
+EVENT_KEY_RELEASE = 2
+EVENT_KEY = EVENT_KEY_PRESS | EVENT_KEY_RELEASE
+EVENT_MOUSE_MOVE = 4
+EVENT_MOUSE_PRESS = 8
+EVENT_MOUSE_RELEASE = 16
+EVENT_MOUSE = EVENT_MOUSE_MOVE | EVENT_MOUSE_PRESS | EVENT_MOUSE_RELEASE
+EVENT_ANY = EVENT_KEY | EVENT_MOUSE
+
+# field of view algorithms
+FOV_BASIC = 0
+FOV_DIAMOND = 1
+FOV_SHADOW = 2
+FOV_PERMISSIVE_0 = 3
+FOV_RESTRICTIVE = 12
+NB_FOV_ALGORITHMS = 13
+
+
+class Color:
+    """
+    An RGB colour with the arithmetic of libtcod's Color
+    """
+    __slots__ = ('r', 'g', 'b')
+
+    def __init__(self, r=0, g=0, b=0):
+        self.r = r
+        self.g = g
+        self.b = b
+
+    def __eq__(self, c):
+        return tuple(self) == tuple(c)
+
+    def __hash__(self):
+        return hash((self.r, self.g, self.b))
+
+    def __mul__(self, c):
+        if isinstance(c, Color):
+            return Color(self.r * c.r // 255, self.g * c.g // 255, self.b * c.b // 255)
+        return Color(*(min(max(int(channel * c), 0), 255) for channel in self))
+
+    def __add__(self, c):
+        return Color(*(min(a + b, 255) for a, b in zip(self, c)))
+
+    def __sub__(self, c):
+        return Color(*(max(a - b, 0) for a, b in zip(self, c)))
+
+    def __repr__(self):
+        return "Color(%d,%d,%d)" % (self.r, self.g, self.b)
+
+    def __getitem__(self, i):
+        if type(i) == str:
+            return getattr(self, i)
+        return getattr(self, "rgb"[i])
+
+    def __setitem__(self, i, c):
+        if type(i) == str:
+            setattr(self, i, c)
+        else:
+            setattr(self, "rgb"[i], c)
+
+    def __iter__(self):
+        yield self.r
+        yield self.g
+        yield self.b
+
+
+# default colors
+# grey levels
+black = Color(0, 0, 0)
+darkest_grey = Color(31, 31, 31)
+darker_grey = Color(63, 63, 63)
+dark_grey = Color(95, 95, 95)
+grey = Color(127, 127, 127)
+light_grey = Color(159, 159, 159)
+lighter_grey = Color(191, 191, 191)
+lightest_grey = Color(223, 223, 223)
+darkest_gray = Color(31, 31, 31)
+darker_gray = Color(63, 63, 63)
+dark_gray = Color(95, 95, 95)
+gray = Color(127, 127, 127)
+light_gray = Color(159, 159, 159)
+lighter_gray = Color(191, 191, 191)
+lightest_gray = Color(223, 223, 223)
+white = Color(255, 255, 255)
+# sepia
+darkest_sepia = Color(31, 24, 15)
+darker_sepia = Color(63, 50, 31)
+dark_sepia = Color(94, 75, 47)
+sepia = Color(127, 101, 63)
+light_sepia = Color(158, 134, 100)
+lighter_sepia = Color(191, 171, 143)
+lightest_sepia = Color(222, 211, 195)
+#standard colors
+red = Color(255, 0, 0)
+flame = Color(255, 63, 0)
+orange = Color(255, 127, 0)
+amber = Color(255, 191, 0)
+yellow = Color(255, 255, 0)
+lime = Color(191, 255, 0)
+chartreuse = Color(127, 255, 0)
+green = Color(0, 255, 0)
+sea = Color(0, 255, 127)
+turquoise = Color(0, 255, 191)
+cyan = Color(0, 255, 255)
+sky = Color(0, 191, 255)
+azure = Color(0, 127, 255)
+blue = Color(0, 0, 255)
+han = Color(63, 0, 255)
+violet = Color(127, 0, 255)
+purple = Color(191, 0, 255)
+fuchsia = Color(255, 0, 255)
+magenta = Color(255, 0, 191)
+pink = Color(255, 0, 127)
+crimson = Color(255, 0, 63)
+# dark colors
+dark_red = Color(191, 0, 0)
+dark_flame = Color(191, 47, 0)
+dark_orange = Color(191, 95, 0)
+dark_amber = Color(191, 143, 0)
+dark_yellow = Color(191, 191, 0)
+dark_lime = Color(143, 191, 0)
+dark_chartreuse = Color(95, 191, 0)
+dark_green = Color(0, 191, 0)
+dark_sea = Color(0, 191, 95)
+dark_turquoise = Color(0, 191, 143)
+dark_cyan = Color(0, 191, 191)
+dark_sky = Color(0, 143, 191)
+dark_azure = Color(0, 95, 191)
+dark_blue = Color(0, 0, 191)
+dark_han = Color(47, 0, 191)
+dark_violet = Color(95, 0, 191)
+dark_purple = Color(143, 0, 191)
+dark_fuchsia = Color(191, 0, 191)
+dark_magenta = Color(191, 0, 143)
+dark_pink = Color(191, 0, 95)
+dark_crimson = Color(191, 0, 47)
+# darker colors
+darker_red = Color(127, 0, 0)
+darker_flame = Color(127, 31, 0)
+darker_orange = Color(127, 63, 0)
+darker_amber = Color(127, 95, 0)
+darker_yellow = Color(127, 127, 0)
+darker_lime = Color(95, 127, 0)
+darker_chartreuse = Color(63, 127, 0)
+darker_green = Color(0, 127, 0)
+darker_sea = Color(0, 127, 63)
+darker_turquoise = Color(0, 127, 95)
+darker_cyan = Color(0, 127, 127)
+darker_sky = Color(0, 95, 127)
+darker_azure = Color(0, 63, 127)
+darker_blue = Color(0, 0, 127)
+darker_han = Color(31, 0, 127)
+darker_violet = Color(63, 0, 127)
+darker_purple = Color(95, 0, 127)
+darker_fuchsia = Color(127, 0, 127)
+darker_magenta = Color(127, 0, 95)
+darker_pink = Color(127, 0, 63)
+darker_crimson = Color(127, 0, 31)
+# darkest colors
+darkest_red = Color(63, 0, 0)
+darkest_flame = Color(63, 15, 0)
+darkest_orange = Color(63, 31, 0)
+darkest_amber = Color(63, 47, 0)
+darkest_yellow = Color(63, 63, 0)
+darkest_lime = Color(47, 63, 0)
+darkest_chartreuse = Color(31, 63, 0)
+darkest_green = Color(0, 63, 0)
+darkest_sea = Color(0, 63, 31)
+darkest_turquoise = Color(0, 63, 47)
+darkest_cyan = Color(0, 63, 63)
+darkest_sky = Color(0, 47, 63)
+darkest_azure = Color(0, 31, 63)
+darkest_blue = Color(0, 0, 63)
+darkest_han = Color(15, 0, 63)
+darkest_violet = Color(31, 0, 63)
+darkest_purple = Color(47, 0, 63)
+darkest_fuchsia = Color(63, 0, 63)
+darkest_magenta = Color(63, 0, 47)
+darkest_pink = Color(63, 0, 31)
+darkest_crimson = Color(63, 0, 15)
+# light colors
+light_red = Color(255, 114, 114)
+light_flame = Color(255, 149, 114)
+light_orange = Color(255, 184, 114)
+light_amber = Color(255, 219, 114)
+light_yellow = Color(255, 255, 114)
+light_lime = Color(219, 255, 114)
+light_chartreuse = Color(184, 255, 114)
+light_green = Color(114, 255, 114)
+light_sea = Color(114, 255, 184)
+light_turquoise = Color(114, 255, 219)
+light_cyan = Color(114, 255, 255)
+light_sky = Color(114, 219, 255)
+light_azure = Color(114, 184, 255)
+light_blue = Color(114, 114, 255)
+light_han = Color(149, 114, 255)
+light_violet = Color(184, 114, 255)
+light_purple = Color(219, 114, 255)
+light_fuchsia = Color(255, 114, 255)
+light_magenta = Color(255, 114, 219)
+light_pink = Color(255, 114, 184)
+light_crimson = Color(255, 114, 149)
+#lighter colors
+lighter_red = Color(255, 165, 165)
+lighter_flame = Color(255, 188, 165)
+lighter_orange = Color(255, 210, 165)
+lighter_amber = Color(255, 232, 165)
+lighter_yellow = Color(255, 255, 165)
+lighter_lime = Color(232, 255, 165)
+lighter_chartreuse = Color(210, 255, 165)
+lighter_green = Color(165, 255, 165)
+lighter_sea = Color(165, 255, 210)
+lighter_turquoise = Color(165, 255, 232)
+lighter_cyan = Color(165, 255, 255)
+lighter_sky = Color(165, 232, 255)
+lighter_azure = Color(165, 210, 255)
+lighter_blue = Color(165, 165, 255)
+lighter_han = Color(188, 165, 255)
+lighter_violet = Color(210, 165, 255)
+lighter_purple = Color(232, 165, 255)
+lighter_fuchsia = Color(255, 165, 255)
+lighter_magenta = Color(255, 165, 232)
+lighter_pink = Color(255, 165, 210)
+lighter_crimson = Color(255, 165, 188)
+# lightest colors
+lightest_red = Color(255, 191, 191)
+lightest_flame = Color(255, 207, 191)
+lightest_orange = Color(255, 223, 191)
+lightest_amber = Color(255, 239, 191)
+lightest_yellow = Color(255, 255, 191)
+lightest_lime = Color(239, 255, 191)
+lightest_chartreuse = Color(223, 255, 191)
+lightest_green = Color(191, 255, 191)
+lightest_sea = Color(191, 255, 223)
+lightest_turquoise = Color(191, 255, 239)
+lightest_cyan = Color(191, 255, 255)
+lightest_sky = Color(191, 239, 255)
+lightest_azure = Color(191, 223, 255)
+lightest_blue = Color(191, 191, 255)
+lightest_han = Color(207, 191, 255)
+lightest_violet = Color(223, 191, 255)
+lightest_purple = Color(239, 191, 255)
+lightest_fuchsia = Color(255, 191, 255)
+lightest_magenta = Color(255, 191, 239)
+lightest_pink = Color(255, 191, 223)
+lightest_crimson = Color(255, 191, 207)
+# desaturated colors
+desaturated_red = Color(127, 63, 63)
+desaturated_flame = Color(127, 79, 63)
+desaturated_orange = Color(127, 95, 63)
+desaturated_amber = Color(127, 111, 63)
+desaturated_yellow = Color(127, 127, 63)
+desaturated_lime = Color(111, 127, 63)
+desaturated_chartreuse = Color(95, 127, 63)
+desaturated_green = Color(63, 127, 63)
+desaturated_sea = Color(63, 127, 95)
+desaturated_turquoise = Color(63, 127, 111)
+desaturated_cyan = Color(63, 127, 127)
+desaturated_sky = Color(63, 111, 127)
+desaturated_azure = Color(63, 95, 127)
+desaturated_blue = Color(63, 63, 127)
+desaturated_han = Color(79, 63, 127)
+desaturated_violet = Color(95, 63, 127)
+desaturated_purple = Color(111, 63, 127)
+desaturated_fuchsia = Color(127, 63, 127)
+desaturated_magenta = Color(127, 63, 111)
+desaturated_pink = Color(127, 63, 95)
+desaturated_crimson = Color(127, 63, 79)
+# metallic
+brass = Color(191, 151, 96)
+copper = Color(197, 136, 124)
+gold = Color(229, 191, 0)
+silver = Color(203, 203, 203)
+# miscellaneous
+celadon = Color(172, 255, 175)
+peach = Color(255, 159, 127)
+
+
+class Key:
+    """
+    Keyboard state filled in by sys_check_for_event
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.vk = KEY_NONE
+        self.c = 0
+        self.text = b''
+        self.pressed = False
+        self.lalt = False
+        self.lctrl = False
+        self.lmeta = False
+        self.ralt = False
+        self.rctrl = False
+        self.rmeta = False
+        self.shift = False
+
+
+class Mouse:
+    """
+    Mouse state filled in by sys_check_for_event
+    The cursor position is kept between events; button presses last a single event.
+    """
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.dx = 0
+        self.dy = 0
+        self.cx = 0
+        self.cy = 0
+        self.dcx = 0
+        self.dcy = 0
+        self.lbutton = False
+        self.rbutton = False
+        self.mbutton = False
+        self.clear()
+
+    def clear(self):
+        self.dx = 0
+        self.dy = 0
+        self.dcx = 0
+        self.dcy = 0
+        self.lbutton_pressed = False
+        self.rbutton_pressed = False
+        self.mbutton_pressed = False
+        self.wheel_up = False
+        self.wheel_down = False
+
+
+class Console:
+    """
+    An off-screen console whose cells are held in arrays indexed [y, x]
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.default_fg = (255, 255, 255)
+        self.default_bg = (0, 0, 0)
+        self.ch = np.full((height, width), ord(' '), dtype=np.int32)
+        self.fg = np.empty((height, width, 3), dtype=np.uint8)
+        self.bg = np.empty((height, width, 3), dtype=np.uint8)
+        self.clear()
+
+    def clear(self):
+        self.ch[...] = ord(' ')
+        self.fg[...] = self.default_fg
+        self.bg[...] = self.default_bg
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def put(self, x, y, c, flag):
+        if not self.in_bounds(x, y):
+            return
+        self.ch[y, x] = c
+        self.fg[y, x] = self.default_fg
+        if flag & 0xff not in (BKGND_NONE, BKGND_DEFAULT):
+            self.bg[y, x] = _blend(self.bg[y, x], self.default_bg, flag)
+
+    def text(self):
+        """
+        :return list: One string per row of the console
+        """
+        return [''.join(chr(c) for c in row) for row in self.ch]
+
+
+class Image:
+    """
+    Placeholder for a loaded image; nothing is drawn from it headless
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+
+INFINITY = float('inf')
+
+_root = None
+_window_closed = False
+_events = deque()
+_event_ready = threading.Condition()
+_close_event = object()
+_fps = 0
+_start_time = time.time()
+flush_count = 0
+
+
+def reset():
+    """
+    Discard the root console, pending events and the closed state of the window
+    """
+    global _root, _window_closed, flush_count
+    _root = None
+    _window_closed = False
+    _events.clear()
+    flush_count = 0
+
+
+# Input
+def push_key(vk=KEY_NONE, c=0, shift=False, lalt=False, lctrl=False):
+    """
+    Queue a key press for a later sys_check_for_event
+    :param int vk: Key code, KEY_CHAR for printable characters
+    :param c: Character, as a str or character code
+    """
+    if isinstance(c, str):
+        c = ord(c)
+    _push(EVENT_KEY_PRESS, {'vk': vk, 'c': c, 'pressed': True, 'shift': shift, 'lalt': lalt, 'lctrl': lctrl})
+
+
+def push_char(char, shift=False):
+    """
+    Queue a printable key press
+    :param str char:
+    """
+    push_key(KEY_CHAR, char, shift=shift)
+
+
+def push_mouse(cx, cy, lbutton_pressed=False, rbutton_pressed=False):
+    """
+    Queue a mouse movement or click at a console cell
+    """
+    event = EVENT_MOUSE_PRESS if lbutton_pressed or rbutton_pressed else EVENT_MOUSE_MOVE
+    _push(event, {'cx': cx, 'cy': cy, 'lbutton_pressed': lbutton_pressed, 'rbutton_pressed': rbutton_pressed})
+
+
+def close_window():
+    """
+    Close the window once every event queued before this call has been read
+    May be called from another thread to end a game blocked in sys_wait_for_event.
+    """
+    _push(EVENT_NONE, _close_event)
+
+
+def _push(event, fields):
+    with _event_ready:
+        _events.append((event, fields))
+        _event_ready.notify_all()
+
+
+def pending_events():
+    """
+    :return int: Number of queued events not yet read
+    """
+    return len(_events)
+
+
+def sys_check_for_event(mask, key, mouse):
+    global _window_closed
+    if key is not None:
+        key.clear()
+    if mouse is not None:
+        mouse.clear()
+
+    while _events:
+        event, fields = _events.popleft()
+        if fields is _close_event:
+            _window_closed = True
+            return EVENT_NONE
+        if not event & mask:
+            continue
+
+        target = key if event & EVENT_KEY else mouse
+        if target is not None:
+            for name, value in fields.items():
+                setattr(target, name, value)
+            if target is mouse:
+                mouse.x = mouse.cx
+                mouse.y = mouse.cy
+        return event
+
+    return EVENT_NONE
+
+
+def sys_wait_for_event(mask, key, mouse, flush):
+    # Sleeps until another thread queues an event, as the real call sleeps until the window gets one
+    with _event_ready:
+        _event_ready.wait_for(lambda: _events)
+    return sys_check_for_event(mask, key, mouse)
+
+
+def sys_set_fps(fps):
+    global _fps
+    _fps = fps
+
+
+def sys_get_fps():
+    return _fps
+
+
+def sys_elapsed_milli():
+    return int((time.time() - _start_time) * 1000)
+
+
+def sys_elapsed_seconds():
+    return time.time() - _start_time
+
+
+def sys_get_last_frame_length():
+    return 0.0
+
+
+# Window and root console
+def console_set_custom_font(fontFile, flags=FONT_LAYOUT_ASCII_INCOL, nb_char_horiz=0, nb_char_vertic=0):
+    pass
+
+
+def console_init_root(w, h, title, fullscreen=False, renderer=RENDERER_SDL):
+    global _root, _window_closed
+    _root = Console(w, h)
+    _window_closed = False
+
+
+def console_set_window_title(title):
+    pass
+
+
+def console_is_window_closed():
+    return _window_closed
+
+
+def console_is_fullscreen():
+    return False
+
+
+def console_set_fullscreen(fullscreen):
+    pass
+
+
+def console_flush():
+    global flush_count
+    flush_count += 1
+
+
+# Consoles
+def console_new(w, h):
+    return Console(w, h)
+
+
+def console_delete(con):
+    pass
+
+
+def console_get_width(con):
+    return _console(con).width
+
+
+def console_get_height(con):
+    return _console(con).height
+
+
+def console_set_default_background(con, col):
+    _console(con).default_bg = _rgb(col)
+
+
+def console_set_default_foreground(con, col):
+    _console(con).default_fg = _rgb(col)
+
+
+def console_get_default_background(con):
+    return Color(*_console(con).default_bg)
+
+
+def console_get_default_foreground(con):
+    return Color(*_console(con).default_fg)
+
+
+def console_clear(con):
+    _console(con).clear()
+
+
+def console_put_char(con, x, y, c, flag=BKGND_DEFAULT):
+    _console(con).put(x, y, _char_code(c), flag)
+
+
+def console_put_char_ex(con, x, y, c, fore, back):
+    console = _console(con)
+    if console.in_bounds(x, y):
+        console.ch[y, x] = _char_code(c)
+        console.fg[y, x] = _rgb(fore)
+        console.bg[y, x] = _rgb(back)
+
+
+def console_set_char_background(con, x, y, col, flag=BKGND_SET):
+    console = _console(con)
+    if console.in_bounds(x, y):
+        console.bg[y, x] = _blend(console.bg[y, x], _rgb(col), flag)
+
+
+def console_set_char_foreground(con, x, y, col):
+    console = _console(con)
+    if console.in_bounds(x, y):
+        console.fg[y, x] = _rgb(col)
+
+
+def console_set_char(con, x, y, c):
+    console = _console(con)
+    if console.in_bounds(x, y):
+        console.ch[y, x] = _char_code(c)
+
+
+def console_get_char(con, x, y):
+    return int(_console(con).ch[y, x])
+
+
+def console_get_char_background(con, x, y):
+    return Color(*(int(channel) for channel in _console(con).bg[y, x]))
+
+
+def console_get_char_foreground(con, x, y):
+    return Color(*(int(channel) for channel in _console(con).fg[y, x]))
+
+
+def console_get_text(con):
+    """
+    :return list: The characters of a console, one string per row
+    """
+    return _console(con).text()
+
+
+def console_print(con, x, y, fmt):
+    console_print_ex(con, x, y, BKGND_DEFAULT, LEFT, fmt)
+
+
+def console_print_ex(con, x, y, flag, alignment, fmt):
+    console = _console(con)
+    for row, line in enumerate(_to_text(fmt).split('\n')):
+        _print_line(console, x, y + row, flag, alignment, line)
+
+
+def console_print_rect(con, x, y, w, h, fmt):
+    return console_print_rect_ex(con, x, y, w, h, BKGND_DEFAULT, LEFT, fmt)
+
+
+def console_print_rect_ex(con, x, y, w, h, flag, alignment, fmt):
+    console = _console(con)
+    lines = _wrap(fmt, w or console.width - x)
+    if h > 0:
+        lines = lines[:h]
+    for row, line in enumerate(lines):
+        _print_line(console, x, y + row, flag, alignment, line)
+    return len(lines)
+
+
+def console_get_height_rect(con, x, y, w, h, fmt):
+    lines = len(_wrap(fmt, w or _console(con).width - x))
+    if h > 0:
+        return min(lines, h)
+    return lines
+
+
+def console_rect(con, x, y, w, h, clr, flag=BKGND_DEFAULT):
+    console = _console(con)
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + w, console.width), min(y + h, console.height)
+    if x1 >= x2 or y1 >= y2:
+        return
+    console.bg[y1:y2, x1:x2] = _blend(console.bg[y1:y2, x1:x2], console.default_bg, flag)
+    if clr:
+        console.ch[y1:y2, x1:x2] = ord(' ')
+
+
+def console_blit(src, x, y, w, h, dst, xdst, ydst, ffade=1.0, bfade=1.0):
+    source = _console(src)
+    destination = _console(dst)
+    if w == 0:
+        w = source.width
+    if h == 0:
+        h = source.height
+
+    # Clip the copied rectangle against both consoles
+    if x < 0:
+        w, xdst, x = w + x, xdst - x, 0
+    if y < 0:
+        h, ydst, y = h + y, ydst - y, 0
+    if xdst < 0:
+        w, x, xdst = w + xdst, x - xdst, 0
+    if ydst < 0:
+        h, y, ydst = h + ydst, y - ydst, 0
+    w = min(w, source.width - x, destination.width - xdst)
+    h = min(h, source.height - y, destination.height - ydst)
+    if w <= 0 or h <= 0:
+        return
+
+    src_cells = (slice(y, y + h), slice(x, x + w))
+    dst_cells = (slice(ydst, ydst + h), slice(xdst, xdst + w))
+    destination.ch[dst_cells] = source.ch[src_cells]
+    destination.fg[dst_cells] = _lerp(destination.fg[dst_cells], source.fg[src_cells], ffade)
+    destination.bg[dst_cells] = _lerp(destination.bg[dst_cells], source.bg[src_cells], bfade)
+
+
+def console_fill_background(con, r, g, b):
+    console = _console(con)
+    console.bg[...] = np.stack([_plane(console, r), _plane(console, g), _plane(console, b)], axis=-1)
+
+
+def console_fill_foreground(con, r, g, b):
+    console = _console(con)
+    console.fg[...] = np.stack([_plane(console, r), _plane(console, g), _plane(console, b)], axis=-1)
+
+
+def console_fill_char(con, arr):
+    console = _console(con)
+    console.ch[...] = _plane(console, arr)
+
+
+# Images
+def image_load(filename):
+    return Image(filename)
+
+
+def image_blit_2x(image, console, dx, dy, sx=0, sy=0, w=-1, h=-1):
+    pass
+
+
+def image_blit_rect(image, console, x, y, w, h, bkgnd_flag):
+    pass
+
+
+# Maps and field of view
+class Map:
+    """
+    Transparency, walkability and visibility of every cell, as boolean arrays indexed [x, y]
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.transparent = np.zeros((width, height), dtype=bool)
+        self.walkable = np.zeros((width, height), dtype=bool)
+        self.fov = np.zeros((width, height), dtype=bool)
+
+
+def map_new(w, h):
+    return Map(w, h)
+
+
+def map_copy(source, dest):
+    dest.transparent[...] = source.transparent
+    dest.walkable[...] = source.walkable
+    dest.fov[...] = source.fov
+
+
+def map_set_properties(m, x, y, isTrans, isWalk):
+    m.transparent[x, y] = isTrans
+    m.walkable[x, y] = isWalk
+
+
+def map_clear(m, walkable=False, transparent=False):
+    m.walkable[...] = walkable
+    m.transparent[...] = transparent
+    m.fov[...] = False
+
+
+def map_compute_fov(m, x, y, radius=0, light_walls=True, algo=FOV_RESTRICTIVE):
+    # FOV_SHADOW uses shadowcasting; every other algorithm is served by ray casting, libtcod's FOV_BASIC
+    if algo == FOV_SHADOW:
+        m.fov[...] = compute_fov(m.transparent, x, y, radius, light_walls)
+    else:
+        m.fov[...] = False
+        _cast_rays(m, x, y, radius, light_walls)
+
+
+def map_set_in_fov(m, x, y, fov):
+    m.fov[x, y] = fov
+
+
+def map_is_in_fov(m, x, y):
+    return 0 <= x < m.width and 0 <= y < m.height and bool(m.fov[x, y])
+
+
+def map_is_transparent(m, x, y):
+    return bool(m.transparent[x, y])
+
+
+def map_is_walkable(m, x, y):
+    return bool(m.walkable[x, y])
+
+
+def map_delete(m):
+    pass
+
+
+def map_get_width(m):
+    return m.width
+
+
+def map_get_height(m):
+    return m.height
+
+
+# Path finding
+class Path:
+    """
+    A* path over a Map, walked one step at a time like libtcod's path objects
+    """
+
+    def __init__(self, m, dcost):
+        self.map = m
+        self.dcost = dcost
+        self.origin = (0, 0)
+        self.destination = (0, 0)
+        self.steps = []
+
+
+def path_new_using_map(m, dcost=1.41):
+    return Path(m, dcost)
+
+
+def path_compute(p, ox, oy, dx, dy):
+    p.origin = (ox, oy)
+    p.destination = (dx, dy)
+    p.steps = _astar(p.map, ox, oy, dx, dy, p.dcost)
+    return bool(p.steps)
+
+
+def path_get_origin(p):
+    return p.origin
+
+
+def path_get_destination(p):
+    return p.destination
+
+
+def path_size(p):
+    return len(p.steps)
+
+
+def path_reverse(p):
+    if p.steps:
+        p.steps = list(reversed(p.steps[:-1])) + [p.origin]
+        p.origin, p.destination = p.destination, p.origin
+
+
+def path_get(p, idx):
+    return p.steps[idx]
+
+
+def path_is_empty(p):
+    return not p.steps
+
+
+def path_walk(p, recompute):
+    if not p.steps:
+        return None, None
+
+    x, y = p.steps[0]
+    if not p.map.walkable[x, y]:
+        if not recompute or not path_compute(p, p.origin[0], p.origin[1], *p.destination):
+            return None, None
+        x, y = p.steps[0]
+
+    p.steps.pop(0)
+    p.origin = (x, y)
+    return x, y
+
+
+def path_delete(p):
+    pass
+
+
+def _neighbours(dcost):
+    """
+    :return list: (dx, dy, cost) of every step allowed from a cell
+    """
+    if dcost > 0:
+        return [(-1, -1, dcost), (0, -1, 1.0), (1, -1, dcost), (-1, 0, 1.0),
+                (1, 0, 1.0), (-1, 1, dcost), (0, 1, 1.0), (1, 1, dcost)]
+    return [(0, -1, 1.0), (-1, 0, 1.0), (1, 0, 1.0), (0, 1, 1.0)]
+
+
+def _console(con):
+    if con is None or (isinstance(con, int) and con == 0):
+        if _root is None:
+            raise RuntimeError('console_init_root has not been called')
+        return _root
+    return con
+
+
+def _rgb(col):
+    if isinstance(col, str):
+        col = globals().get(col, white)
+    return tuple(int(channel) for channel in col)
+
+
+def _char_code(c):
+    if isinstance(c, (str, bytes)):
+        return ord(c)
+    return int(c)
+
+
+def _to_text(fmt):
+    if isinstance(fmt, bytes):
+        return fmt.decode('latin-1')
+    return str(fmt)
+
+
+def _wrap(fmt, width):
+    text = _to_text(fmt)
+    if not text:
+        return []
+
+    lines = []
+    for paragraph in text.split('\n'):
+        lines.extend(textwrap.wrap(paragraph, max(width, 1)) or [''])
+    return lines
+
+
+def _print_line(console, x, y, flag, alignment, line):
+    if alignment == RIGHT:
+        x -= len(line) - 1
+    elif alignment == CENTER:
+        x -= len(line) // 2
+
+    # Cells of a line that fall on the console are written as one slice
+    start, end = max(x, 0), min(x + len(line), console.width)
+    if not 0 <= y < console.height or start >= end:
+        return
+
+    console.ch[y, start:end] = [ord(char) for char in line[start - x:end - x]]
+    console.fg[y, start:end] = console.default_fg
+    if flag & 0xff not in (BKGND_NONE, BKGND_DEFAULT):
+        console.bg[y, start:end] = _blend(console.bg[y, start:end], console.default_bg, flag)
+
+
+def _plane(console, values):
+    return np.asarray(values, dtype=np.int32).reshape(console.height, console.width)
+
+
+def _lerp(old, new, amount):
+    if amount >= 1.0:
+        return new
+    return (old + (new.astype(np.float32) - old) * amount).astype(np.uint8)
+
+
+def _blend(old, new, flag):
+    """
+    Combine a cell's background with a new colour using a libtcod background flag
+    """
+    mode = flag & 0xff
+    alpha = (flag >> 8) / 255.0
+    old = np.asarray(old, dtype=np.int32)
+    new = np.asarray(new, dtype=np.int32)
+
+    if mode in (BKGND_NONE, BKGND_DEFAULT):
+        result = old
+    elif mode == BKGND_MULTIPLY:
+        result = old * new // 255
+    elif mode == BKGND_LIGHTEN:
+        result = np.maximum(old, new)
+    elif mode == BKGND_DARKEN:
+        result = np.minimum(old, new)
+    elif mode == BKGND_SCREEN:
+        result = 255 - (255 - old) * (255 - new) // 255
+    elif mode == BKGND_ADD:
+        result = old + new
+    elif mode == BKGND_ALPH:
+        result = old + ((new - old) * alpha).astype(np.int32)
+    elif mode == BKGND_ADDA:
+        result = old + (new * alpha).astype(np.int32)
+    else:
+        result = new + 0 * old
+
+    return np.clip(result, 0, 255).astype(np.uint8)
+
+
+def _cast_rays(m, x, y, radius, light_walls):
+    """
+    Light every cell reached by a straight line from the origin to the edge of the FOV square
+    """
+    if radius > 0:
+        x1, x2 = max(x - radius, 0), min(x + radius, m.width - 1)
+        y1, y2 = max(y - radius, 0), min(y + radius, m.height - 1)
+    else:
+        x1, x2, y1, y2 = 0, m.width - 1, 0, m.height - 1
+
+    m.fov[x, y] = True
+    edges = [(cx, y1) for cx in range(x1, x2 + 1)] + [(cx, y2) for cx in range(x1, x2 + 1)]
+    edges += [(x1, cy) for cy in range(y1, y2 + 1)] + [(x2, cy) for cy in range(y1, y2 + 1)]
+
+    radius_squared = radius * radius
+    for edge_x, edge_y in edges:
+        for cx, cy in _line(x, y, edge_x, edge_y):
+            if radius > 0 and (cx - x) ** 2 + (cy - y) ** 2 > radius_squared:
+                break
+            if not m.transparent[cx, cy]:
+                if light_walls:
+                    m.fov[cx, cy] = True
+                break
+            m.fov[cx, cy] = True
+
+
+def _line(x0, y0, x1, y1):
+    """
+    Cells of a Bresenham line, excluding the starting cell
+    """
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    error = dx + dy
+    while (x0, y0) != (x1, y1):
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x0 += sx
+        if doubled <= dx:
+            error += dx
+            y0 += sy
+        yield x0, y0
+
+
+def _astar(m, ox, oy, dx, dy, dcost):
+    """
+    :return list: Cells from the step after the origin up to the destination, empty if unreachable
+    """
+    if (ox, oy) == (dx, dy) or not (0 <= dx < m.width and 0 <= dy < m.height) or not m.walkable[dx, dy]:
+        return []
+
+    neighbours = _neighbours(dcost)
+    width, height = m.width, m.height
+    # Nested lists index much faster than NumPy scalars in the search loop
+    walkable = m.walkable.tolist()
+    hypot = math.hypot
+
+    costs = {(ox, oy): 0.0}
+    came_from = {}
+    frontier = [(hypot(dx - ox, dy - oy), 0.0, ox, oy)]
+    while frontier:
+        priority, cost, x, y = heapq.heappop(frontier)
+        if x == dx and y == dy:
+            break
+        if cost > costs[(x, y)]:
+            continue
+        for step_x, step_y, step_cost in neighbours:
+            nx, ny = x + step_x, y + step_y
+            if not (0 <= nx < width and 0 <= ny < height) or not walkable[nx][ny]:
+                continue
+            new_cost = cost + step_cost
+            if new_cost < costs.get((nx, ny), INFINITY):
+                costs[(nx, ny)] = new_cost
+                came_from[(nx, ny)] = (x, y)
+                heapq.heappush(frontier, (new_cost + hypot(dx - nx, dy - ny), new_cost, nx, ny))
+    else:
+        return []
+
+    steps = []
+    cell = (dx, dy)
+    while cell != (ox, oy):
+        steps.append(cell)
+        cell = came_from[cell]
+    steps.reverse()
+    return steps
@@ -0,0 +1,12 @@
+"""
+Command line arguments shared by the benchmarks and simulations
+"""
+
+
+def parse_size(text):
+    """
+    :param str text: A map size, such as 200x200
+    :return tuple: width and height
+    """
+    width, height = text.lower().split('x')
+    return int(width), int(height)
@@ -0,0 +1,123 @@
+"""
+Enemy turn benchmark
+Times the pathing phase of an enemy turn, with every monster moving towards the player using
+Entity.move_astar, for increasing monster counts.  The shared Navigation Grid is compared with the
+original approach of rebuilding a libtcod map inside every move_astar call, and with the shared
+flow field used by Entity.move_flow.
+
+Run from the repository root:
+    python -m benchmarks.enemy_turn --counts 10 20 40 80 --turns 20
+"""
+import argparse
+import random
+import time
+
+from backends import libtcod
+from loader_functions.initialize_new_game import get_constants, get_game_variables
+from map_objects.entity import Entity
+from map_objects.monster_factory import MonsterFactory
+
+
+def legacy_move_astar(self, target, entities, game_map):
+    """
+    The original move_astar, which builds, fills and frees a libtcod map for every call
+    """
+    fov = libtcod.map_new(game_map.width, game_map.height)
+
+    for y1 in range(game_map.height):
+        for x1 in range(game_map.width):
+            libtcod.map_set_properties(fov, x1, y1, not game_map.block_sight[x1, y1],
+                                       not game_map.block_move[x1, y1])
+
+    for entity in entities:
+        if entity.blocks and entity != self and entity != target:
+            libtcod.map_set_properties(fov, entity.x, entity.y, True, False)
+
+    my_path = libtcod.path_new_using_map(fov, 1.41)
+    libtcod.path_compute(my_path, self.x, self.y, target.x, target.y)
+
+    if not libtcod.path_is_empty(my_path) and libtcod.path_size(my_path) < 25:
+        x, y = libtcod.path_walk(my_path, True)
+        if x or y:
+            self.x = x
+            self.y = y
+    else:
+        self.move_towards(target.x, target.y, game_map, entities)
+
+    libtcod.path_delete(my_path)
+    libtcod.map_delete(fov)
+
+
+def build_floor(constants, monster_count, seed):
+    """
+    Generate a floor and fill it with exactly monster_count monsters
+    :param dict constants: Game constants
+    :param int monster_count: Number of monsters to place
+    :param int seed: Random seed, so every run sees the same floor
+    :return tuple: player, entities, game_map
+    """
+    random.seed(seed)
+    player, entities, game_map, message_log, game_state = get_game_variables(constants)
+
+    # Replace generated monsters and spawners so the monster count is exact
+    entities[:] = [entity for entity in entities if not (entity.ai or entity.spawner)]
+
+    floor = [(x, y) for x in range(game_map.width) for y in range(game_map.height)
+             if not game_map.is_blocked(x, y) and (x, y) != (player.x, player.y)]
+    random.shuffle(floor)
+    for x, y in floor[:monster_count]:
+        entities.append(MonsterFactory.get_monster_by_name(constants['monster_dict'], 'orc', x, y))
+
+    return player, entities, game_map
+
+
+def time_enemy_turns(player, entities, game_map, turns, flow_field=False):
+    """
+    Run a number of enemy turns in which every monster paths towards the player
+    :param bool flow_field: Move with Entity.move_flow rather than Entity.move_astar
+    :return float: Average seconds per enemy turn
+    """
+    monsters = [entity for entity in entities if entity.ai]
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        for monster in monsters:
+            if flow_field:
+                monster.move_flow(player, entities, game_map)
+            else:
+                monster.move_astar(player, entities, game_map)
+    return (time.perf_counter() - start) / turns
+
+
+def run(counts, turns, seed):
+    constants = get_constants()
+    print('{0:>8} {1:>12} {2:>12} {3:>14} {4:>8}'.format('monsters', 'legacy ms', 'nav grid ms',
+                                                          'flow field ms', 'speedup'))
+
+    for count in counts:
+        original_move_astar = Entity.move_astar
+        Entity.move_astar = legacy_move_astar
+        try:
+            legacy = time_enemy_turns(*build_floor(constants, count, seed), turns=turns)
+        finally:
+            Entity.move_astar = original_move_astar
+
+        shared = time_enemy_turns(*build_floor(constants, count, seed), turns=turns)
+        flow = time_enemy_turns(*build_floor(constants, count, seed), turns=turns, flow_field=True)
+
+        print('{0:>8} {1:>12.3f} {2:>12.3f} {3:>14.3f} {4:>7.1f}x'.format(count, legacy * 1000, shared * 1000,
+                                                                         flow * 1000, legacy / shared))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enemy turn time against monster count')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 20, 40, 80, 160])
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.counts, args.turns, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Floor change benchmark
+Times taking the stairs down for maps of increasing size, with the next floor made when the stairs are
+taken and with it made ahead of time by a FloorPrefetcher while the current floor is played.  The time
+spent playing a floor is stood in for by a pause, and the seconds saved per floor are reported.
+
+Run from the repository root:
+    python -m benchmarks.floor_change --sizes 80x43 500x500 1000x1000 --floors 5 --play-ms 2000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from benchmarks.arguments import parse_size  # noqa: E402
+from loader_functions.initialize_new_game import get_constants, get_game_variables  # noqa: E402
+from map_objects.floor_prefetcher import FloorPrefetcher  # noqa: E402
+
+
+def descend(constants, floors, play_seconds, prefetcher=None):
+    """
+    Take the stairs down a number of times
+    :param float play_seconds: Pause on each floor before the stairs are taken
+    :return tuple: Seconds each trip down the stairs took, and the floors that were made ahead of time
+    """
+    player, entities, game_map, message_log, game_state = get_game_variables(constants)
+
+    times = []
+    for floor in range(floors):
+        if prefetcher is not None:
+            prefetcher.prefetch(game_map.dungeon_level + 1, game_map.seed)
+        time.sleep(play_seconds)
+
+        start = time.perf_counter()
+        entities = game_map.next_floor(player, message_log, constants, prefetcher)
+        times.append(time.perf_counter() - start)
+
+    return times, prefetcher.hits if prefetcher is not None else 0
+
+
+def run(sizes, floors, play_seconds):
+    base_constants = get_constants()
+    print('{0:>10} {1:>14} {2:>14} {3:>8} {4:>12}'.format('map', 'generate ms', 'prefetched ms', 'hits',
+                                                           'saved ms'))
+
+    for width, height in sizes:
+        # Room count grows with the area, so large maps are as full as the default one
+        max_rooms = max(base_constants['max_rooms'], base_constants['max_rooms'] * width * height // (80 * 43))
+        constants = dict(base_constants, map_width=width, map_height=height, max_rooms=max_rooms)
+
+        generate_times = descend(constants, floors, 0)[0]
+        prefetcher = FloorPrefetcher(constants)
+        try:
+            prefetched_times, hits = descend(constants, floors, play_seconds, prefetcher)
+        finally:
+            prefetcher.close()
+
+        generate = sum(generate_times) / floors
+        prefetched = sum(prefetched_times) / floors
+        print('{0:>10} {1:>14.2f} {2:>14.2f} {3:>8} {4:>12.2f}'.format(
+            '{0}x{1}'.format(width, height), generate * 1000, prefetched * 1000, '{0}/{1}'.format(hits, floors),
+            (generate - prefetched) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time taking the stairs, with and without prefetched floors')
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(80, 43), (500, 500)])
+    parser.add_argument('--floors', type=int, default=5)
+    parser.add_argument('--play-ms', type=int, default=2000, help='time spent on each floor before the stairs')
+    args = parser.parse_args()
+
+    run(args.sizes, args.floors, args.play_ms / 1000.0)
+
+
+if __name__ == '__main__':
+    main()
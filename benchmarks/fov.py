@@ -0,0 +1,103 @@
+"""
+Field of view benchmark
+Times libtcod's map_compute_fov, followed by reading the lit tiles into an array as render_all does,
+against the recursive shadowcasting in fov_shadowcasting, from a sample of floor tiles on generated
+maps.  Also reports how many tiles the shadowcasting result shares with libtcod's
+FOV_SHADOW, and the time and hit rate of recompute_fov's result cache when every sampled position
+is visited four times over, as when pacing back and forth.
+
+Run from the repository root:
+    python -m benchmarks.fov --sizes 80x43 1000x1000 --radius 10
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from backends import libtcod
+from benchmarks.arguments import parse_size
+from fov_functions import initialize_fov, recompute_fov
+from fov_shadowcasting import compute_fov
+from loader_functions.initialize_new_game import get_constants
+from map_objects.entity import Entity
+from map_objects.entity_index import EntityList
+from map_objects.game_map import GameMap
+
+
+def build_map(constants, width, height, seed):
+    """
+    :return GameMap: A generated floor of the given size
+    """
+    random.seed(seed)
+    player = Entity(0, 0, '@', None, 'Player', blocks=True)
+    game_map = GameMap(width, height, constants['monster_dict'], constants['item_dict'])
+    game_map.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
+                      width, height, player, EntityList([player]))
+    return game_map
+
+
+def time_per_call(compute, origins):
+    """
+    :param compute: Callable taking a viewer position
+    :return float: Average seconds per call
+    """
+    start = time.perf_counter()
+    for x, y in origins:
+        compute(x, y)
+    return (time.perf_counter() - start) / len(origins)
+
+
+def run(sizes, radius, samples, seed):
+    constants = get_constants()
+    light_walls = constants['fov_light_walls']
+    print('{0:>10} {1:>12} {2:>12} {3:>14} {4:>10} {5:>10} {6:>9}'.format(
+        'size', 'basic ms', 'shadow ms', 'recursive ms', 'agreement', 'cached ms', 'hit rate'))
+
+    for width, height in sizes:
+        game_map = build_map(constants, width, height, seed)
+        transparent = ~game_map.block_sight
+        fov_map = initialize_fov(game_map, cache_size=0)
+
+        floor = np.argwhere(~game_map.block_move)
+        rng = random.Random(seed)
+        origins = [tuple(int(i) for i in floor[rng.randrange(len(floor))]) for sample in range(samples)]
+
+        def libtcod_fov(algorithm):
+            def compute(x, y):
+                recompute_fov(fov_map, x, y, radius, light_walls, algorithm)
+                return fov_map.visible.copy()
+            return compute
+
+        basic = time_per_call(libtcod_fov(libtcod.FOV_BASIC), origins)
+        shadow = time_per_call(libtcod_fov(libtcod.FOV_SHADOW), origins)
+        recursive = time_per_call(lambda x, y: compute_fov(transparent, x, y, radius, light_walls), origins)
+
+        matching = 0
+        for x, y in origins:
+            matching += np.count_nonzero(libtcod_fov(libtcod.FOV_SHADOW)(x, y) ==
+                                         compute_fov(transparent, x, y, radius, light_walls))
+
+        cached_map = initialize_fov(game_map, cache_size=len(origins))
+        cached = time_per_call(lambda x, y: recompute_fov(cached_map, x, y, radius, light_walls,
+                                                          constants['fov_algorithm']), origins * 4)
+
+        print('{0:>10} {1:>12.3f} {2:>12.3f} {3:>14.3f} {4:>9.4f}% {5:>10.3f} {6:>8.1f}%'.format(
+            '{0}x{1}'.format(width, height), basic * 1000, shadow * 1000, recursive * 1000,
+            100.0 * matching / (width * height * len(origins)), cached * 1000,
+            100.0 * cached_map.cache.stats()['hit_rate']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Field of view time, libtcod against shadowcasting')
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(80, 43), (1000, 1000)])
+    parser.add_argument('--radius', type=int, default=10)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.sizes, args.radius, args.samples, args.seed)
+
+
+if __name__ == '__main__':
+    main()
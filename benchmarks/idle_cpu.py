@@ -0,0 +1,77 @@
+"""
+Idle CPU benchmark
+Starts a game and leaves it alone for a while, then reports the CPU time the process used as a share
+of the wall-clock time, and how many frames were flushed.  A game loop that waits for input uses next
+to none; one that polls for it keeps a core busy.  Mouse movement can be fed in at a steady rate to see
+what a moving cursor costs.
+
+Run from the repository root:
+    python -m benchmarks.idle_cpu --seconds 5 --mouse-rate 0
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from backends import libtcod  # noqa: E402
+from engine import play_game  # noqa: E402
+from loader_functions.initialize_new_game import get_constants, get_game_variables  # noqa: E402
+
+
+def feed_mouse(rate, stop, width, height):
+    """
+    Move the mouse to a random cell rate times a second until stopped
+    """
+    rng = random.Random(1)
+    while not stop.wait(1.0 / rate):
+        libtcod.push_mouse(rng.randrange(width), rng.randrange(height))
+
+
+def run(seconds, mouse_rate, seed):
+    random.seed(seed)
+    constants = get_constants()
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'])
+    if constants['fps_limit']:
+        libtcod.sys_set_fps(constants['fps_limit'])
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+    player, entities, game_map, message_log, game_state = get_game_variables(constants)
+
+    stop = threading.Event()
+    threads = [threading.Timer(seconds, libtcod.close_window)]
+    if mouse_rate > 0:
+        threads.append(threading.Thread(target=feed_mouse, args=(mouse_rate, stop, constants['screen_width'],
+                                                                 constants['screen_height'])))
+    for thread in threads:
+        thread.start()
+
+    flushes = libtcod.flush_count
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    play_game(player, entities, game_map, message_log, game_state, con, panel, constants)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print('{0:.2f} s wall  {1:.2f} s CPU  {2:.1%} of a core  {3} frames flushed'.format(
+        wall, cpu, cpu / wall, libtcod.flush_count - flushes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU used by a game left idle')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--mouse-rate', type=float, default=0.0, help='mouse movements a second')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.seconds, args.mouse_rate, args.seed)
+
+
+if __name__ == '__main__':
+    main()
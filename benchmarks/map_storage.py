@@ -0,0 +1,101 @@
+"""
+Map storage benchmark
+Compares the memory held by a floor's tiles, and the time taken to allocate them, between the
+original list of per-cell Tile objects and the GameMap tile arrays, then times a full make_map for
+each map size.
+
+Run from the repository root:
+    python -m benchmarks.map_storage --sizes 80x43 500x500 2000x2000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks.arguments import parse_size
+from loader_functions.initialize_new_game import get_constants
+from map_objects.entity import Entity
+from map_objects.entity_index import EntityList
+from map_objects.game_map import GameMap
+
+
+class LegacyTile:
+    """
+    The original per-cell Tile object
+    """
+
+    def __init__(self, block_move=False, block_sight=None):
+        self.block_move = block_move
+
+        if block_sight is None:
+            self.block_sight = block_move
+        else:
+            self.block_sight = block_sight
+
+        self.explored = False
+
+
+def measure(allocate):
+    """
+    :param allocate: Callable returning the allocated tile storage
+    :return tuple: (bytes held, seconds taken)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    storage = allocate()
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del storage
+    return held, elapsed
+
+
+def time_make_map(constants, width, height, seed):
+    """
+    :return float: Seconds taken to allocate tiles and generate a floor
+    """
+    random.seed(seed)
+    player = Entity(0, 0, '@', None, 'Player', blocks=True)
+    entities = EntityList([player])
+
+    start = time.perf_counter()
+    game_map = GameMap(width, height, constants['monster_dict'], constants['item_dict'])
+    game_map.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
+                      width, height, player, entities)
+    return time.perf_counter() - start
+
+
+def run(sizes, seed):
+    constants = get_constants()
+    print('{0:>10} {1:>14} {2:>14} {3:>14} {4:>14} {5:>14}'.format(
+        'size', 'legacy MiB', 'array MiB', 'legacy alloc s', 'array alloc s', 'make_map s'))
+
+    for width, height in sizes:
+        legacy_bytes, legacy_time = measure(
+            lambda: [[LegacyTile(True) for y in range(height)] for x in range(width)])
+
+        game_map = GameMap.__new__(GameMap)
+        game_map.width = width
+        game_map.height = height
+        game_map.version = 0
+        array_bytes, array_time = measure(lambda: game_map.initialize_tiles(True))
+
+        generation_time = time_make_map(constants, width, height, seed)
+
+        print('{0:>10} {1:>14.2f} {2:>14.2f} {3:>14.4f} {4:>14.4f} {5:>14.4f}'.format(
+            '{0}x{1}'.format(width, height), legacy_bytes / 2 ** 20, array_bytes / 2 ** 20,
+            legacy_time, array_time, generation_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tile storage memory and generation time')
+    parser.add_argument('--sizes', type=parse_size, nargs='+',
+                        default=[(80, 43), (500, 500), (2000, 2000)])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.sizes, args.seed)
+
+
+if __name__ == '__main__':
+    main()
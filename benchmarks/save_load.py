@@ -0,0 +1,98 @@
+"""
+Save and load benchmark
+Saves and loads floors of increasing size and monster count through the original shelve path and the
+binary save format, with the tile layers compressed, raw, and raw but memory-mapped on load, and
+reports the time each takes and the size of the files written.
+
+Run from the repository root:
+    python -m benchmarks.save_load --sizes 80x43 500x500 2000x2000 --monsters 40 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from benchmarks.arguments import parse_size  # noqa: E402
+from benchmarks.enemy_turn import build_floor  # noqa: E402
+from game_messages import Message, MessageLog  # noqa: E402
+from game_states import GameStates  # noqa: E402
+from loader_functions.data_loaders import load_game_shelve, save_game_shelve  # noqa: E402
+from loader_functions.initialize_new_game import get_constants  # noqa: E402
+from loader_functions.save_format import read_save, write_save  # noqa: E402
+
+
+def files_size(directory, prefix):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+               if name.startswith(prefix))
+
+
+def best_of(repeats, function):
+    """
+    :return tuple: Fewest seconds any of the calls took, and what the last call returned
+    """
+    best = None
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(game, directory, repeats):
+    """
+    :param tuple game: player, entities, game_map, message_log and game_state
+    :return dict: For each way of saving, (save seconds, load seconds, bytes on disk)
+    """
+    results = {}
+
+    path = os.path.join(directory, 'shelve')
+    save = best_of(repeats, lambda: save_game_shelve(*game, path=path))[0]
+    load = best_of(repeats, lambda: load_game_shelve(path))[0]
+    results['shelve'] = (save, load, files_size(directory, 'shelve'))
+
+    for name, compress, mmap in (('zlib', True, False), ('raw', False, False), ('raw+mmap', False, True)):
+        path = os.path.join(directory, name + '.sav')
+        save = best_of(repeats, lambda: write_save(path, *game, compress=compress))[0]
+        load = best_of(repeats, lambda: read_save(path, mmap=mmap))[0]
+        results[name] = (save, load, os.path.getsize(path))
+
+    return results
+
+
+def run(sizes, monster_counts, repeats, seed):
+    base_constants = get_constants()
+    print('{0:>10} {1:>8} {2:>9} {3:>10} {4:>10} {5:>12}'.format('map', 'monsters', 'format', 'save ms',
+                                                                  'load ms', 'bytes'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in sizes:
+            constants = dict(base_constants, map_width=width, map_height=height)
+            for monster_count in monster_counts:
+                player, entities, game_map = build_floor(constants, monster_count, seed)
+                message_log = MessageLog(constants['message_x'], constants['message_width'],
+                                         constants['message_height'])
+                for line in range(constants['message_height']):
+                    message_log.add_message(Message('The Orc attacks the Player for 3 hit points.'))
+                game = (player, entities, game_map, message_log, GameStates.PLAYERS_TURN)
+
+                for name, (save, load, size) in measure(game, directory, repeats).items():
+                    print('{0:>10} {1:>8} {2:>9} {3:>10.2f} {4:>10.2f} {5:>12}'.format(
+                        '{0}x{1}'.format(width, height), monster_count, name, save * 1000, load * 1000, size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Save and load times and file sizes, shelve against binary')
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(80, 43), (500, 500)])
+    parser.add_argument('--monsters', type=int, nargs='+', default=[40, 1000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.sizes, args.monsters, args.repeats, args.seed)
+
+
+if __name__ == '__main__':
+    main()
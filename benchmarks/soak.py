@@ -0,0 +1,111 @@
+"""
+Native handle soak test
+Plays through many floors without a window, doing on each one what play_game does: building the FOV
+map, recomputing FOV, moving every monster with move_astar and drawing the map, inventory menu and
+character screen.  Live native handle counts are printed as it goes.  If handles are still held once the
+game lets go of them, or more are live at the end than after the first few floors, something is
+leaking and the exit status is 1.
+
+Run from the repository root:
+    python -m benchmarks.soak --floors 200 --turns 10
+"""
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from backends import libtcod  # noqa: E402
+from backends.handles import handles  # noqa: E402
+from fov_functions import initialize_fov, recompute_fov  # noqa: E402
+from game_states import GameStates  # noqa: E402
+from loader_functions.initialize_new_game import get_constants, get_game_variables  # noqa: E402
+from menus import menu_cache  # noqa: E402
+from render_functions import render_all  # noqa: E402
+
+WARMUP_FLOORS = 5
+
+
+def play_floor(constants, con, panel, player, entities, game_map, message_log, turns):
+    """
+    Build the FOV map for a floor, then run turns of monster movement and drawing
+    """
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    mouse = libtcod.Mouse()
+    states = (GameStates.PLAYERS_TURN, GameStates.SHOW_INVENTORY, GameStates.CHARACTER_SCREEN)
+
+    for turn in range(turns):
+        recompute_fov(fov_map, player.x, player.y, constants['fov_radius'], constants['fov_light_walls'],
+                      constants['fov_algorithm'])
+        for entity in list(entities):
+            if entity.ai:
+                entity.move_astar(player, entities, game_map)
+
+        render_all(con, panel, entities, player, game_map, fov_map, True, message_log,
+                   constants['screen_width'], constants['screen_height'], constants['bar_width'],
+                   constants['panel_height'], constants['panel_y'], mouse, constants['colors'],
+                   states[turn % len(states)])
+
+    fov_map.delete()
+
+
+def format_counts(counts):
+    return '  '.join('{0} {1}/{2}'.format(kind, count['live'], count['created'])
+                     for kind, count in counts.items())
+
+
+def run(floors, turns, seed):
+    random.seed(seed)
+    constants = get_constants()
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'])
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+
+    player, entities, game_map, message_log, game_state = get_game_variables(constants)
+
+    print('live/created handles per kind')
+    live_after_warmup = None
+    for floor in range(1, floors + 1):
+        play_floor(constants, con, panel, player, entities, game_map, message_log, turns)
+        entities = game_map.next_floor(player, message_log, constants)
+
+        if floor == WARMUP_FLOORS:
+            live_after_warmup = handles.live()
+        if floor % max(floors // 10, 1) == 0 or floor == floors:
+            print('floor {0:>5}  {1}'.format(floor, format_counts(handles.counts())))
+
+    game_map.release_nav_grid()
+    # Menu windows are kept while they may be shown again, and given back when the game ends
+    print('menu windows cached  {0}'.format(menu_cache.stats()['size']))
+    menu_cache.clear()
+    in_use = sum(count['in_use'] for count in handles.counts().values())
+    growth = handles.live() - live_after_warmup if live_after_warmup is not None else 0
+
+    handles.close()
+    libtcod.console_delete(panel)
+    libtcod.console_delete(con)
+    print('after close  {0}'.format(format_counts(handles.counts())))
+
+    if in_use or growth > 0:
+        print('LEAK: {0} handles never released, {1} more live than after floor {2}'.format(
+            in_use, growth, WARMUP_FLOORS))
+        return False
+
+    print('no leaked handles')
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that native handles are not leaked over many floors')
+    parser.add_argument('--floors', type=int, default=200)
+    parser.add_argument('--turns', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not run(args.floors, args.turns, args.seed):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+"""
+Hot path benchmark suite
+Times the parts of the game that run every turn or every floor: GameMap.make_map, initialize_fov,
+recompute_fov, Entity.move_astar, render_all (also on maps larger than the screen, drawn through a
+camera), MessageLog.add_message and the enemy-turn loop of play_game.  Every case is set up from a
+fixed seed and run over a range of map sizes, monster counts or message volumes.  Results are written
+to a JSON file and, given a baseline written by an earlier run, compared with it; any case slower than
+the baseline by more than the threshold is flagged and the exit status is 1.
+
+Baselines depend on the machine, so none is kept in the repository; with no baseline file yet, the run
+says so and compares nothing.  Write one with --update-baseline, then compare later runs with it.
+
+Run from the repository root:
+    python -m benchmarks.suite --output results.json --baseline benchmarks/baseline.json --update-baseline
+    python -m benchmarks.suite --output results.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from backends import libtcod  # noqa: E402
+from benchmarks.arguments import parse_size  # noqa: E402
+from benchmarks.enemy_turn import build_floor  # noqa: E402
+from camera import Camera  # noqa: E402
+from death_functions import kill_monster  # noqa: E402
+from fov_functions import initialize_fov, recompute_fov  # noqa: E402
+from game_messages import Message, MessageLog  # noqa: E402
+from game_states import GameStates  # noqa: E402
+from loader_functions.initialize_new_game import get_constants  # noqa: E402
+from map_objects.entity import Entity  # noqa: E402
+from map_objects.entity_index import EntityList  # noqa: E402
+from map_objects.game_map import GameMap  # noqa: E402
+from map_objects.monster_factory import MonsterFactory  # noqa: E402
+from render_functions import render_all  # noqa: E402
+from screen_buffer import ScreenBuffer  # noqa: E402
+
+MESSAGE_TEXT = ('The Orc attacks the Player for 3 hit points, and the Player staggers back against the '
+                'wall of the corridor.')
+
+
+def generate_floor(constants, width, height, seed):
+    """
+    :return tuple: player, entities and game_map for a floor generated from a seed
+    """
+    random.seed(seed)
+    player = Entity(0, 0, '@', libtcod.white, 'Player', blocks=True)
+    entities = EntityList([player])
+    game_map = GameMap(width, height, constants['monster_dict'], constants['item_dict'])
+    game_map.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
+                      width, height, player, entities)
+    return player, entities, game_map
+
+
+def floor_cells(game_map, count, seed):
+    """
+    :return list: Up to count open cells of a map, in an order fixed by the seed
+    """
+    cells = [(x, y) for x in range(game_map.width) for y in range(game_map.height) if not game_map.is_blocked(x, y)]
+    random.Random(seed).shuffle(cells)
+    return cells[:count]
+
+
+def restore_positions(positions):
+    """
+    Put entities back where they started, so every call of a case begins from the same state
+    :param list positions: (entity, x, y)
+    """
+    for entity, x, y in positions:
+        entity.set_position(x, y)
+
+
+def make_map_case(constants, size, seed):
+    width, height = size
+
+    def step():
+        generate_floor(constants, width, height, seed)
+
+    return step
+
+
+def initialize_fov_case(constants, size, seed):
+    game_map = generate_floor(constants, size[0], size[1], seed)[2]
+
+    def step():
+        initialize_fov(game_map, 0).delete()
+
+    return step
+
+
+def recompute_fov_case(constants, size, seed):
+    game_map = generate_floor(constants, size[0], size[1], seed)[2]
+    fov_map = initialize_fov(game_map, 0)
+    positions = floor_cells(game_map, 64, seed)
+    turn = [0]
+
+    def step():
+        x, y = positions[turn[0] % len(positions)]
+        turn[0] += 1
+        recompute_fov(fov_map, x, y, constants['fov_radius'], constants['fov_light_walls'],
+                      constants['fov_algorithm'])
+
+    return step
+
+
+def move_astar_case(constants, monsters, seed):
+    player, entities, game_map = build_floor(constants, monsters, seed)
+    movers = [entity for entity in entities if entity.ai]
+    positions = [(monster, monster.x, monster.y) for monster in movers]
+
+    def step():
+        restore_positions(positions)
+        for monster in movers:
+            monster.move_astar(player, entities, game_map)
+
+    return step
+
+
+def render_all_case(constants, monsters, seed, buffered=False):
+    player, entities, game_map = build_floor(constants, monsters, seed)
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    recompute_fov(fov_map, player.x, player.y, constants['fov_radius'], constants['fov_light_walls'],
+                  constants['fov_algorithm'])
+    message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
+    for line in range(constants['message_height']):
+        message_log.add_message(Message(MESSAGE_TEXT))
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+    mouse = libtcod.Mouse()
+    screen_buffer = ScreenBuffer(constants['screen_width'], constants['panel_y']) if buffered else None
+
+    def step():
+        render_all(con, panel, entities, player, game_map, fov_map, True, message_log,
+                   constants['screen_width'], constants['screen_height'], constants['bar_width'],
+                   constants['panel_height'], constants['panel_y'], mouse, constants['colors'],
+                   GameStates.PLAYERS_TURN, screen_buffer)
+
+    return step
+
+
+def render_all_buffered_case(constants, monsters, seed):
+    return render_all_case(constants, monsters, seed, buffered=True)
+
+
+def render_view_case(constants, size, seed):
+    # A fixed number of monsters, so only the map size changes between sizes
+    constants = dict(constants, map_width=size[0], map_height=size[1])
+    player, entities, game_map = build_floor(constants, 40, seed)
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    recompute_fov(fov_map, player.x, player.y, constants['fov_radius'], constants['fov_light_walls'],
+                  constants['fov_algorithm'])
+    message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+    mouse = libtcod.Mouse()
+    screen_buffer = ScreenBuffer(constants['screen_width'], constants['panel_y'])
+    camera = Camera(constants['screen_width'], constants['panel_y'])
+    camera.follow(player.x, player.y, game_map.width, game_map.height)
+
+    def step():
+        render_all(con, panel, entities, player, game_map, fov_map, True, message_log,
+                   constants['screen_width'], constants['screen_height'], constants['bar_width'],
+                   constants['panel_height'], constants['panel_y'], mouse, constants['colors'],
+                   GameStates.PLAYERS_TURN, screen_buffer, None, camera)
+
+    return step
+
+
+def add_message_case(constants, messages, seed):
+    rng = random.Random(seed)
+    texts = [MESSAGE_TEXT[:rng.randint(10, len(MESSAGE_TEXT))] for message in range(messages)]
+
+    def step():
+        message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
+        for text in texts:
+            message_log.add_message(Message(text))
+
+    return step
+
+
+def enemy_turn_case(constants, monsters, seed):
+    player, entities, game_map = build_floor(constants, 0, seed)
+    # An open hall around the player, wide enough that every monster stands in view and takes a whole
+    # turn, pathing towards the player or attacking
+    radius = constants['fov_radius']
+    player.set_position(game_map.width // 2, game_map.height // 2)
+    x1, y1 = max(player.x - radius, 1), max(player.y - radius, 1)
+    x2, y2 = min(player.x + radius, game_map.width - 2), min(player.y + radius, game_map.height - 2)
+    game_map.set_blocked(x1, y1, x2, y2, False)
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    recompute_fov(fov_map, player.x, player.y, radius, constants['fov_light_walls'], constants['fov_algorithm'])
+    in_view = [(x, y) for x, y in floor_cells(game_map, game_map.width * game_map.height, seed)
+               if fov_map.is_in_fov(x, y) and (x, y) != (player.x, player.y)]
+    if len(in_view) < monsters:
+        raise ValueError('Only {0} tiles are in view of the player for {1} monsters'.format(len(in_view), monsters))
+    for x, y in in_view[:monsters]:
+        entities.append(MonsterFactory.get_monster_by_name(constants['monster_dict'], 'orc', x, y))
+    message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
+    positions = [(entity, entity.x, entity.y) for entity in entities if entity.ai]
+
+    def step():
+        restore_positions(positions)
+        # The enemy-turn loop of play_game, with the player kept alive so every turn does the same work
+        for entity in entities:
+            if entity.ai:
+                for result in entity.ai.take_turn(player, fov_map, game_map, entities):
+                    if result.get('message'):
+                        message_log.add_message(result['message'])
+                    dead_entity = result.get('dead')
+                    if dead_entity and dead_entity != player:
+                        message_log.add_message(kill_monster(dead_entity))
+        player.fighter.hp = player.fighter.max_hp
+
+    return step
+
+
+# name: (case, label of the command line parameter values it is run over)
+BENCHMARKS = {
+    'make_map': (make_map_case, 'sizes'),
+    'initialize_fov': (initialize_fov_case, 'sizes'),
+    'recompute_fov': (recompute_fov_case, 'sizes'),
+    'move_astar': (move_astar_case, 'monsters'),
+    'render_all': (render_all_case, 'monsters'),
+    'render_all_buffered': (render_all_buffered_case, 'monsters'),
+    'render_view': (render_view_case, 'sizes'),
+    'add_message': (add_message_case, 'messages'),
+    'enemy_turn': (enemy_turn_case, 'monsters')
+}
+
+
+def format_parameter(value):
+    if isinstance(value, tuple):
+        return 'x'.join(str(part) for part in value)
+    return str(value)
+
+
+def time_case(step, repeats):
+    """
+    Call a case once to warm up, then time it
+    :return dict: min, median and mean milliseconds per call, and the number of timed calls
+    """
+    step()
+    timings = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        step()
+        timings.append(1000.0 * (time.perf_counter() - start))
+
+    return {
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.mean(timings),
+        'repeats': repeats
+    }
+
+
+def run(names, parameters, repeats, seed):
+    """
+    :param list names: Benchmarks to run
+    :param dict parameters: Parameter values for each parameter label
+    :return dict: meta and results, keyed by case name such as make_map[80x43]
+    """
+    constants = get_constants()
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'])
+
+    results = {}
+    for name in names:
+        case, label = BENCHMARKS[name]
+        for value in parameters[label]:
+            case_name = '{0}[{1}]'.format(name, format_parameter(value))
+            results[case_name] = time_case(case(constants, value, seed), repeats)
+            print('{0:<28} {1:>10.3f} ms median {2:>10.3f} ms min'.format(
+                case_name, results[case_name]['median_ms'], results[case_name]['min_ms']), flush=True)
+
+    return {
+        'meta': {
+            'seed': seed,
+            'repeats': repeats,
+            'backend': os.environ['ROGUELIKE_BACKEND'],
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median times with a baseline
+    :param float threshold: Fraction by which a case may be slower than the baseline before it is flagged
+    :return list: Names of the cases that regressed
+    """
+    regressions = []
+    print('\n{0:<28} {1:>12} {2:>12} {3:>8}'.format('case', 'baseline ms', 'now ms', 'change'))
+    for case_name, result in results['results'].items():
+        before = baseline['results'].get(case_name)
+        if before is None:
+            print('{0:<28} {1:>12} {2:>12.3f}'.format(case_name, '-', result['median_ms']))
+            continue
+
+        change = result['median_ms'] / before['median_ms'] - 1.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(case_name)
+        print('{0:<28} {1:>12.3f} {2:>12.3f} {3:>+7.1%}{4}'.format(
+            case_name, before['median_ms'], result['median_ms'], change, '  REGRESSION' if regressed else ''))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the game\'s hot paths and compare with a baseline')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(80, 43), (200, 200)])
+    parser.add_argument('--monsters', type=int, nargs='+', default=[10, 40, 160])
+    parser.add_argument('--messages', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark_results.json', help='file the results are written to')
+    parser.add_argument('--baseline', help='results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='fraction slower than the baseline that counts as a regression')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results to the baseline file')
+    args = parser.parse_args()
+
+    parameters = {'sizes': args.sizes, 'monsters': args.monsters, 'messages': args.messages}
+    results = run(args.only, parameters, args.repeats, args.seed)
+
+    with open(args.output, 'w') as json_file:
+        json.dump(results, json_file, indent=2)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+    elif args.baseline and not os.path.isfile(args.baseline):
+        print('\nNo baseline at {0} to compare with; write one with --update-baseline'.format(args.baseline))
+    elif args.baseline:
+        with open(args.baseline) as json_file:
+            regressions = compare(results, json.load(json_file), args.threshold)
+        if regressions:
+            print('\n{0} regression(s) past {1:.0%}: {2}'.format(len(regressions), args.threshold,
+                                                                ', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
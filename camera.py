@@ -0,0 +1,49 @@
+class Camera:
+    """
+    The window of map tiles shown on screen
+    Follows a position, normally the player's, keeping it centred until the edge of the map is reached.  Maps
+    smaller than the window are drawn from the top left corner.
+    """
+
+    def __init__(self, width, height, x=0, y=0):
+        """
+        :param int width: Width of the window in cells
+        :param int height: Height of the window in cells
+        :param int x: Map column shown in the window's left edge
+        :param int y: Map row shown in the window's top edge
+        """
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+
+    def follow(self, target_x, target_y, map_width, map_height):
+        """
+        Move the window to centre on a position, without showing anything beyond the map's edges
+        :return boolean: True if the window moved
+        """
+        x = min(max(target_x - self.width // 2, 0), max(map_width - self.width, 0))
+        y = min(max(target_y - self.height // 2, 0), max(map_height - self.height, 0))
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+
+        return moved
+
+    def to_screen(self, x, y):
+        """
+        :return tuple: Screen cell of a map tile
+        """
+        return x - self.x, y - self.y
+
+    def to_map(self, x, y):
+        """
+        :return tuple: Map tile under a screen cell
+        """
+        return x + self.x, y + self.y
+
+    def bounds(self, map_width, map_height):
+        """
+        :return tuple: (x1, y1, x2, y2) of the map tiles in the window, edges inclusive
+        """
+        return (self.x, self.y, min(self.x + self.width, map_width) - 1,
+                min(self.y + self.height, map_height) - 1)
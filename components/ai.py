@@ -1,7 +1,6 @@
-from random import randint
-
-import libtcodpy as libtcod
+from backends import libtcod
 from game_messages import Message
+from timing import instruments
 
 
 class BasicMonster:
@@ -13,6 +12,7 @@ class BasicMonster:
         self.activity = activity
         self.activity_radius = activity_radius
 
+    @instruments.timed('BasicMonster.take_turn')
     def take_turn(self, target, fov_map, game_map, entities):
         """
         Perform the AI actions on its turn
@@ -24,16 +24,20 @@ class BasicMonster:
         results = []
 
         monster = self.owner
-        if libtcod.map_is_in_fov(fov_map, monster.x, monster.y):
+        if fov_map.is_in_fov(monster.x, monster.y):
             if monster.distance_to(target) >= 2:
-                monster.move_astar(target, entities, game_map)
+                if game_map.pathing == 'flow_field':
+                    monster.move_flow(target, entities, game_map)
+                else:
+                    monster.move_astar(target, entities, game_map)
                 # monster.move_towards(target.x, target.y, game_map, entities)
             elif target.fighter.hp > 0:
                 attack_results = monster.fighter.attack(target)
                 results.extend(attack_results)
         elif self.activity and monster.distance_to(target) <= self.activity_radius:
-            random_x = self.owner.x + randint(0, 2) - 1
-            random_y = self.owner.y + randint(0, 2) - 1
+            rng = game_map.random['ai']
+            random_x = self.owner.x + rng.randint(0, 2) - 1
+            random_y = self.owner.y + rng.randint(0, 2) - 1
             monster.move_towards(random_x, random_y, game_map, entities)
 
         return results
@@ -56,8 +60,9 @@ class ConfusedMonster:
         results = []
 
         if self.number_of_turns > 0:
-            random_x = self.owner.x + randint(0, 2) - 1
-            random_y = self.owner.y + randint(0, 2) - 1
+            rng = game_map.random['ai']
+            random_x = self.owner.x + rng.randint(0, 2) - 1
+            random_y = self.owner.y + rng.randint(0, 2) - 1
             if random_x != self.owner.x and random_y != self.owner.y:
                 self.owner.move_towards(random_x, random_y, game_map, entities)
             self.number_of_turns -= 1
@@ -1,9 +1,15 @@
-import libtcodpy as libtcod
+from backends import libtcod
 from game_messages import Message
 
 
 class Fighter:
+    """
+    Hit points and combat values
+    version is bumped whenever hp or base_max_hp change, so anything drawn from them can tell it is stale.
+    """
+
     def __init__(self, hp, defense, power, xp=0):
+        self.version = 0
         self.base_max_hp = hp
         self.hp = hp
         self.base_defense = defense
@@ -11,6 +17,32 @@ class Fighter:
         self.xp = xp
         self.owner = None
 
+    def __setstate__(self, state):
+        # Saves made before hit points were stamped hold them as plain attributes
+        for name in ('hp', 'base_max_hp'):
+            if name in state:
+                state['_' + name] = state.pop(name)
+        state.setdefault('version', 0)
+        self.__dict__.update(state)
+
+    @property
+    def hp(self):
+        return self._hp
+
+    @hp.setter
+    def hp(self, value):
+        self._hp = value
+        self.version += 1
+
+    @property
+    def base_max_hp(self):
+        return self._base_max_hp
+
+    @base_max_hp.setter
+    def base_max_hp(self, value):
+        self._base_max_hp = value
+        self.version += 1
+
     @property
     def max_hp(self):
         if self.owner and self.owner.equipment:
@@ -1,6 +1,7 @@
 from map_objects.monster_factory import MonsterFactory
 from map_objects.map_room import Room
 from map_objects.entity import Entity
+from timing import instruments
 
 
 class MonsterSpawner:
@@ -45,15 +46,17 @@ class MonsterSpawner:
         self.spawn_radius = spawn_radius
         self.spawner_cooldown_level = 0
 
-    def spawn(self, entities, player):
+    @instruments.timed('MonsterSpawner.spawn')
+    def spawn(self, entities, player, rng):
         """
         Attempt to trigger spawner
         :param dict entities:
         :param Entity player:
+        :param random.Random rng: Stream to pick the spawn point from
         :return Entity: Monster to be placed in dungeon
         """
         if self.can_spawn(entities, player):
-            x, y, = self.room.random_point()
+            x, y, = self.room.random_point(rng)
             return MonsterFactory.build_monster(x, y,
                                                 self.monster_symbol, self.monster_color,
                                                 self.monster_name, self.monster_ai,
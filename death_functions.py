@@ -1,4 +1,4 @@
-import libtcodpy as libtcod
+from backends import libtcod
 from game_messages import Message
 from game_states import GameStates
 from map_objects.entity import Entity
@@ -1,15 +1,22 @@
-import libtcodpy as libtcod
+from backends import libtcod
+from backends.handles import handles
+from camera import Camera
 from components.item import Item
 from death_functions import kill_monster, kill_player
 from fov_functions import initialize_fov, recompute_fov
 from game_messages import Message
 from game_states import GameStates
-from input_handler import handle_keys, handle_mouse, handle_main_menu
-from loader_functions.data_loaders import load_game, save_game
+from input_handler import handle_main_menu, InputQueue, wait_for_event
+from loader_functions.autosave import Autosaver
+from loader_functions.data_loaders import delete_saved_floors, FLOOR_DIRECTORY, load_game, save_game, SAVE_FILE
+from loader_functions.floor_cache import FloorCache
 from loader_functions.initialize_new_game import get_constants, get_game_variables
 from map_objects.entity import get_blocking_entities_at_location, Entity
-from menus import main_menu, message_box
-from render_functions import clear_all, render_all, RenderOrder
+from map_objects.floor_prefetcher import FloorPrefetcher
+from menus import main_menu, menu_cache, message_box
+from render_functions import PanelCache, render_all, RenderOrder
+from screen_buffer import ScreenBuffer
+from timing import instruments
 from os.path import isfile
 
 
@@ -20,6 +27,8 @@ def main():
     libtcod.console_set_custom_font('arial10x10.png', libtcod.FONT_TYPE_GRAYSCALE | libtcod.FONT_LAYOUT_TCOD)
     # Create Main Window/Console
     libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'], False)
+    if constants['fps_limit']:
+        libtcod.sys_set_fps(constants['fps_limit'])
     con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
     panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
 
@@ -28,6 +37,8 @@ def main():
     game_map = None
     message_log = None
     game_state = None
+    # Floors the player has left, for the game being played
+    floors = FloorCache(constants['floor_cache_floors'], constants['floor_cache_mb'] * 2 ** 20)
 
     show_main_menu = True
     show_load_error_message = False
@@ -41,8 +52,6 @@ def main():
         main_menu_background_image = None
 
     while not libtcod.console_is_window_closed():
-        libtcod.sys_check_for_event(libtcod.EVENT_KEY_PRESS | libtcod.EVENT_MOUSE, key, mouse)
-
         if show_main_menu:
             main_menu(con, constants['screen_width'], constants['screen_height'],
                       background_image=main_menu_background_image,
@@ -55,6 +64,8 @@ def main():
 
             libtcod.console_flush()
 
+            # The menu only changes on a key press, so sleep until one arrives
+            wait_for_event(key, mouse, constants['input_timeout'])
             action = handle_main_menu(key)
 
             new_game = action.get('new_game')
@@ -66,11 +77,13 @@ def main():
             elif new_game:
                 player, entities, game_map, message_log, game_state = get_game_variables(constants)
                 game_state = GameStates.PLAYERS_TURN
+                floors.clear()
+                delete_saved_floors()
 
                 show_main_menu = False
             elif load_saved_game:
                 try:
-                    player, entities, game_map, message_log, game_state = load_game()
+                    player, entities, game_map, message_log, game_state = load_game(floors)
                     show_main_menu = False
                 except FileNotFoundError:
                     show_load_error_message = True
@@ -79,43 +92,134 @@ def main():
 
         else:
             libtcod.console_clear(con)
-            play_game(player, entities, game_map, message_log, game_state, con, panel, constants)
+            play_game(player, entities, game_map, message_log, game_state, con, panel, constants, floors=floors)
 
             show_main_menu = True
 
+    libtcod.console_delete(panel)
+    libtcod.console_delete(con)
+    floors.close()
+    menu_cache.clear()
+    handles.close()
+
+    if instruments.export_path:
+        instruments.export(instruments.export_path)
+
+
+def play_game(player, entities, game_map, message_log, game_state, con, panel, constants,
+              controller=None, phase_timer=None, floors=None):
+    """
+    Run the game loop until the player saves and exits or the window is closed
+    :param controller: Supplies actions in place of the keyboard and mouse, through
+        next_actions(game_state, player, entities, game_map, fov_map) returning (action, mouse_action),
+        or None to end the game without saving.  Games played by a controller are not autosaved, and their
+        floors are made when the stairs are taken.
+    :param PhaseTimer phase_timer: Accumulates the time spent in each phase of the loop, by default the shared
+        instruments' phase timer
+    :param FloorCache floors: Floors the player has left, by default a new cache discarded when the game ends
+    :return boolean: True if the game was saved on exit
+    """
+    if phase_timer is None:
+        phase_timer = instruments.phases
 
-def play_game(player, entities, game_map, message_log, game_state, con, panel, constants):
     fov_recompute = True
+    map_changed = False
+    redraw = True
+
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
 
-    fov_map = initialize_fov(game_map)
+    own_floors = floors is None
+    if own_floors:
+        floors = FloorCache(constants['floor_cache_floors'], constants['floor_cache_mb'] * 2 ** 20)
 
     # Setup Input Devices
-    key = libtcod.Key()
-    mouse = libtcod.Mouse()
+    input_queue = InputQueue()
+    mouse = input_queue.mouse
+
+    # The map area of the last frame, so only the cells that change are redrawn
+    screen_buffer = ScreenBuffer(constants['screen_width'], constants['panel_y'])
+    panel_cache = PanelCache()
+    # The part of the map above the panel that is drawn, following the player
+    camera = Camera(constants['screen_width'], constants['panel_y'])
+
+    autosaver = None
+    if constants['autosave_interval'] and controller is None:
+        autosaver = Autosaver(SAVE_FILE, constants['autosave_interval'], constants['autosave_budget_ms'] / 1000.0,
+                              FLOOR_DIRECTORY)
+
+    # The next floor down is made in the background while this one is played, or read from the dungeon pack
+    prefetcher = None
+    if (constants['prefetch_workers'] or constants['dungeon_pack']) and controller is None:
+        prefetcher = FloorPrefetcher(constants, constants['prefetch_workers'])
+        if game_map.dungeon_level + 1 not in floors:
+            prefetcher.prefetch(game_map.dungeon_level + 1, game_map.seed)
 
     previous_game_state = game_state
+    mouse_cell = (mouse.cx, mouse.cy)
 
     targeting_item = None
 
     # Game Loop
     while not libtcod.console_is_window_closed():
-        libtcod.sys_check_for_event(libtcod.EVENT_KEY_PRESS | libtcod.EVENT_MOUSE, key, mouse)
+        phase_timer.end_frame()
         # Render Entities on Map
+        phase_timer.start('fov')
         if fov_recompute:
+            instruments.count('fov_recomputes')
             recompute_fov(fov_map, player.x, player.y, constants['fov_radius'], constants['fov_light_walls'],
                           constants['fov_algorithm'])
-
-        render_all(con, panel, entities, player, game_map, fov_map, fov_recompute, message_log,
-                   constants['screen_width'], constants['screen_height'], constants['bar_width'],
-                   constants['panel_height'], constants['panel_y'], mouse, constants['colors'], game_state)
+            # Tiles seen between frames are explored even though they are never drawn lit
+            fov_map.mark_explored()
+            map_changed = True
         fov_recompute = False
+        if camera.follow(player.x, player.y, game_map.width, game_map.height):
+            map_changed = True
+
+        # Only draw a frame when something on screen may have changed, once all queued input is resolved
+        phase_timer.start('render')
+        if (redraw or map_changed) and not input_queue.pending():
+            instruments.count('frames_drawn')
+            render_all(con, panel, entities, player, game_map, fov_map, map_changed, message_log,
+                       constants['screen_width'], constants['screen_height'], constants['bar_width'],
+                       constants['panel_height'], constants['panel_y'], mouse, constants['colors'], game_state,
+                       screen_buffer, panel_cache, camera)
+            libtcod.console_flush()
+            map_changed = False
+            redraw = False
+
+        # Snapshot the game for an autosave while it waits for the player, a budgeted slice per frame
+        if autosaver is not None and not input_queue.pending():
+            phase_timer.start('autosave')
+            if autosaver.due() and game_state == GameStates.PLAYERS_TURN:
+                autosaver.start(player, entities, game_map, message_log, game_state, floors)
+            if autosaver.pending:
+                autosaver.step()
+
+            error = autosaver.poll()
+            if error:
+                message_log.add_message(Message('Autosave failed: {0}'.format(error), libtcod.red))
+                redraw = True
 
-        libtcod.console_flush()
-
-        clear_all(con, entities)
         # Get Player Input
-        action = handle_keys(key, game_state)
-        mouse_action = handle_mouse(mouse)
+        phase_timer.start('input')
+        if controller is None:
+            if not input_queue.pending():
+                # Only wait for input once the snapshot is complete
+                input_queue.fill(0 if autosaver is not None and autosaver.pending else constants['input_timeout'])
+            action, mouse_action = input_queue.next_actions(game_state)
+            # Clicks arrive as screen cells; targeting works in map tiles
+            mouse_action = {button: camera.to_map(*cell) for button, cell in mouse_action.items()}
+
+            # The names under the mouse are redrawn only when it moves to another cell
+            if (mouse.cx, mouse.cy) != mouse_cell:
+                mouse_cell = (mouse.cx, mouse.cy)
+                redraw = True
+        else:
+            actions = controller.next_actions(game_state, player, entities, game_map, fov_map)
+            if actions is None:
+                break
+            action, mouse_action = actions
+        phase_timer.start('player_turn')
 
         move = action.get('move')
         wait = action.get('wait')
@@ -132,6 +236,12 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
         left_click = mouse_action.get('left_click')
         right_click = mouse_action.get('right_click')
 
+        if action or mouse_action:
+            redraw = True
+            # The game is about to change, so a snapshot in progress would mix two turns
+            if autosaver is not None:
+                autosaver.cancel()
+
         player_turn_results = []
 
         # Perform needed actions
@@ -154,8 +264,8 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
             game_state = GameStates.ENEMY_TURN
 
         elif pickup and game_state == GameStates.PLAYERS_TURN:
-            for entity in entities:
-                if entity.item and entity.x == player.x and entity.y == player.y:
+            for entity in entities.tile_index.at(player.x, player.y):
+                if entity.item:
                     pickup_results = player.inventory.add_item(entity)
                     player_turn_results.extend(pickup_results)
                     break
@@ -179,12 +289,14 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
                 player_turn_results.extend(player.inventory.drop_item(item))
 
         if take_stairs and game_state == GameStates.PLAYERS_TURN:
-            for entity in entities:
-                if entity.stairs and entity.x == player.x and entity.y == player.y:
-                    entities = game_map.next_floor(player, message_log, constants)
-                    fov_map = initialize_fov(game_map)
+            for entity in entities.tile_index.at(player.x, player.y):
+                if entity.stairs:
+                    # The FOV map follows the new floor through the map version
+                    entities = game_map.change_floor(entity.stairs.floor, player, entities, message_log, constants,
+                                                     floors, prefetcher)
+                    if prefetcher is not None and game_map.dungeon_level + 1 not in floors:
+                        prefetcher.prefetch(game_map.dungeon_level + 1, game_map.seed)
                     fov_recompute = True
-                    libtcod.console_clear(con)
 
                     break
             else:
@@ -221,7 +333,17 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
             elif game_state == GameStates.TARGETING:
                 player_turn_results.append({'targeting_cancelled': True})
             else:
-                save_game(player, entities, game_map, message_log, game_state)
+                # An autosave still being written would be renamed over this save
+                if autosaver is not None:
+                    autosaver.wait()
+                save_game(player, entities, game_map, message_log, game_state, floors)
+                phase_timer.stop()
+                fov_map.delete()
+                game_map.release_nav_grid()
+                if own_floors:
+                    floors.close()
+                if prefetcher is not None:
+                    prefetcher.close()
                 return True
 
         if fullscreen:
@@ -304,6 +426,8 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
                     game_state = GameStates.LEVEL_UP
 
         if game_state == GameStates.ENEMY_TURN:
+            phase_timer.start('enemy_turn')
+            instruments.count('enemy_turns')
             for entity in entities:
                 if entity.ai:
                     enemy_turn_results = entity.ai.take_turn(player, fov_map, game_map, entities)
@@ -329,12 +453,24 @@ def play_game(player, entities, game_map, message_log, game_state, con, panel, c
                     if game_state == GameStates.PLAYER_DEAD:
                         break
                 if entity.spawner:
-                    new_monster = entity.spawner.spawn(entities, player)
+                    new_monster = entity.spawner.spawn(entities, player, game_map.random['spawners'])
                     if new_monster:
+                        instruments.count('monsters_spawned')
                         entities.append(new_monster)
             else:
                 game_state = GameStates.PLAYERS_TURN
 
+    if autosaver is not None:
+        autosaver.wait()
+    phase_timer.stop()
+    fov_map.delete()
+    game_map.release_nav_grid()
+    if own_floors:
+        floors.close()
+    if prefetcher is not None:
+        prefetcher.close()
+    return False
+
 
 if __name__ == '__main__':
     main()
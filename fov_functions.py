@@ -1,17 +1,203 @@
-import libtcodpy as libtcod
+from collections import OrderedDict
 
+import numpy as np
 
-def initialize_fov(game_map):
-    """ Create FOV Map for current game map """
-    fov_map = libtcod.map_new(game_map.width, game_map.height)
+from backends import libtcod
+from backends.handles import handles
+
+
+class FovCache:
+    """
+    Bounded least-recently-used store of FOV results, keyed by viewer position, radius and map version
+    Counts its hits and misses so the reuse rate can be reported.
+    """
+
+    def __init__(self, max_size=64):
+        """
+        :param int max_size: Most results to keep, 0 to keep none
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        :param tuple key:
+        :return: The stored result, or None
+        """
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return result
+
+    def put(self, key, result):
+        """
+        Store a result, dropping the least recently used one if the cache is full
+        :param tuple key:
+        :param result:
+        """
+        if self.max_size <= 0:
+            return
+
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """
+        :return dict: hits, misses, hit_rate and size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.entries)
+        }
+
+
+class FovMap:
+    """
+    Field of View for a GameMap
+    Holds the libtcod map FOV is computed on, kept in step with the GameMap tiles through its version,
+    and the tiles lit by the last computation as a boolean array indexed [x, y].
+    """
+
+    def __init__(self, game_map, cache_size=64):
+        """
+        :param GameMap game_map: The map to compute FOV over
+        :param int cache_size: Number of FOV results to remember
+        """
+        self.game_map = game_map
+        self.map = None
+        self.map_version = None
+        self.visible = np.zeros((game_map.width, game_map.height), dtype=bool, order='F')
+        self.window = (slice(0, 0), slice(0, 0))
+        self.cache = FovCache(cache_size)
+
+    def is_in_fov(self, x, y):
+        """
+        :param int x:
+        :param int y:
+        :return boolean: True if the tile was lit by the last FOV computation
+        """
+        return 0 <= x < self.visible.shape[0] and 0 <= y < self.visible.shape[1] and bool(self.visible[x, y])
+
+    def sync(self):
+        """
+        Copy the GameMap's transparency and walkability into the libtcod map
+        The libtcod map is reused unless the GameMap has changed size.
+        """
+        game_map = self.game_map
+        if self.map is not None and (libtcod.map_get_width(self.map) != game_map.width or
+                                     libtcod.map_get_height(self.map) != game_map.height):
+            self.delete()
 
-    for y in range(game_map.height):
-        for x in range(game_map.width):
-            libtcod.map_set_properties(fov_map, x, y, not game_map.tiles[x][y].block_sight,
-                                       not game_map.tiles[x][y].block_move)
+        if self.map is None:
+            self.map = handles.acquire_map(game_map.width, game_map.height)
+            self.visible = np.zeros((game_map.width, game_map.height), dtype=bool, order='F')
+            self.window = (slice(0, 0), slice(0, 0))
+
+        for y in range(game_map.height):
+            for x in range(game_map.width):
+                libtcod.map_set_properties(self.map, x, y, not game_map.block_sight[x, y],
+                                           not game_map.block_move[x, y])
+
+        self.map_version = game_map.version
+
+    def show(self, x1, y1, lit):
+        """
+        Replace the visible tiles with a cached FOV window
+        :param int x1: Left edge of the window
+        :param int y1: Top edge of the window
+        :param numpy.ndarray lit: Visible tiles within the window, indexed [x, y]
+        """
+        self.visible[self.window] = False
+        self.window = (slice(x1, x1 + lit.shape[0]), slice(y1, y1 + lit.shape[1]))
+        self.visible[self.window] = lit
+
+    def mark_explored(self):
+        """
+        Mark the tiles lit by the last computation explored on the GameMap
+        Only the window the computation covered is touched, so the cost does not grow with the map.
+        """
+        self.game_map.explored[self.window] |= self.visible[self.window]
+
+    def delete(self):
+        """
+        Return the libtcod map to the handle pool
+        """
+        if self.map is not None:
+            handles.release(self.map)
+            self.map = None
+            self.map_version = None
+
+
+def initialize_fov(game_map, cache_size=64):
+    """ Create FOV Map for current game map """
+    fov_map = FovMap(game_map, cache_size)
+    fov_map.sync()
 
     return fov_map
 
 
 def recompute_fov(fov_map, x, y, radius, light_walls=True, algorithm=0):
-    libtcod.map_compute_fov(fov_map, x, y, radius, light_walls, algorithm)
+    """
+    Light the tiles visible from a position, reusing a cached result when the map has not changed
+    :param FovMap fov_map: The map holding Field of View information
+    :param int x: Viewer position
+    :param int y: Viewer position
+    :param int radius: FOV radius, 0 for unlimited
+    :param boolean light_walls: Whether walls at the edge of the view are lit
+    :param int algorithm: libtcod FOV algorithm
+    """
+    game_map = fov_map.game_map
+    key = (x, y, radius, game_map.version, light_walls, algorithm)
+
+    window = fov_map.cache.get(key)
+    if window is None:
+        if fov_map.map_version != game_map.version:
+            fov_map.sync()
+
+        libtcod.map_compute_fov(fov_map.map, x, y, radius, light_walls, algorithm)
+        window = get_fov_window(fov_map.map, game_map.width, game_map.height, x, y, radius)
+        fov_map.cache.put(key, window)
+
+    fov_map.show(*window)
+
+
+def get_fov_window(fov_map, width, height, x, y, radius=0):
+    """
+    Read the tiles lit by the last libtcod FOV computation
+    Only the square the FOV radius can reach is queried.
+    :param fov_map: The libtcod map FOV was computed on
+    :param int width: Width of the map in tiles
+    :param int height: Height of the map in tiles
+    :param int x: Position the FOV was computed from
+    :param int y: Position the FOV was computed from
+    :param int radius: FOV radius, 0 for unlimited
+    :return tuple: Left and top edge of the square, and a read-only boolean array of its lit tiles
+    """
+    if radius > 0:
+        x1, x2 = max(x - radius, 0), min(x + radius, width - 1)
+        y1, y2 = max(y - radius, 0), min(y + radius, height - 1)
+    else:
+        x1, x2, y1, y2 = 0, width - 1, 0, height - 1
+
+    lit = np.zeros((x2 - x1 + 1, y2 - y1 + 1), dtype=bool, order='F')
+    for cell_y in range(y1, y2 + 1):
+        for cell_x in range(x1, x2 + 1):
+            if libtcod.map_is_in_fov(fov_map, cell_x, cell_y):
+                lit[cell_x - x1, cell_y - y1] = True
+
+    lit.flags.writeable = False
+    return x1, y1, lit
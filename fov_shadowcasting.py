@@ -0,0 +1,107 @@
+"""
+Field of view without libtcod
+Recursive shadowcasting over a map's transparency array, following libtcod's FOV_SHADOW so the radius
+and light_walls arguments mean the same thing as fov_radius and fov_light_walls in get_constants.
+Where a run of opaque tiles closes a scan window completely, libtcod carries on with the window
+inverted and can light a few tiles past diagonal corners; here the scan stops, as it should.
+
+Both take and return arrays indexed [x, y].
+"""
+import math
+
+import numpy as np
+
+# Multipliers turning octant (column, row) offsets into map offsets
+OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+           (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+def compute_fov(transparent, x, y, radius=0, light_walls=True):
+    """
+    Find the tiles visible from a position using recursive shadowcasting
+    :param numpy.ndarray transparent: True where a tile does not block sight, indexed [x, y]
+    :param int x: Viewer position
+    :param int y: Viewer position
+    :param int radius: Maximum view distance, 0 for unlimited
+    :param boolean light_walls: Whether opaque tiles at the edge of the view are visible
+    :return numpy.ndarray: True for every visible tile
+    """
+    width, height = transparent.shape
+    visible = np.zeros((width, height), dtype=bool, order='F')
+    radius = get_max_radius(width, height, x, y, radius)
+
+    # Only the square the radius reaches is scanned, as nested lists which index faster than NumPy scalars
+    x1, y1 = max(x - radius, 0), max(y - radius, 0)
+    x2, y2 = min(x + radius + 1, width), min(y + radius + 1, height)
+    cells = transparent[x1:x2, y1:y2].tolist()
+
+    lit = []
+    for xx, xy, yx, yy in OCTANTS:
+        _cast_light(cells, lit, x2 - x1, y2 - y1, x - x1, y - y1, 1, 1.0, 0.0, radius, radius * radius,
+                    xx, xy, yx, yy, light_walls)
+
+    if lit:
+        lit_x, lit_y = zip(*lit)
+        visible[x1:x2, y1:y2][lit_x, lit_y] = True
+    visible[x, y] = True
+    return visible
+
+
+def get_max_radius(width, height, x, y, radius):
+    """
+    :return int: The radius to scan, replacing 0 with one that reaches every corner of the map
+    """
+    if radius > 0:
+        return radius
+
+    reach_x = max(width - x, x)
+    reach_y = max(height - y, y)
+    return int(math.sqrt(reach_x * reach_x + reach_y * reach_y)) + 1
+
+
+def _cast_light(cells, lit, width, height, cx, cy, row, start, end, radius, radius_squared,
+                xx, xy, yx, yy, light_walls):
+    """
+    Scan one octant outwards from a row, recursing beneath every run of opaque tiles
+    """
+    if start < end:
+        return
+
+    new_start = 0.0
+    for j in range(row, radius + 1):
+        dy = -j
+        blocked = False
+        for dx in range(-j, 1):
+            map_x = cx + dx * xx + dy * xy
+            map_y = cy + dx * yx + dy * yy
+            if not (0 <= map_x < width and 0 <= map_y < height):
+                continue
+
+            l_slope = (dx - 0.5) / (dy + 0.5)
+            r_slope = (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            elif end > l_slope:
+                break
+
+            clear = cells[map_x][map_y]
+            if dx * dx + dy * dy <= radius_squared and (light_walls or clear):
+                lit.append((map_x, map_y))
+
+            if blocked:
+                if not clear:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+                    if start < end:
+                        # The opaque tiles closed the window; libtcod keeps scanning an inverted one
+                        return
+            elif not clear and j < radius:
+                blocked = True
+                _cast_light(cells, lit, width, height, cx, cy, j + 1, start, l_slope, radius, radius_squared,
+                            xx, xy, yx, yy, light_walls)
+                new_start = r_slope
+
+        if blocked:
+            break
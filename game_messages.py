@@ -1,6 +1,6 @@
 import textwrap
 
-import libtcodpy as libtcod
+from backends import libtcod
 
 
 class Message:
@@ -15,8 +15,16 @@ class Message:
 
 
 class MessageLog:
+    """
+    The most recent lines of game messages
+    version is bumped whenever a message is added, so anything drawn from the log can tell it is stale.
+    """
+    # Default for logs saved before messages were stamped
+    version = 0
+
     def __init__(self, x, width, height):
         self.messages = []
+        self.version = 0
         self.x = x
         self.width = width
         self.height = height
@@ -35,3 +43,5 @@ class MessageLog:
 
             # Add the new line as a Message object with the text and color of the original
             self.messages.append(Message(line, message.color))
+
+        self.version += 1
@@ -1,6 +1,13 @@
-import libtcodpy as libtcod
+import copy
+import time
+from collections import deque
+
+from backends import libtcod
 from game_states import GameStates
 
+# Seconds between polls while waiting for input with a timeout
+POLL_INTERVAL = 0.005
+
 
 def handle_keys(key, game_state):
     """
@@ -208,6 +215,83 @@ def handle_mouse(mouse):
     return {}
 
 
+def wait_for_event(key, mouse, timeout=None):
+    """
+    Sleep until a key press or mouse event arrives, rather than spinning on sys_check_for_event
+    libtcod can only block without a limit, so a timeout is served by polling between short sleeps.
+    :param libtcod.Key key: Filled in with the key pressed
+    :param libtcod.Mouse mouse: Filled in with the mouse state
+    :param float timeout: Seconds to wait before returning with no event, None to wait for as long as it takes
+    :return int: The libtcod event type, EVENT_NONE if the timeout ran out or the window was closed
+    """
+    mask = libtcod.EVENT_KEY_PRESS | libtcod.EVENT_MOUSE
+    if timeout is None:
+        return libtcod.sys_wait_for_event(mask, key, mouse, False)
+
+    deadline = time.perf_counter() + timeout
+    while True:
+        event = libtcod.sys_check_for_event(mask, key, mouse)
+        if event or libtcod.console_is_window_closed() or time.perf_counter() >= deadline:
+            return event
+        time.sleep(POLL_INTERVAL)
+
+
+class InputQueue:
+    """
+    Key presses and mouse clicks waiting to be acted on
+    Every event libtcod holds is read in one go, so input that arrives while a frame is drawn is resolved
+    in a batch rather than a frame at a time.  Mouse movement is collapsed into the latest cursor
+    position, kept in mouse.
+    """
+
+    def __init__(self):
+        self.events = deque()
+        self.mouse = libtcod.Mouse()
+        self._key = libtcod.Key()
+        self._mouse = libtcod.Mouse()
+
+    def pending(self):
+        """
+        :return int: Number of key presses and clicks not yet acted on
+        """
+        return len(self.events)
+
+    def fill(self, timeout=None):
+        """
+        Wait for input, then drain libtcod's event queue
+        :param float timeout: Seconds to wait for the first event, None to wait for as long as it takes
+        """
+        self._take(wait_for_event(self._key, self._mouse, timeout))
+        while self._take(libtcod.sys_check_for_event(libtcod.EVENT_KEY_PRESS | libtcod.EVENT_MOUSE,
+                                                     self._key, self._mouse)):
+            pass
+
+    def next_actions(self, game_state):
+        """
+        Translate the oldest queued event for the current game state
+        :param GameState game_state: which game state we're currently in
+        :return tuple: (action, mouse_action), both empty if nothing is queued
+        """
+        if not self.events:
+            return {}, {}
+
+        key, mouse = self.events.popleft()
+        if key is not None:
+            return handle_keys(key, game_state), {}
+        return {}, handle_mouse(mouse)
+
+    def _take(self, event):
+        if event & libtcod.EVENT_KEY_PRESS:
+            self.events.append((copy.copy(self._key), None))
+        elif event & libtcod.EVENT_MOUSE:
+            self.mouse.x, self.mouse.y = self._mouse.x, self._mouse.y
+            self.mouse.cx, self.mouse.cy = self._mouse.cx, self._mouse.cy
+            if self._mouse.lbutton_pressed or self._mouse.rbutton_pressed:
+                self.events.append((None, copy.copy(self._mouse)))
+
+        return event
+
+
 def _move(dx, dy):
     """
     Convert coordinate change to Movement Command for game engine
@@ -1,4 +1,4 @@
-import libtcodpy as libtcod
+from backends import libtcod
 
 from components.ai import ConfusedMonster
 
@@ -43,7 +43,7 @@ def cast_lightning(*args, **kwargs):
     closest_distance = maximum_range + 1
 
     for entity in entities:
-        if entity.fighter and entity != caster and libtcod.map_is_in_fov(fov_map, entity.x, entity.y):
+        if entity.fighter and entity != caster and fov_map.is_in_fov(entity.x, entity.y):
             distance = caster.distance_to(entity)
 
             if distance < closest_distance:
@@ -73,7 +73,7 @@ def cast_fireball(*args, **kwargs):
 
     results = []
 
-    if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
+    if not fov_map.is_in_fov(target_x, target_y):
         results.append({'consumed': False,
                         'message': Message('You cannot target a tile outside your field of view.', libtcod.yellow)})
         return results
@@ -82,8 +82,8 @@ def cast_fireball(*args, **kwargs):
                     'message': Message('The fireball explodes, burning everything within {0} tiles!'.format(radius),
                                        libtcod.orange)})
 
-    for entity in entities:
-        if entity.distance(target_x, target_y) <= radius and entity.fighter:
+    for entity in entities.tile_index.in_radius(target_x, target_y, radius):
+        if entity.fighter:
             results.append({'message': Message('The {0} gets burned for {1} hit points.'.format(entity.name, damage),
                                                libtcod.orange)})
             results.extend(entity.fighter.take_damage(damage))
@@ -99,22 +99,25 @@ def cast_confuse(*args, **kwargs):
 
     results = []
 
-    if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
+    if not fov_map.is_in_fov(target_x, target_y):
         results.append({'consumed': False,
                         'message': Message('You cannot target a tile outside your field of view.', libtcod.yellow)})
         return results
 
-    for entity in entities:
-        if entity.x == target_x and entity.y == target_y:
-            confused_ai = ConfusedMonster(entity.ai, 10)
-            confused_ai.owner = entity
-            entity.ai = confused_ai
-
-            results.append({'consumed': True,
-                            'message': Message(
-                                'The eyes of {0} look vacant as it starts to stumble around!'.format(entity.name),
-                                libtcod.yellow)})
-            break
+    for entity in entities.tile_index.at(target_x, target_y):
+        # Items and corpses may share the tile; only a creature can be confused
+        if not entity.ai:
+            continue
+
+        confused_ai = ConfusedMonster(entity.ai, 10)
+        confused_ai.owner = entity
+        entity.ai = confused_ai
+
+        results.append({'consumed': True,
+                        'message': Message(
+                            'The eyes of {0} look vacant as it starts to stumble around!'.format(entity.name),
+                            libtcod.yellow)})
+        break
     else:
         results.append(
             {'consumed': False, 'message': Message('There is no valid target at that location.', libtcod.yellow)})
@@ -0,0 +1,145 @@
+import threading
+import time
+
+from loader_functions.floor_cache import prune_floor_sets
+from loader_functions.save_format import Snapshot
+from timing import instruments
+
+
+class Autosaver:
+    """
+    Saves the game every so often without holding up the game loop
+    A snapshot of the game is taken on the game's thread in frames spent waiting for input.  Each frame
+    spends at most about the budget on it.  If the game moves on before the snapshot is complete, it is
+    discarded and started again.  A complete snapshot is compressed, written, flushed to disk and renamed
+    over the save on a worker thread.  The floors the player has left are copied into the snapshot as a
+    FloorSet, written before the save that records it, as save_game does.
+    """
+
+    def __init__(self, path, interval, budget, floor_directory=None):
+        """
+        :param str path: Save file to write
+        :param float interval: Seconds between autosaves
+        :param float budget: Seconds of a frame that may be spent taking a snapshot
+        :param str floor_directory: Directory floor sets are saved in; needed for games with a FloorCache
+        """
+        self.path = path
+        self.floor_directory = floor_directory
+        self.interval = interval
+        self.budget = budget
+        self.last_save = time.perf_counter()
+        self.snapshot = None
+        self.floor_set = None
+        self.steps = None
+        self.worker = None
+        self.error = None
+
+        self.saves = 0
+        self.restarts = 0
+        self.longest_step = 0.0
+        # The longest any one piece of a snapshot has taken, so a frame stops short of its budget
+        self.longest_piece = 0.0
+
+    @property
+    def pending(self):
+        """
+        :return boolean: True while a snapshot is being taken
+        """
+        return self.steps is not None
+
+    @property
+    def busy(self):
+        """
+        :return boolean: True while a snapshot is being written
+        """
+        return self.worker is not None and self.worker.is_alive()
+
+    def due(self):
+        """
+        :return boolean: True if it is time for another autosave and the last one has been written
+        """
+        return not self.pending and not self.busy and time.perf_counter() - self.last_save >= self.interval
+
+    def start(self, player, entities, game_map, message_log, game_state, floors=None):
+        """
+        Begin taking a snapshot of the game
+        :param FloorCache floors: Floors the player has left, or None if the game has none to save
+        """
+        self.snapshot = Snapshot()
+        self.floor_set = floors.floor_set() if floors is not None else None
+        self.steps = self.take(player, entities, game_map, message_log, game_state, floors)
+
+    def take(self, player, entities, game_map, message_log, game_state, floors):
+        """
+        Copy the floors left behind, then the game, yielding between steps
+        """
+        if self.floor_set is not None:
+            yield from self.floor_set.take(floors)
+        yield from self.snapshot.take(player, entities, game_map, message_log, game_state,
+                                      self.floor_set and self.floor_set.tag)
+
+    @instruments.timed('Autosaver.step')
+    def step(self):
+        """
+        Take as much of the snapshot as fits in the budget, and hand it to the worker once complete
+        At least one piece is taken, however long it is; the snapshot yields between pieces small enough to
+        fit many to a frame.
+        :return boolean: True if the snapshot was completed
+        """
+        start = last = time.perf_counter()
+        for step in self.steps:
+            now = time.perf_counter()
+            self.longest_piece = max(self.longest_piece, now - last)
+            last = now
+            # Another piece as long as the longest yet would take the frame over budget
+            if now - start + self.longest_piece >= self.budget:
+                self.longest_step = max(self.longest_step, now - start)
+                return False
+        self.longest_step = max(self.longest_step, time.perf_counter() - start)
+
+        self.worker = threading.Thread(target=self._write, args=(self.snapshot, self.floor_set), name='autosave')
+        self.worker.start()
+        self.snapshot = None
+        self.floor_set = None
+        self.steps = None
+        self.last_save = time.perf_counter()
+        return True
+
+    def cancel(self):
+        """
+        Discard a snapshot in progress, because the game has changed since it was started
+        """
+        if self.pending:
+            self.steps.close()
+            self.snapshot = None
+            self.floor_set = None
+            self.steps = None
+            self.restarts += 1
+            instruments.count('autosave_restarts')
+
+    def poll(self):
+        """
+        :return OSError: The error the last autosave failed with, reported once, or None
+        """
+        error, self.error = self.error, None
+        return error
+
+    def wait(self):
+        """
+        Discard any snapshot in progress and wait for the worker to finish writing
+        """
+        self.cancel()
+        if self.worker is not None:
+            self.worker.join()
+
+    def _write(self, snapshot, floor_set):
+        try:
+            if floor_set is not None:
+                floor_set.write(self.floor_directory)
+            snapshot.write(self.path)
+            if floor_set is not None:
+                prune_floor_sets(self.floor_directory, floor_set.tag)
+            self.saves += 1
+            instruments.count('autosaves')
+        except OSError as error:
+            self.error = error
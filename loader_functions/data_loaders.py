@@ -1,9 +1,46 @@
+import dbm
+import io
 import os
+import pickle
 import shelve
 
+from backends import libtcod
+from loader_functions.floor_cache import prune_floor_sets
+from loader_functions.save_format import read_manifest, read_save, write_save
+from map_objects.entity_index import EntityList
 
-def save_game(player, entities, game_map, message_log, game_state):
-    with shelve.open('savegame', 'n') as data_file:
+SAVE_FILE = 'savegame.sav'
+# Floors the player has left, saved alongside the save in a directory per FloorSet
+FLOOR_DIRECTORY = 'savegame.floors'
+
+
+def save_game(player, entities, game_map, message_log, game_state, floors=None):
+    # The floors are written first, so the save never records a set that is not all on disk
+    floor_set = floors.save(FLOOR_DIRECTORY) if floors is not None else None
+    write_save(SAVE_FILE, player, entities, game_map, message_log, game_state, floor_set=floor_set)
+    prune_floor_sets(FLOOR_DIRECTORY, floor_set)
+
+
+def load_game(floors=None):
+    if os.path.isfile(SAVE_FILE):
+        game = read_save(SAVE_FILE)
+        if floors is not None:
+            floors.load(FLOOR_DIRECTORY, read_manifest(SAVE_FILE).get('floor_set'))
+        return game
+
+    # Games saved before the binary format are still loaded from their shelve
+    return load_game_shelve()
+
+
+def delete_saved_floors():
+    """
+    Remove every floor saved, for a new game
+    """
+    prune_floor_sets(FLOOR_DIRECTORY)
+
+
+def save_game_shelve(player, entities, game_map, message_log, game_state, path='savegame'):
+    with shelve.open(path, 'n') as data_file:
         data_file['player_index'] = entities.index(player)
         data_file['entities'] = entities
         data_file['game_map'] = game_map
@@ -11,17 +48,46 @@ def save_game(player, entities, game_map, message_log, game_state):
         data_file['game_state'] = game_state
 
 
-def load_game():
-    if not os.path.isfile('savegame.dat'):
+def load_game_shelve(path='savegame'):
+    if not os.path.isfile(path + '.dat'):
         raise FileNotFoundError
 
-    with shelve.open('savegame', 'r') as data_file:
-        player_index = data_file['player_index']
-        entities = data_file['entities']
-        game_map = data_file['game_map']
-        message_log = data_file['message_log']
-        game_state = data_file['game_state']
+    with dbm.open(path, 'r') as data_file:
+        def load(key):
+            return ShelveUnpickler(io.BytesIO(data_file[key])).load()
+
+        player_index = load('player_index')
+        # Saved as a plain list, before entities were indexed by tile
+        entities = EntityList(load('entities'))
+        game_map = load('game_map')
+        message_log = load('message_log')
+        game_state = load('game_state')
 
     player = entities[player_index]
 
     return player, entities, game_map, message_log, game_state
+
+
+class ShelveUnpickler(pickle.Unpickler):
+    """
+    Reads the pickles in a shelve save, making the libtcod Colors in it with the console backend in use
+    Shelve saves were written with libtcodpy, whose Colors can only be unpickled by loading the native
+    library.
+    """
+
+    def find_class(self, module, name):
+        if (module, name) == ('libtcodpy', 'Color'):
+            return libtcod.Color
+        if (module, name) == ('_ctypes', '_unpickle'):
+            return unpickle_color
+        return super().find_class(module, name)
+
+
+def unpickle_color(color_class, state):
+    """
+    :param type color_class: libtcod.Color
+    :param tuple state: The Color's attributes and its r, g and b bytes
+    :return libtcod.Color:
+    """
+    attributes, rgb = state
+    return color_class(*bytearray(rgb)[:3])
@@ -0,0 +1,198 @@
+"""
+Dungeon packs
+A pack holds many generated floors in one file, for prebuilt dungeons and for checking generator changes
+against large numbers of maps:
+
+    8 bytes   magic, b'RLPACK\\0\\0'
+    uint32    format version
+    uint32    reserved
+    floors    each a floor file, zlib-compressed as a whole
+    index     UTF-8 JSON: the settings the floors were made with, and a list of
+              [seed, dungeon level, offset, size, player start x, player start y], one per floor
+    uint64    offset of the index
+    uint64    size of the index in bytes
+    8 bytes   magic again
+
+A floor's file is written with its blocks uncompressed and then compressed in one piece, which keeps
+the names and tables in its manifest small as well as its tiles.  Floors can be added in any order,
+and any one floor can be read back without reading the others.
+
+A pack holds the floors GameMap.generate makes for its seeds and settings.  A game given a pack made
+with its own settings, through the dungeon_pack setting, reads those floors instead of making them, and
+a game with no seed set starts on one of the pack's.
+"""
+import io
+import json
+import os
+import random
+import struct
+import zlib
+
+from loader_functions.save_format import read_from, Snapshot
+from timing import instruments
+
+PACK_MAGIC = b'RLPACK\x00\x00'
+PACK_VERSION = 2
+PACK_HEADER = struct.Struct('<8sII')
+PACK_FOOTER = struct.Struct('<QQ8s')
+
+
+def encode_floor(game_map, entities):
+    """
+    :param EntityList entities: Everything on the floor, not including the player
+    :return bytes: The floor's file, compressed
+    """
+    snapshot = Snapshot(compress=False)
+    for step in snapshot.take_floor(game_map, entities):
+        pass
+    floor_file = io.BytesIO()
+    snapshot.write_to(floor_file)
+    return zlib.compress(floor_file.getvalue())
+
+
+def decode_floor(data):
+    """
+    :param bytes data: As returned by encode_floor
+    :return tuple: game_map and the EntityList of the floor
+    """
+    manifest, game_map, player, entities = read_from(io.BytesIO(zlib.decompress(data)))
+    return game_map, entities
+
+
+def open_pack(path, settings):
+    """
+    Open a game's dungeon pack, if it has one made with its settings
+    :param str path: The pack, or None
+    :param dict settings: The floor settings of the game, as returned by floor_prefetcher.floor_settings
+    :return PackReader: The pack, or None if there is none or it was made with other settings
+    """
+    if not path or not os.path.isfile(path):
+        return None
+
+    pack = PackReader(path)
+    if not pack.made_with(settings):
+        pack.close()
+        return None
+    return pack
+
+
+class PackWriter:
+    """
+    Writes floors to a new pack as they are added
+    """
+
+    def __init__(self, path, settings):
+        """
+        :param str path: Pack file to write, replacing any already there
+        :param dict settings: The floor settings the floors are made with, as returned by
+            floor_prefetcher.floor_settings
+        """
+        self.path = path
+        self.settings = settings
+        self.pack_file = open(path, 'wb')
+        self.pack_file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0))
+        self.size = PACK_HEADER.size
+        self.floors = []
+
+    def add(self, seed, dungeon_level, data, player_start):
+        """
+        :param int seed: The game's seed the floor was made from
+        :param int dungeon_level:
+        :param bytes data: The floor, as returned by encode_floor
+        :param tuple player_start: The (x, y) the player starts at, as returned by GameMap.generate
+        """
+        self.floors.append([seed, dungeon_level, self.size, len(data)] + list(player_start))
+        self.pack_file.write(data)
+        self.size += len(data)
+
+    def close(self):
+        """
+        Write the index and close the file
+        :return int: Size of the pack in bytes
+        """
+        index = json.dumps({'settings': self.settings, 'floors': self.floors}, separators=(',', ':')).encode('utf-8')
+        self.pack_file.write(index)
+        self.pack_file.write(PACK_FOOTER.pack(self.size, len(index), PACK_MAGIC))
+        self.pack_file.close()
+        self.size += len(index) + PACK_FOOTER.size
+        return self.size
+
+
+class PackReader:
+    """
+    Reads floors from a pack
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: Pack file to read
+        """
+        self.path = path
+        self.pack_file = open(path, 'rb')
+
+        magic, version, reserved = PACK_HEADER.unpack(self.pack_file.read(PACK_HEADER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError('{0} is not a dungeon pack'.format(path))
+        if version != PACK_VERSION:
+            raise ValueError('{0} was written in pack version {1}; this game reads version {2}'.format(
+                path, version, PACK_VERSION))
+
+        self.pack_file.seek(-PACK_FOOTER.size, io.SEEK_END)
+        index_offset, index_size, magic = PACK_FOOTER.unpack(self.pack_file.read(PACK_FOOTER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError('{0} is incomplete'.format(path))
+        self.pack_file.seek(index_offset)
+        index = json.loads(self.pack_file.read(index_size).decode('utf-8'))
+        self.settings = index['settings']
+        self.floors = {(seed, dungeon_level): (offset, size, (x, y))
+                       for seed, dungeon_level, offset, size, x, y in index['floors']}
+
+    def __len__(self):
+        return len(self.floors)
+
+    def __contains__(self, floor):
+        """
+        :param tuple floor: The game's seed and the dungeon level
+        """
+        return floor in self.floors
+
+    def made_with(self, settings):
+        """
+        :param dict settings: Floor settings, as returned by floor_prefetcher.floor_settings
+        :return boolean: True if the floors were made with these settings, so they are the floors
+            GameMap.generate would make with them
+        """
+        return json.loads(json.dumps(settings)) == self.settings
+
+    def random_seed(self):
+        """
+        :return int: One of the seeds the pack holds the first floor of, or None if it holds none
+        """
+        seeds = sorted(seed for seed, dungeon_level in self.floors if dungeon_level == 1)
+        return random.choice(seeds) if seeds else None
+
+    def read(self, seed, dungeon_level):
+        """
+        :param int seed: The game's seed the floor was made from
+        :param int dungeon_level:
+        :return tuple: game_map, the EntityList of the floor, and the (x, y) the player starts at
+        """
+        offset, size, player_start = self.floors[(seed, dungeon_level)]
+        self.pack_file.seek(offset)
+        game_map, entities = decode_floor(self.pack_file.read(size))
+        return game_map, entities, player_start
+
+    def take(self, dungeon_level, seed):
+        """
+        Read a level of the dungeon for play, if the pack holds it
+        :param int dungeon_level:
+        :param int seed: The game's seed
+        :return tuple: As returned by GameMap.generate, with None for the rooms, which are not packed; or None
+        """
+        if (seed, dungeon_level) not in self.floors:
+            return None
+        instruments.count('floors_unpacked')
+        return self.read(seed, dungeon_level) + (None,)
+
+    def close(self):
+        self.pack_file.close()
@@ -0,0 +1,270 @@
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+
+from loader_functions.save_format import fsync_directory, read_floor, Snapshot, write_floor
+from timing import instruments
+
+# Memory held by an entity and its components, for the cache's ceiling; monsters measure about 800 bytes
+ENTITY_BYTES = 1000
+
+
+class FloorCache:
+    """
+    Floors the player has left, by dungeon level, so they can be returned to as they were left
+    The most recently left floors are kept in memory.  Once there are more than max_floors of them, or they
+    are estimated to hold more than max_bytes, the least recently left are compressed to files in a
+    temporary directory, from which they are read back when returned to.  A saved game's floors are
+    copied in by load and out by save, so the save is only changed when the game is saved.
+    Each save writes the floors to a new FloorSet tagged with the game's id and a generation counted up
+    from one save to the next.
+    """
+
+    def __init__(self, max_floors=4, max_bytes=64 * 2 ** 20):
+        """
+        :param int max_floors: Most floors kept in memory
+        :param int max_bytes: Most memory the floors kept in memory may take, estimated
+        """
+        self.temporary_directory = tempfile.TemporaryDirectory(prefix='floors')
+        self.directory = self.temporary_directory.name
+        self.max_floors = max_floors
+        self.max_bytes = max_bytes
+
+        self.floors = OrderedDict()
+        self.size = 0
+        self.on_disk = set()
+        self.game_id = new_game_id()
+        self.generation = 0
+
+        self.hits = 0
+        self.reads = 0
+        self.spills = 0
+
+    def __contains__(self, dungeon_level):
+        return dungeon_level in self.floors or dungeon_level in self.on_disk
+
+    def path(self, dungeon_level, directory=None):
+        return floor_path(directory or self.directory, dungeon_level)
+
+    def put(self, dungeon_level, game_map, entities):
+        """
+        Keep a floor the player has left, evicting the least recently left floors to disk as needed
+        :param int dungeon_level:
+        :param GameMap game_map: The floor's map, no longer used by the game
+        :param EntityList entities: Everything on the floor, not including the player
+        """
+        self.discard(dungeon_level)
+        size = floor_size(game_map, entities)
+        self.floors[dungeon_level] = (game_map, entities, size)
+        self.size += size
+
+        while self.floors and (len(self.floors) > self.max_floors or self.size > self.max_bytes):
+            self.spill(next(iter(self.floors)))
+
+    @instruments.timed('FloorCache.take')
+    def take(self, dungeon_level):
+        """
+        Remove a floor from the cache, to be played again
+        :param int dungeon_level:
+        :return tuple: The floor's GameMap and EntityList, or None if it has not been visited
+        """
+        if dungeon_level in self.floors:
+            game_map, entities, size = self.floors.pop(dungeon_level)
+            self.size -= size
+            self.hits += 1
+            return game_map, entities
+
+        if dungeon_level in self.on_disk:
+            path = self.path(dungeon_level)
+            floor = read_floor(path)
+            os.remove(path)
+            self.on_disk.discard(dungeon_level)
+            self.reads += 1
+            return floor
+
+        return None
+
+    def spill(self, dungeon_level):
+        """
+        Move a floor from memory to its file
+        """
+        game_map, entities, size = self.floors.pop(dungeon_level)
+        self.size -= size
+        write_floor(self.path(dungeon_level), game_map, entities)
+        self.on_disk.add(dungeon_level)
+        self.spills += 1
+        instruments.count('floors_spilled')
+
+    def discard(self, dungeon_level):
+        if dungeon_level in self.floors:
+            self.size -= self.floors.pop(dungeon_level)[2]
+        if dungeon_level in self.on_disk:
+            os.remove(self.path(dungeon_level))
+            self.on_disk.discard(dungeon_level)
+
+    def clear(self):
+        """
+        Forget every floor, for a new game
+        """
+        for dungeon_level in list(self.floors) + list(self.on_disk):
+            self.discard(dungeon_level)
+        self.game_id = new_game_id()
+        self.generation = 0
+
+    def load(self, directory, tag):
+        """
+        Replace the floors held with the FloorSet saved with a game
+        Floors missing from the set are made again from the game's seed when returned to.
+        :param str directory: Directory the game's floor sets are saved in
+        :param str tag: Tag of the set, as recorded in the save file, or None if it has no floors saved
+        """
+        self.clear()
+        if tag is None:
+            return
+
+        self.game_id, generation = tag.rsplit('-', 1)
+        self.generation = int(generation)
+        saved = os.path.join(directory, tag)
+        for dungeon_level in saved_levels(saved):
+            shutil.copyfile(self.path(dungeon_level, saved), self.path(dungeon_level))
+            self.on_disk.add(dungeon_level)
+
+    def floor_set(self):
+        """
+        Start the next FloorSet of this game; its floors are copied by FloorSet.take
+        :return FloorSet:
+        """
+        self.generation += 1
+        return FloorSet('{0}-{1}'.format(self.game_id, self.generation))
+
+    def save(self, directory):
+        """
+        Write every floor held to a new FloorSet in a directory
+        :param str directory: Directory the game's floor sets are saved in
+        :return str: Tag of the set, for the save file to record
+        """
+        floor_set = self.floor_set()
+        for step in floor_set.take(self):
+            pass
+        floor_set.write(directory)
+        return floor_set.tag
+
+    def close(self):
+        """
+        Forget every floor and remove the temporary directory
+        """
+        self.floors.clear()
+        self.on_disk.clear()
+        self.size = 0
+        self.temporary_directory.cleanup()
+
+    def stats(self):
+        """
+        :return dict: Floors in memory and on disk, estimated bytes in memory, and how floors were returned to
+        """
+        return {'in_memory': len(self.floors), 'on_disk': len(self.on_disk), 'bytes': self.size,
+                'hits': self.hits, 'reads': self.reads, 'spills': self.spills}
+
+
+class FloorSet:
+    """
+    A copy of the floors a FloorCache holds, to be saved with one save file
+    The set is written to a directory of its own, named after its tag, and renamed into place once complete.
+    The save file records the tag, so a save is only ever loaded with the floors saved with it, and an
+    interrupted save leaves the set the previous save recorded in place.
+    """
+
+    def __init__(self, tag):
+        """
+        :param str tag: The game's id and the generation of the save, as '<game id>-<generation>'
+        """
+        self.tag = tag
+        self.snapshots = {}
+        self.files = {}
+
+    def take(self, floors):
+        """
+        Copy the floors held, yielding between steps like Snapshot.take
+        The floors must not change until the generator is exhausted; if they do, discard the set.
+        :param FloorCache floors:
+        """
+        for dungeon_level, (game_map, entities, size) in floors.floors.items():
+            snapshot = Snapshot()
+            yield from snapshot.take_floor(game_map, entities)
+            self.snapshots[dungeon_level] = snapshot
+        for dungeon_level in floors.on_disk:
+            with open(floors.path(dungeon_level), 'rb') as floor_file:
+                self.files[dungeon_level] = floor_file.read()
+            yield
+
+    def write(self, directory):
+        """
+        Write the floors, flushed to disk, to a new directory named after the tag
+        :param str directory: Directory the game's floor sets are saved in
+        """
+        os.makedirs(directory, exist_ok=True)
+        temporary_directory = tempfile.mkdtemp(prefix='.tmp', dir=directory)
+        try:
+            for dungeon_level, snapshot in self.snapshots.items():
+                snapshot.write(floor_path(temporary_directory, dungeon_level))
+            for dungeon_level, data in self.files.items():
+                with open(floor_path(temporary_directory, dungeon_level), 'wb') as floor_file:
+                    floor_file.write(data)
+                    floor_file.flush()
+                    os.fsync(floor_file.fileno())
+
+            path = os.path.join(directory, self.tag)
+            # Left by a save interrupted before its save file was written, so no save file records it
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(temporary_directory, path)
+            fsync_directory(directory)
+        except BaseException:
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+            raise
+
+
+def prune_floor_sets(directory, keep=None):
+    """
+    Remove every floor set from a directory but the one a save file records, along with anything left by
+    interrupted saves
+    :param str directory: Directory the game's floor sets are saved in
+    :param str keep: Tag of the set to keep, or None to remove them all
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name != keep:
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+def new_game_id():
+    return uuid.uuid4().hex[:16]
+
+
+def floor_path(directory, dungeon_level):
+    return os.path.join(directory, 'floor{0}.sav'.format(dungeon_level))
+
+
+def floor_size(game_map, entities):
+    """
+    :return int: Estimated bytes of memory held by a floor
+    """
+    return (game_map.block_move.nbytes + game_map.block_sight.nbytes + game_map.explored.nbytes +
+            len(entities) * ENTITY_BYTES)
+
+
+def saved_levels(directory):
+    """
+    :return list: Dungeon levels of the floor files in a directory
+    """
+    if not os.path.isdir(directory):
+        return []
+    matches = (re.fullmatch(r'floor(\d+)\.sav', name) for name in os.listdir(directory))
+    return [int(match.group(1)) for match in matches if match]
@@ -1,6 +1,6 @@
 import json
 
-import libtcodpy as libtcod
+from backends import libtcod
 from components.equipable import Equippable
 from components.equipment import Equipment
 from components.fighter import Fighter
@@ -9,7 +9,10 @@ from components.level import Level
 from equipment_slots import EquipmentSlots
 from game_messages import MessageLog
 from game_states import GameStates
+from loader_functions.dungeon_pack import open_pack
 from map_objects.entity import Entity, RenderOrder
+from map_objects.entity_index import EntityList
+from map_objects.floor_prefetcher import floor_settings
 from map_objects.game_map import GameMap
 
 
@@ -29,14 +32,26 @@ def get_constants():
     message_x = bar_width + 2
     message_width = screen_width - bar_width - 2
     message_height = panel_height - 1
-    # Map size
-    map_width = 80
-    map_height = 43
-
     # Field-of=View settings
     fov_algorithm = 0
     fov_light_walls = True
     fov_radius = 10
+    fov_cache_size = 64
+
+    # Frame rate cap (0 for none), and seconds to wait for input before the game loop runs anyway (None to wait
+    # until there is some)
+    fps_limit = 60
+    input_timeout = None
+
+    # Seconds between autosaves (0 for none), and milliseconds of a frame that taking one may use
+    autosave_interval = 120
+    autosave_budget_ms = 4
+
+    # Floors left behind kept in memory, and the most memory they may take, before older ones go to disk
+    floor_cache_floors = 4
+    floor_cache_mb = 64
+    # Worker processes making the next floor while the current one is played (0 to make it when the stairs are taken)
+    prefetch_workers = 1
 
     # Usable Colors
     colors = {
@@ -58,6 +73,15 @@ def get_constants():
         room_max_size = settings['map_settings'].get('room_max_size', 10)
         room_min_size = settings['map_settings'].get('room_min_size', 6)
         max_rooms = settings['map_settings'].get('max_rooms', 30)
+        # Maps larger than the area above the panel are scrolled to follow the player
+        map_width = settings['map_settings'].get('map_width', 80)
+        map_height = settings['map_settings'].get('map_height', 43)
+        ai_pathing = settings.get('ai_settings', {}).get('pathing', 'astar')
+        # The same seed gives the same game, floor by floor and turn by turn; none for a new game every time
+        seed = settings.get('seed')
+        # Floors made ahead of time by simulation.generate_floors, read instead of made when made with these
+        # settings; a game with no seed set starts on one of the pack's
+        dungeon_pack = settings.get('dungeon_pack')
 
     # Load Monsters from file
     with open('settings/monsters.json') as json_data:
@@ -82,6 +106,7 @@ def get_constants():
         'message_x': message_x,
         'message_width': message_width,
         'message_height': message_height,
+        'seed': seed,
         'map_width': map_width,
         'map_height': map_height,
         'room_max_size': room_max_size,
@@ -90,6 +115,16 @@ def get_constants():
         'fov_algorithm': fov_algorithm,
         'fov_light_walls': fov_light_walls,
         'fov_radius': fov_radius,
+        'fov_cache_size': fov_cache_size,
+        'fps_limit': fps_limit,
+        'input_timeout': input_timeout,
+        'autosave_interval': autosave_interval,
+        'autosave_budget_ms': autosave_budget_ms,
+        'floor_cache_floors': floor_cache_floors,
+        'floor_cache_mb': floor_cache_mb,
+        'prefetch_workers': prefetch_workers,
+        'dungeon_pack': dungeon_pack,
+        'ai_pathing': ai_pathing,
         'colors': colors,
         'monster_dict': monster_dict,
         'item_dict': item_dict
@@ -109,7 +144,7 @@ def get_game_variables(constants):
     player = Entity(0, 0, '@', libtcod.white, 'Player', blocks=True, render_order=RenderOrder.ACTOR,
                     fighter=fighter_component, inventory=inventory_component, level=level_component,
                     equipment=equipment_component)
-    entities = [player]
+    entities = EntityList([player])
 
     # Starting Equipment
     equippable_component = Equippable(EquipmentSlots.MAIN_HAND, power_bonus=2)
@@ -117,11 +152,19 @@ def get_game_variables(constants):
     player.inventory.add_item(dagger)
     player.equipment.toggle_equip(dagger)
 
-    # Generate Game Map
-    game_map = GameMap(constants['map_width'], constants['map_height'],
-                       constants['monster_dict'], constants['item_dict'])
-    game_map.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
-                      constants['map_width'], constants['map_height'], player, entities)
+    # Generate Game Map, or read it from the dungeon pack
+    seed = constants['seed']
+    floor = None
+    pack = open_pack(constants['dungeon_pack'], floor_settings(constants))
+    if pack is not None:
+        if seed is None:
+            seed = pack.random_seed()
+        floor = pack.take(1, seed)
+        pack.close()
+    if floor is None:
+        floor = GameMap.generate(constants, 1, seed)
+    game_map, floor_entities, (player.x, player.y), rooms = floor
+    entities.extend(floor_entities)
 
     message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
 
@@ -0,0 +1,721 @@
+"""
+Binary save format
+A save file is a short header, a JSON manifest and a run of binary blocks:
+
+    8 bytes   magic, b'RLSAVE\\0\\0'
+    uint32    format version
+    uint32    manifest length in bytes
+    manifest  UTF-8 JSON
+    blocks    each starting on a 64-byte boundary after the manifest
+
+The map's tile layers are stored as blocks, raw or packed to bits and zlib-compressed.  Raw layers can be
+memory-mapped on load.  Entities are stored as columnar tables: one row per entity for the fields every entity has, and
+one table per component kind.  Each component table has an `entity` column holding the row of the
+entity it belongs to.  Entities refer to each other by row: inventories and equipment point to item
+rows, and spawners point to rows of a shared room table.  Integer and boolean columns go in blocks;
+everything else, such as names and optional values, goes in the manifest.
+
+No class is pickled.  A field added to a component only needs a column here, and files written in an
+older format version can still be read by branching on the version number.
+
+Saving is split in two so it can run in the background: a Snapshot copies the game's state, in steps
+that can be spread over several frames, and can then be compressed and written on another thread.
+
+A floor the player has left is stored in the same format, with only the map and entities in its manifest
+and no player row.  A save's manifest names the set of floors saved with it, so it is never loaded with
+floors from another save.
+"""
+import copy
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from backends import libtcod
+from components.ai import BasicMonster, ConfusedMonster
+from components.equipable import Equippable
+from components.equipment import Equipment
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.item import Item
+from components.level import Level
+from components.spawner import MonsterSpawner
+from components.stairs import Stairs
+from equipment_slots import EquipmentSlots
+from game_messages import Message, MessageLog
+from game_states import GameStates
+from map_objects.entity import Entity
+from map_objects.entity_index import EntityList
+from map_objects.game_map import GameMap
+from map_objects.item_factory import ItemFactory
+from map_objects.map_room import Room
+from render_functions import RenderOrder
+
+MAGIC = b'RLSAVE\x00\x00'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sII')
+ALIGNMENT = 64
+
+# GameMap arrays stored as blocks; the rest of its state goes in the manifest
+MAP_LAYERS = ('block_move', 'block_sight', 'explored')
+# Tiles copied from a layer in one snapshot step
+SNAPSHOT_CELLS = 1 << 20
+# Entities copied into the tables in one snapshot step
+SNAPSHOT_ROWS = 1 << 7
+
+AI_KINDS = {'basic': BasicMonster, 'confused': ConfusedMonster}
+AI_KIND_NAMES = {ai_class: kind for kind, ai_class in AI_KINDS.items()}
+USE_FUNCTION_NAMES = {function: name for name, function in ItemFactory.use_functions.items() if name}
+
+SPAWNER_FIELDS = ('monster_symbol', 'monster_color', 'monster_name', 'monster_ai', 'ai_action', 'ai_action_radius',
+                  'fighter_hp', 'fighter_defense', 'fighter_power', 'fighter_xp', 'treasure_value', 'count_value',
+                  'spawner_cooldown', 'spawn_radius', 'spawner_cooldown_level')
+
+
+def write_save(path, player, entities, game_map, message_log, game_state, compress=True, floor_set=None):
+    """
+    Write a game to a save file
+    :param str path: Save file to write
+    :param bool compress: zlib-compress the blocks; uncompressed tile layers can be memory-mapped on load
+    :param str floor_set: Tag of the floors saved with the game, or None
+    :return int: Size of the file in bytes
+    """
+    snapshot = Snapshot(compress)
+    for step in snapshot.take(player, entities, game_map, message_log, game_state, floor_set):
+        pass
+    return snapshot.write(path)
+
+
+class Snapshot:
+    """
+    A copy of everything a save holds
+    The copy is taken on the game's thread; once taken, the game may carry on and the snapshot can be
+    written from any thread.
+    """
+
+    def __init__(self, compress=True):
+        """
+        :param bool compress: zlib-compress the blocks; uncompressed tile layers can be memory-mapped on load
+        """
+        self.blocks = BlockWriter(compress)
+        self.manifest = None
+
+    def take(self, player, entities, game_map, message_log, game_state, floor_set=None):
+        """
+        Copy the game's state, yielding between steps so the copy can be spread over frames
+        The game must not change until the generator is exhausted; if it does, discard the snapshot.
+        :param str floor_set: Tag of the floors saved with the game, or None
+        """
+        manifest = {'game_state': game_state.name, 'message_log': encode_message_log(message_log),
+                    'floor_set': floor_set}
+        manifest['map'] = yield from encode_map(game_map, self.blocks)
+        manifest['entities'] = yield from encode_entities(player, entities, self.blocks)
+        self.manifest = manifest
+
+    def take_floor(self, game_map, entities):
+        """
+        Copy a floor the player is not on, yielding between steps like take
+        """
+        manifest = {'map': (yield from encode_map(game_map, self.blocks))}
+        manifest['entities'] = yield from encode_entities(None, entities, self.blocks)
+        self.manifest = manifest
+
+    def write(self, path, fsync=True):
+        """
+        Compress and write the snapshot
+        The file is written next to the path and renamed over it once complete, so an interrupted save
+        leaves the previous one in place.
+        :param str path: Save file to write
+        :param bool fsync: Flush the file and the rename to disk before returning
+        :return int: Size of the file in bytes
+        """
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as save_file:
+            size = self.write_to(save_file)
+            if fsync:
+                save_file.flush()
+                os.fsync(save_file.fileno())
+        os.replace(temporary_path, path)
+        if fsync:
+            fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+        return size
+
+    def write_to(self, save_file):
+        """
+        Compress the snapshot and write it to an open file
+        :param save_file: File open for binary writing, at the offset the snapshot is to start from
+        :return int: Bytes written
+        """
+        self.blocks.encode()
+        manifest = json.dumps(self.manifest, separators=(',', ':')).encode('utf-8')
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest))
+
+        save_file.write(header)
+        save_file.write(manifest)
+        start = align(len(header) + len(manifest))
+        save_file.write(bytes(start - len(header) - len(manifest)))
+        self.blocks.write(save_file)
+
+        return start + self.blocks.size
+
+
+def fsync_directory(path):
+    """
+    Flush the entries of a directory, such as a file renamed into it, to disk where the platform allows
+    :param str path:
+    """
+    if hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def read_save(path, mmap=False):
+    """
+    Read a game from a save file
+    :param str path: Save file to read
+    :param bool mmap: Memory-map uncompressed tile layers, copy-on-write, instead of reading them
+    :return tuple: player, entities, game_map, message_log, game_state
+    """
+    manifest, game_map, player, entities = read_file(path, mmap)
+    message_log = decode_message_log(manifest['message_log'])
+    game_state = GameStates[manifest['game_state']]
+
+    return player, entities, game_map, message_log, game_state
+
+
+def write_floor(path, game_map, entities, compress=True):
+    """
+    Write a floor the player has left to a file
+    :param str path: Floor file to write
+    :param EntityList entities: Everything on the floor, not including the player
+    :param bool compress: zlib-compress the blocks
+    :return int: Size of the file in bytes
+    """
+    snapshot = Snapshot(compress)
+    for step in snapshot.take_floor(game_map, entities):
+        pass
+    return snapshot.write(path, fsync=False)
+
+
+def read_floor(path):
+    """
+    :param str path: Floor file to read
+    :return tuple: game_map and the EntityList of the floor
+    """
+    manifest, game_map, player, entities = read_file(path)
+    return game_map, entities
+
+
+def read_manifest(path):
+    """
+    Read only the manifest of a save file
+    :param str path: Save file to read
+    :return dict:
+    """
+    with open(path, 'rb') as save_file:
+        return read_header(save_file, path)
+
+
+def read_file(path, mmap=False):
+    """
+    :return tuple: The manifest, then the map, player (None for a floor file) and entities it holds
+    """
+    with open(path, 'rb') as save_file:
+        return read_from(save_file, path, mmap)
+
+
+def read_from(save_file, path=None, mmap=False):
+    """
+    :param save_file: File open for binary reading, at the start of a save
+    :param str path: The file's path, for memory-mapping and error messages
+    :return tuple: The manifest, then the map, player (None for a floor file) and entities it holds
+    """
+    offset = save_file.tell()
+    manifest = read_header(save_file, path)
+    blocks = BlockReader(path, save_file, offset + align(save_file.tell() - offset), mmap and path is not None)
+
+    game_map = decode_map(manifest['map'], blocks)
+    player, entities = decode_entities(manifest['entities'], blocks)
+
+    return manifest, game_map, player, entities
+
+
+def read_header(save_file, path=None):
+    """
+    :param save_file: File open for binary reading, at the start of a save
+    :param str path: The file's path, for error messages
+    :return dict: The manifest, with the file left at its end
+    """
+    magic, version, manifest_size = HEADER.unpack(save_file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('{0} is not a save file'.format(path))
+    if version > FORMAT_VERSION:
+        raise ValueError('{0} was saved in format version {1}; this game reads up to {2}'.format(
+            path, version, FORMAT_VERSION))
+
+    return json.loads(save_file.read(manifest_size).decode('utf-8'))
+
+
+def align(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+class BlockReader:
+    """
+    Reads the arrays described in a manifest from the blocks of an open save file
+    """
+
+    def __init__(self, path, save_file, start, mmap=False):
+        """
+        :param str path: The save file, for memory-mapping
+        :param save_file: The save file, open for reading
+        :param int start: Offset of the first block
+        :param bool mmap: Memory-map uncompressed arrays
+        """
+        self.path = path
+        self.save_file = save_file
+        self.start = start
+        self.mmap = mmap
+
+    def read(self, descriptor, mmap=False):
+        """
+        :param dict descriptor: Where a block is and the array it holds
+        :param bool mmap: Memory-map the array if this reader allows it and the block is uncompressed
+        :return numpy.ndarray:
+        """
+        dtype = np.dtype(descriptor['dtype'])
+        shape = tuple(descriptor['shape'])
+        order = descriptor['order']
+        offset = self.start + descriptor['offset']
+
+        encoding = descriptor['encoding']
+
+        if mmap and self.mmap and encoding == 'raw':
+            return np.memmap(self.path, dtype=dtype, mode='c', offset=offset, shape=shape, order=order)
+
+        self.save_file.seek(offset)
+        data = self.save_file.read(descriptor['size'])
+        if encoding == 'raw':
+            array = np.frombuffer(data, dtype=dtype)
+        elif encoding == 'bits':
+            packed = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+            array = np.unpackbits(packed, count=int(np.prod(shape))).astype(dtype)
+        else:
+            array = np.frombuffer(zlib.decompress(data), dtype=dtype)
+        return array.reshape(shape, order=order).copy(order=order)
+
+
+class BlockWriter:
+    """
+    Arrays to be written as blocks after the manifest
+    Arrays are only compressed, and their descriptors filled in, by encode, so adding one is cheap.
+    """
+
+    def __init__(self, compress=False):
+        """
+        :param bool compress: zlib-compress the blocks, packing boolean arrays to one bit per value first
+        """
+        self.compress = compress
+        self.arrays = []
+        self.blocks = []
+        self.size = 0
+
+    def add(self, array):
+        """
+        :param numpy.ndarray array: Left alone until written, so it must not change in the meantime
+        :return dict: Descriptor of the block for the manifest, complete once encode has run
+        """
+        descriptor = {}
+        self.arrays.append((descriptor, array))
+        return descriptor
+
+    def encode(self):
+        for descriptor, array in self.arrays:
+            order = 'F' if array.flags.f_contiguous and not array.flags.c_contiguous else 'C'
+            if not self.compress:
+                encoding = 'raw'
+                data = array.tobytes(order=order)
+            elif array.dtype == bool:
+                encoding = 'bits'
+                data = zlib.compress(np.packbits(array.ravel(order=order)).tobytes())
+            else:
+                encoding = 'zlib'
+                data = zlib.compress(array.tobytes(order=order))
+
+            descriptor.update(offset=self.size, size=len(data), dtype=array.dtype.str, shape=list(array.shape),
+                              order=order, encoding=encoding)
+            self.blocks.append(data)
+            self.size += align(len(data))
+        self.arrays = []
+
+    def write(self, save_file):
+        for data in self.blocks:
+            save_file.write(data)
+            save_file.write(bytes(align(len(data)) - len(data)))
+
+
+def encode_map(game_map, blocks):
+    """
+    Copy the map's state, a slice of a tile layer per step
+    :return dict: The map's state for the manifest
+    """
+    state = copy.deepcopy({name: value for name, value in game_map.__getstate__().items()
+                           if name not in MAP_LAYERS + ('_nav_grid',)})
+    yield
+
+    state['layers'] = {}
+    for name in MAP_LAYERS:
+        layer = getattr(game_map, name)
+        layer_copy = np.empty_like(layer)
+        columns = max(SNAPSHOT_CELLS // max(game_map.height, 1), 1)
+        for x in range(0, game_map.width, columns):
+            layer_copy[x:x + columns] = layer[x:x + columns]
+            yield
+        state['layers'][name] = blocks.add(layer_copy)
+
+    return state
+
+
+def decode_map(state, blocks):
+    state = dict(state, _nav_grid=None)
+    for name, descriptor in state.pop('layers').items():
+        state[name] = blocks.read(descriptor, mmap=True)
+
+    game_map = GameMap.__new__(GameMap)
+    game_map.__setstate__(state)
+    return game_map
+
+
+def encode_message_log(message_log):
+    return {
+        'x': message_log.x,
+        'width': message_log.width,
+        'height': message_log.height,
+        'messages': [[message.text, encode_color(message.color)] for message in message_log.messages]
+    }
+
+
+def decode_message_log(state):
+    message_log = MessageLog(state['x'], state['width'], state['height'])
+    message_log.messages = [Message(text, decode_color(color)) for text, color in state['messages']]
+    return message_log
+
+
+def encode_color(color):
+    # Colours are normally libtcod Colors, but some messages carry a colour name or nothing
+    if hasattr(color, 'r'):
+        return [color.r, color.g, color.b]
+    return color
+
+
+def decode_color(color):
+    if isinstance(color, list):
+        return libtcod.Color(*color)
+    return color
+
+
+def encode_columns(columns, blocks):
+    """
+    Store integer columns in the narrowest signed type that holds them
+    :param dict columns: Lists of values by column name
+    :return dict: Each column as a block descriptor if it is all integers or all booleans, otherwise as a list
+    """
+    encoded = {}
+    for column, values in columns.items():
+        array = np.array(values) if values and type(values[0]) in (bool, int) else None
+        if array is not None and array.ndim == 1 and array.dtype.kind in 'bi':
+            if array.dtype.kind == 'i':
+                low, high = array.min(), array.max()
+                array = array.astype(next(dtype for dtype in (np.int8, np.int16, np.int32, np.int64)
+                                          if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max))
+            encoded[column] = blocks.add(array)
+        else:
+            encoded[column] = values
+    return encoded
+
+
+def decode_columns(encoded, blocks):
+    """
+    :return dict: Lists of values by column name
+    """
+    return {column: values if isinstance(values, list) else blocks.read(values).tolist()
+            for column, values in encoded.items()}
+
+
+def component_columns(rows, name, fields, first_row=0):
+    """
+    :param list rows: Entities, in row order
+    :param str name: Attribute holding the component
+    :param tuple fields: Attributes of the component to store
+    :param int first_row: Row of the first of the entities
+    :return tuple: The components in row order, and a dict of columns: the owning entity's row, then each field
+    """
+    owners = [(first_row + row, getattr(entity, name)) for row, entity in enumerate(rows) if getattr(entity, name)]
+    components = [component for row, component in owners]
+    columns = {'entity': [row for row, component in owners]}
+    for field in fields:
+        columns[field] = [getattr(component, field) for component in components]
+    return components, columns
+
+
+def extend_columns(table, columns):
+    """
+    Add the rows of some entities to a table
+    :param dict table: Lists of values by column name, added to
+    :param dict columns: Lists of values by column name
+    """
+    for column, values in columns.items():
+        table.setdefault(column, []).extend(values)
+
+
+def encode_entities(player, entities, blocks):
+    """
+    Copy every entity's fields into columns, SNAPSHOT_ROWS entities per step
+    :return dict: The entity table, on_map (entities on the floor come first), the player's row, and one
+        table for each kind of component
+    """
+    rows = list(entities)
+    row_of = {}
+    for first_row in range(0, len(rows), SNAPSHOT_ROWS):
+        row_of.update((id(entity), row) for row, entity in enumerate(rows[first_row:first_row + SNAPSHOT_ROWS],
+                                                                       first_row))
+        yield
+
+    def row(entity):
+        if entity is None:
+            return -1
+        if id(entity) not in row_of:
+            row_of[id(entity)] = len(rows)
+            rows.append(entity)
+        return row_of[id(entity)]
+
+    # Carried items are not on the floor, so they get rows of their own as they are found; the loop
+    # reaches them too, in case they carry anything themselves
+    carried = {}
+    first_row = 0
+    while first_row < len(rows):
+        for entity in rows[first_row:first_row + SNAPSHOT_ROWS]:
+            if entity.inventory:
+                carried[id(entity.inventory)] = [row(item) for item in entity.inventory.items]
+            if entity.equipment:
+                carried[id(entity.equipment)] = (row(entity.equipment.main_hand), row(entity.equipment.off_hand))
+        first_row += SNAPSHOT_ROWS
+        yield
+
+    tables = {name: {} for name in ('entity', 'fighter', 'level', 'stairs', 'item', 'inventory', 'equipment',
+                                    'equippable', 'spawner', 'room')}
+    tables['ai'] = {column: [] for column in ('entity', 'kind', 'activity', 'activity_radius', 'number_of_turns',
+                                              'previous')}
+    # Rooms are shared by the spawners in them, so they are stored once and referred to by row
+    room_of = {}
+    for first_row in range(0, len(rows), SNAPSHOT_ROWS):
+        chunk = rows[first_row:first_row + SNAPSHOT_ROWS]
+        encode_entity_rows(chunk, first_row, tables, carried, room_of)
+        yield
+
+    encoded = {name: {} for name in tables}
+    for name, columns in tables.items():
+        for column, values in columns.items():
+            encoded[name].update(encode_columns({column: values}, blocks))
+            yield
+
+    return {
+        'on_map': len(entities),
+        'player': row_of[id(player)] if player is not None else -1,
+        'tables': encoded
+    }
+
+
+def encode_entity_rows(rows, first_row, tables, carried, room_of):
+    """
+    Add some entities, and their components, to the tables
+    :param list rows: Entities, in row order
+    :param int first_row: Row of the first of the entities
+    :param dict tables: Columns by table name, added to
+    :param dict carried: Rows of the items in each inventory and equipment, by the component's id
+    :param dict room_of: Rows of the rooms in the room table so far, by the room's id; added to
+    """
+    extend_columns(tables['entity'], {
+        'x': [entity.x for entity in rows],
+        'y': [entity.y for entity in rows],
+        'char': [entity.char if isinstance(entity.char, int) else ord(entity.char) for entity in rows],
+        'color': [(entity.color.r << 16) | (entity.color.g << 8) | entity.color.b for entity in rows],
+        'name': [entity.name for entity in rows],
+        'blocks': [entity.blocks for entity in rows],
+        'render_order': [entity.render_order.value for entity in rows],
+        'count_value': [entity.count_value for entity in rows],
+        'treasure_value': [entity.treasure_value for entity in rows]
+    })
+
+    extend_columns(tables['fighter'], component_columns(rows, 'fighter', ('hp', 'base_max_hp', 'base_defense',
+                                                                          'base_power', 'xp'), first_row)[1])
+    extend_columns(tables['level'], component_columns(rows, 'level', ('current_level', 'current_xp',
+                                                                      'level_up_base', 'level_up_factor'),
+                                                      first_row)[1])
+    extend_columns(tables['stairs'], component_columns(rows, 'stairs', ('floor',), first_row)[1])
+
+    items, columns = component_columns(rows, 'item', ('targeting', 'is_treasure', 'function_kwargs'), first_row)
+    for item in items:
+        if item.use_function is not None and item.use_function not in USE_FUNCTION_NAMES:
+            raise TypeError('Cannot save item function {0}'.format(item.use_function))
+    columns['use_function'] = [USE_FUNCTION_NAMES.get(item.use_function) for item in items]
+    columns['targeting_message'] = [item.targeting_message and [item.targeting_message.text,
+                                                                encode_color(item.targeting_message.color)]
+                                    for item in items]
+    extend_columns(tables['item'], columns)
+
+    inventories, columns = component_columns(rows, 'inventory', ('capacity',), first_row)
+    columns['items'] = [carried[id(inventory)] for inventory in inventories]
+    extend_columns(tables['inventory'], columns)
+
+    equipments, columns = component_columns(rows, 'equipment', (), first_row)
+    columns['main_hand'] = [carried[id(equipment)][0] for equipment in equipments]
+    columns['off_hand'] = [carried[id(equipment)][1] for equipment in equipments]
+    extend_columns(tables['equipment'], columns)
+
+    equippables, columns = component_columns(rows, 'equippable', ('power_bonus', 'defense_bonus', 'max_hp_bonus'),
+                                             first_row)
+    columns['slot'] = [equippable.slot and equippable.slot.value for equippable in equippables]
+    extend_columns(tables['equippable'], columns)
+
+    spawners, columns = component_columns(rows, 'spawner', SPAWNER_FIELDS, first_row)
+    for spawner in spawners:
+        if id(spawner.room) not in room_of:
+            room_of[id(spawner.room)] = len(room_of)
+            extend_columns(tables['room'], {field: [getattr(spawner.room, field)]
+                                            for field in ('x1', 'y1', 'x2', 'y2', 'monster_limit')})
+    columns['room'] = [room_of[id(spawner.room)] for spawner in spawners]
+    extend_columns(tables['spawner'], columns)
+
+    # A confused monster's AI holds the one it returns to, which gets a row of its own with no entity
+    ai = tables['ai']
+
+    def add_ai(component, entity_row):
+        kind = AI_KIND_NAMES.get(type(component))
+        if kind is None:
+            raise TypeError('Cannot save AI of type {0}'.format(type(component).__name__))
+        if kind == 'confused':
+            previous = add_ai(component.previous_ai, -1)
+            activity, activity_radius, number_of_turns = False, 0, component.number_of_turns
+        else:
+            previous = -1
+            activity, activity_radius, number_of_turns = component.activity, component.activity_radius, 0
+
+        ai['entity'].append(entity_row)
+        ai['kind'].append(kind)
+        ai['activity'].append(activity)
+        ai['activity_radius'].append(activity_radius)
+        ai['number_of_turns'].append(number_of_turns)
+        ai['previous'].append(previous)
+        return len(ai['entity']) - 1
+
+    for entity_row, entity in enumerate(rows, first_row):
+        if entity.ai:
+            add_ai(entity.ai, entity_row)
+
+
+def decode_entities(state, blocks):
+    """
+    :return tuple: player, or None for a floor the player is not on, and the EntityList of the entities on the floor
+    """
+    tables = {name: decode_columns(columns, blocks) for name, columns in state['tables'].items()}
+    render_orders = {render_order.value: render_order for render_order in RenderOrder}
+
+    table = tables['entity']
+    rows = [Entity(x, y, chr(char), libtcod.Color(color >> 16, (color >> 8) & 255, color & 255), name,
+                   blocks=entity_blocks, render_order=render_orders[render_order], count_value=count_value,
+                   treasure_value=treasure_value)
+            for x, y, char, color, name, entity_blocks, render_order, count_value, treasure_value in zip(
+                table['x'], table['y'], table['char'], table['color'], table['name'], table['blocks'],
+                table['render_order'], table['count_value'], table['treasure_value'])]
+
+    def entity(row):
+        return rows[row] if row >= 0 else None
+
+    table = tables['fighter']
+    for row, hp, base_max_hp, base_defense, base_power, xp in zip(
+            table['entity'], table['hp'], table['base_max_hp'], table['base_defense'], table['base_power'],
+            table['xp']):
+        fighter = Fighter(base_max_hp, base_defense, base_power, xp)
+        fighter.hp = hp
+        attach(rows[row], 'fighter', fighter)
+
+    table = tables['ai']
+    ais = []
+    for row, kind, activity, activity_radius, number_of_turns, previous in zip(
+            table['entity'], table['kind'], table['activity'], table['activity_radius'], table['number_of_turns'],
+            table['previous']):
+        if kind == 'confused':
+            ai = ConfusedMonster(ais[previous], number_of_turns)
+        else:
+            ai = AI_KINDS[kind](activity, activity_radius)
+        ais.append(ai)
+        if row >= 0:
+            attach(rows[row], 'ai', ai)
+            # An AI set aside while its owner is confused still belongs to it
+            while getattr(ai, 'previous_ai', None) is not None:
+                ai = ai.previous_ai
+                ai.owner = rows[row]
+
+    table = tables['item']
+    for row, use_function, targeting, message, is_treasure, kwargs in zip(
+            table['entity'], table['use_function'], table['targeting'], table['targeting_message'],
+            table['is_treasure'], table['function_kwargs']):
+        attach(rows[row], 'item', Item(use_function=ItemFactory.use_functions[use_function], targeting=targeting,
+                                       targeting_message=message and Message(message[0], decode_color(message[1])),
+                                       is_treasure=is_treasure, **kwargs))
+
+    table = tables['inventory']
+    for row, capacity, items in zip(table['entity'], table['capacity'], table['items']):
+        inventory = Inventory(capacity)
+        inventory.items = [rows[item] for item in items]
+        attach(rows[row], 'inventory', inventory)
+
+    table = tables['equipment']
+    for row, main_hand, off_hand in zip(table['entity'], table['main_hand'], table['off_hand']):
+        attach(rows[row], 'equipment', Equipment(entity(main_hand), entity(off_hand)))
+
+    table = tables['equippable']
+    for row, slot, power_bonus, defense_bonus, max_hp_bonus in zip(
+            table['entity'], table['slot'], table['power_bonus'], table['defense_bonus'], table['max_hp_bonus']):
+        attach(rows[row], 'equippable', Equippable(slot and EquipmentSlots(slot), power_bonus, defense_bonus,
+                                                   max_hp_bonus))
+
+    table = tables['level']
+    for row, current_level, current_xp, level_up_base, level_up_factor in zip(
+            table['entity'], table['current_level'], table['current_xp'], table['level_up_base'],
+            table['level_up_factor']):
+        level = Level(current_level, current_xp)
+        level.level_up_base = level_up_base
+        level.level_up_factor = level_up_factor
+        attach(rows[row], 'level', level)
+
+    table = tables['stairs']
+    for row, floor in zip(table['entity'], table['floor']):
+        attach(rows[row], 'stairs', Stairs(floor))
+
+    table = tables['room']
+    rooms = []
+    for x1, y1, x2, y2, monster_limit in zip(table['x1'], table['y1'], table['x2'], table['y2'],
+                                             table['monster_limit']):
+        rooms.append(Room(x1, y1, x2 - x1, y2 - y1, monster_limit))
+
+    table = tables['spawner']
+    for index, row in enumerate(table['entity']):
+        spawner = MonsterSpawner(rooms[table['room'][index]])
+        for field in SPAWNER_FIELDS:
+            setattr(spawner, field, table[field][index])
+        attach(rows[row], 'spawner', spawner)
+
+    return entity(state['player']), EntityList(rows[:state['on_map']])
+
+
+def attach(entity, name, component):
+    setattr(entity, name, component)
+    component.owner = entity
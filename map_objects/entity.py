@@ -1,6 +1,5 @@
 import math
 
-import libtcodpy as libtcod
 from components.item import Item
 from render_functions import RenderOrder
 
@@ -18,12 +17,14 @@ class Entity:
                  spawner=None,
                  count_value=0, treasure_value=0,
                  stairs=None, level=None, ):
-        self.x = x
-        self.y = y
+        # Set before the position, which is reported to the index it belongs to
+        self.entity_index = None
+        self._x = x
+        self._y = y
+        self._blocks = blocks
         self.char = char
         self.color = color
         self.name = name
-        self.blocks = blocks
         self.render_order = render_order
         self.fighter = fighter
         self.ai = ai
@@ -68,14 +69,66 @@ class Entity:
         if self.spawner:
             self.spawner.owner = self
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The index is rebuilt by the EntityList the entity is loaded into
+        state['entity_index'] = None
+        return state
+
+    def __setstate__(self, state):
+        # Saves made before entities were indexed hold the position and blocking state as plain attributes
+        for name in ('x', 'y', 'blocks'):
+            if name in state:
+                state['_' + name] = state.pop(name)
+        state['entity_index'] = None
+        self.__dict__.update(state)
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self.set_position(value, self._y)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self.set_position(self._x, value)
+
+    @property
+    def blocks(self):
+        return self._blocks
+
+    @blocks.setter
+    def blocks(self, value):
+        changed = value != self._blocks
+        self._blocks = value
+        if changed and self.entity_index is not None:
+            self.entity_index.blocks_changed(self)
+
+    def set_position(self, x, y):
+        """
+        Place the entity on a tile, keeping its EntityIndex up to date
+        :param int x:
+        :param int y:
+        """
+        old_x, old_y = self._x, self._y
+        self._x = x
+        self._y = y
+        if self.entity_index is not None and (old_x, old_y) != (x, y):
+            self.entity_index.moved(self, old_x, old_y)
+
     def move(self, dx, dy):
         """
         Move the entity by a given amount
         :param dx: change in x-position
         :param dy: change in y-position
         """
-        self.x += dx
-        self.y += dy
+        self.set_position(self._x + dx, self._y + dy)
 
     def move_towards(self, target_x, target_y, game_map, entities):
         """
@@ -103,50 +156,46 @@ class Entity:
         :param list entities: List of things and creatures on the map
         :param game_map.GameMap game_map: The map being moved through
         """
-        # Create a FOV map that has the dimensions of the map
-        fov = libtcod.map_new(game_map.width, game_map.height)
-
-        # Scan the current map each turn and set all the walls as unwalkable
-        for y1 in range(game_map.height):
-            for x1 in range(game_map.width):
-                libtcod.map_set_properties(fov, x1, y1, not game_map.tiles[x1][y1].block_sight,
-                                           not game_map.tiles[x1][y1].block_move)
-
-        # Scan all the objects to see if there are objects that must be navigated around
-        # Check also that the object isn't self or the target (so that the start and the end points are free)
-        # The AI class handles the situation if self is next to the target so it will not use this A* function anyway
-        for entity in entities:
-            if entity.blocks and entity != self and entity != target:
-                # Set the tile as a wall so it must be navigated around
-                libtcod.map_set_properties(fov, entity.x, entity.y, True, False)
-
-        # Allocate a A* path
-        # The 1.41 is the normal diagonal cost of moving, it can be set as 0.0 if diagonal moves are prohibited
-        my_path = libtcod.path_new_using_map(fov, 1.40)
-
-        # Compute the path between self's coordinates and the target's coordinates
-        libtcod.path_compute(my_path, self.x, self.y, target.x, target.y)
-
-        # Check if the path exists, and in this case, also the path is shorter than 25 tiles
+        # The Navigation Grid is shared by every monster on the floor, so only blockers that moved since
+        # the last call need to be patched before computing a path
+        nav_grid = game_map.nav_grid
+        nav_grid.bind(entities)
+
+        # Find the next step along a path shorter than 25 tiles
         # The path size matters if you want the monster to use alternative longer paths
         # (for example through other rooms) if for example the player is in a corridor
         # It makes sense to keep path size relatively low to keep the monsters from running around
         # the map if there's an alternative path really far away
-        if not libtcod.path_is_empty(my_path) and libtcod.path_size(my_path) < 25:
-            # Find the next coordinates in the computed full path
-            x, y = libtcod.path_walk(my_path, True)
-            if x or y:
-                # Set self's coordinates to the next path tile
-                self.x = x
-                self.y = y
+        step = nav_grid.next_step(self, target, 25)
+        if step:
+            # Set self's coordinates to the next path tile
+            self.set_position(*step)
         else:
             # Keep the old move function as a backup so that if there are no paths
             # (for example another monster blocks a corridor)
             # it will still try to move towards the player (closer to the corridor opening)
             self.move_towards(target.x, target.y, game_map, entities)
 
-            # Delete the path to free memory
-        libtcod.path_delete(my_path)
+    def move_flow(self, target, entities, game_map):
+        """
+        Move this entity one step down the floor's shared flow field towards a target.
+        Follows the same rules as move_astar: targets 25 or more steps away, or with every closer
+        tile occupied, fall back to moving in a straight line.
+        :param Entity target: The thing or creature to move towards
+        :param list entities: List of things and creatures on the map
+        :param game_map.GameMap game_map: The map being moved through
+        """
+        nav_grid = game_map.nav_grid
+        nav_grid.bind(entities)
+
+        # Paths of 25 steps or more are rejected by move_astar, so the field is only flooded 24 steps out
+        flow_field = nav_grid.flow_field(target.x, target.y, 24)
+
+        step = flow_field.next_step(self.x, self.y, nav_grid.is_occupied)
+        if step:
+            self.set_position(*step)
+        else:
+            self.move_towards(target.x, target.y, game_map, entities)
 
     def distance_to(self, other):
         """
@@ -171,13 +220,9 @@ class Entity:
 def get_blocking_entities_at_location(entities, destination_x, destination_y):
     """
     Return the first Entity which blocks movement at a given x,y coordinate.
-    :param list entities: List of things and creatures on the map
+    :param EntityList entities: List of things and creatures on the map
     :param int destination_x:
     :param int destination_y:
     :return Entity:
     """
-    for entity in entities:
-        if entity.blocks and entity.x == destination_x and entity.y == destination_y:
-            return entity
-
-    return None
+    return entities.tile_index.blocking_at(destination_x, destination_y)
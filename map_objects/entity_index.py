@@ -0,0 +1,226 @@
+import math
+
+
+class EntityIndex:
+    """
+    Entities bucketed by the tile they stand on, with a separate layer holding only the entities that
+    block movement.  Entities keep it up to date themselves when they move or change blocking state.
+    """
+
+    def __init__(self, entities=()):
+        """
+        Index a collection of entities
+        :param entities: Things and creatures on the map
+        """
+        self.cells = {}
+        self.blockers = {}
+        self.blocker_listeners = []
+
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity):
+        """
+        Start tracking an entity, taking it over from any index that tracked it before
+        :param Entity entity:
+        """
+        if entity.entity_index is not None and entity.entity_index is not self:
+            entity.entity_index.discard(entity)
+        entity.entity_index = self
+
+        _insert(self.cells, (entity.x, entity.y), entity)
+        if entity.blocks:
+            self._insert_blocker((entity.x, entity.y), entity)
+
+    def discard(self, entity):
+        """
+        Stop tracking an entity
+        :param Entity entity:
+        """
+        _delete(self.cells, (entity.x, entity.y), entity)
+        if entity.blocks:
+            self._delete_blocker((entity.x, entity.y), entity)
+
+        if entity.entity_index is self:
+            entity.entity_index = None
+
+    def moved(self, entity, old_x, old_y):
+        """
+        Move an entity between buckets after its position has changed
+        :param Entity entity: The entity, already at its new position
+        :param int old_x: Previous position
+        :param int old_y: Previous position
+        """
+        _delete(self.cells, (old_x, old_y), entity)
+        _insert(self.cells, (entity.x, entity.y), entity)
+        if entity.blocks:
+            self._delete_blocker((old_x, old_y), entity)
+            self._insert_blocker((entity.x, entity.y), entity)
+
+    def blocks_changed(self, entity):
+        """
+        Add or remove an entity from the blocker layer after its blocking state has changed
+        :param Entity entity:
+        """
+        if entity.blocks:
+            self._insert_blocker((entity.x, entity.y), entity)
+        else:
+            self._delete_blocker((entity.x, entity.y), entity)
+
+    def at(self, x, y):
+        """
+        :param int x:
+        :param int y:
+        :return list: Every entity on a tile, in the order they arrived there
+        """
+        return list(self.cells.get((x, y), ()))
+
+    def blocking_at(self, x, y):
+        """
+        :param int x:
+        :param int y:
+        :return Entity: The first entity blocking movement on a tile, or None
+        """
+        blockers = self.blockers.get((x, y))
+        if blockers:
+            return blockers[0]
+
+        return None
+
+    def in_rect(self, x1, y1, x2, y2):
+        """
+        Find every entity inside a rectangle of tiles
+        :param int x1: Left edge (inclusive)
+        :param int y1: Top edge (inclusive)
+        :param int x2: Right edge (inclusive)
+        :param int y2: Bottom edge (inclusive)
+        :return list: Entities within the rectangle
+        """
+        found = []
+        if (x2 - x1 + 1) * (y2 - y1 + 1) <= len(self.cells):
+            for x in range(x1, x2 + 1):
+                for y in range(y1, y2 + 1):
+                    found.extend(self.cells.get((x, y), ()))
+        else:
+            # Fewer occupied tiles than tiles in the rectangle, so check the occupied ones instead
+            for (x, y), bucket in self.cells.items():
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    found.extend(bucket)
+
+        return found
+
+    def in_radius(self, x, y, radius):
+        """
+        Find every entity within a straight-line distance of a tile
+        :param int x: Centre of the circle
+        :param int y: Centre of the circle
+        :param float radius: Distance in tiles (inclusive)
+        :return list: Entities within the circle
+        """
+        reach = int(math.floor(radius))
+        return [entity for entity in self.in_rect(x - reach, y - reach, x + reach, y + reach)
+                if (entity.x - x) ** 2 + (entity.y - y) ** 2 <= radius ** 2]
+
+    def _insert_blocker(self, cell, entity):
+        if _insert(self.blockers, cell, entity):
+            self._notify(cell)
+
+    def _delete_blocker(self, cell, entity):
+        if _delete(self.blockers, cell, entity):
+            self._notify(cell)
+
+    def _notify(self, cell):
+        for listener in self.blocker_listeners:
+            listener(*cell)
+
+
+class EntityList(list):
+    """
+    The list of things and creatures on a floor, with an EntityIndex that follows every addition and removal
+    """
+
+    def __init__(self, entities=()):
+        super().__init__(entities)
+        self.tile_index = EntityIndex(self)
+
+    def __reduce__(self):
+        # The index is rebuilt rather than saved
+        return self.__class__, (list(self),)
+
+    def append(self, entity):
+        super().append(entity)
+        self.tile_index.add(entity)
+
+    def extend(self, entities):
+        entities = list(entities)
+        super().extend(entities)
+        for entity in entities:
+            self.tile_index.add(entity)
+
+    def insert(self, position, entity):
+        super().insert(position, entity)
+        self.tile_index.add(entity)
+
+    def remove(self, entity):
+        super().remove(entity)
+        self.tile_index.discard(entity)
+
+    def pop(self, position=-1):
+        entity = super().pop(position)
+        self.tile_index.discard(entity)
+        return entity
+
+    def clear(self):
+        for entity in self:
+            self.tile_index.discard(entity)
+        super().clear()
+
+    def __setitem__(self, key, value):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        if isinstance(key, slice):
+            value = list(value)
+        super().__setitem__(key, value)
+
+        for entity in removed:
+            self.tile_index.discard(entity)
+        for entity in (value if isinstance(key, slice) else [value]):
+            self.tile_index.add(entity)
+
+    def __delitem__(self, key):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        super().__delitem__(key)
+        for entity in removed:
+            self.tile_index.discard(entity)
+
+    def __iadd__(self, entities):
+        self.extend(entities)
+        return self
+
+
+def _insert(buckets, cell, entity):
+    """
+    :return boolean: True if the bucket was empty before
+    """
+    bucket = buckets.get(cell)
+    if bucket is None:
+        buckets[cell] = [entity]
+        return True
+
+    bucket.append(entity)
+    return False
+
+
+def _delete(buckets, cell, entity):
+    """
+    :return boolean: True if the bucket is now empty
+    """
+    bucket = buckets.get(cell)
+    if bucket is None or entity not in bucket:
+        return False
+
+    bucket.remove(entity)
+    if not bucket:
+        del buckets[cell]
+        return True
+
+    return False
@@ -0,0 +1,97 @@
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+
+from loader_functions.dungeon_pack import open_pack
+from map_objects.game_map import GameMap
+from timing import instruments
+
+# The constants GameMap.generate uses, sent to the worker with each floor
+FLOOR_SETTINGS = ('map_width', 'map_height', 'monster_dict', 'item_dict', 'ai_pathing', 'max_rooms', 'room_min_size',
+                  'room_max_size')
+
+
+def floor_settings(constants):
+    """
+    :param dict constants: Game constants
+    :return dict: The constants in FLOOR_SETTINGS, which decide the floors made from a seed
+    """
+    return {key: constants[key] for key in FLOOR_SETTINGS}
+
+
+class FloorPrefetcher:
+    """
+    Makes the next level of the dungeon in a worker process while the current one is played
+    Floors are made from the game's seed, so a floor taken from here is the one GameMap.generate would have
+    made when the stairs were taken.  The worker process is started with the first floor asked for.
+    Floors the game's dungeon pack holds are read from it when taken rather than made.
+    """
+
+    def __init__(self, constants, workers=1):
+        """
+        :param dict constants: Game constants
+        :param int workers: Worker processes; with none, only floors in the dungeon pack are taken from here
+        """
+        self.settings = floor_settings(constants)
+        self.workers = workers
+        self.executor = None
+        self.futures = {}
+        self.pack = open_pack(constants['dungeon_pack'], self.settings)
+
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, dungeon_level, seed):
+        """
+        Start making a level of the dungeon, unless it is already being made
+        :param int dungeon_level:
+        :param int seed: The game's seed
+        """
+        if (dungeon_level, seed) in self.futures or not self.workers:
+            return
+        if self.pack is not None and (seed, dungeon_level) in self.pack:
+            return
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        self.futures[(dungeon_level, seed)] = self.executor.submit(GameMap.generate, self.settings, dungeon_level,
+                                                                   seed)
+
+    @instruments.timed('FloorPrefetcher.take')
+    def take(self, dungeon_level, seed):
+        """
+        Take a level of the dungeon if it has been made; one not yet finished is abandoned
+        :param int dungeon_level:
+        :param int seed: The game's seed
+        :return tuple: As returned by GameMap.generate, or None
+        """
+        if self.pack is not None and (seed, dungeon_level) in self.pack:
+            self.hits += 1
+            return self.pack.take(dungeon_level, seed)
+
+        future = self.futures.pop((dungeon_level, seed), None)
+        if future is not None and future.done():
+            try:
+                floor = future.result()
+            except BrokenExecutor:
+                # The worker died; this floor is made on the game's thread, and the next in a new worker
+                self.executor = None
+                self.futures.clear()
+            else:
+                self.hits += 1
+                instruments.count('floors_prefetched')
+                return floor
+
+        if future is not None:
+            future.cancel()
+        self.misses += 1
+        return None
+
+    def close(self):
+        """
+        Stop the worker process, abandoning any floor being made, and close the dungeon pack
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.futures.clear()
+        if self.pack is not None:
+            self.pack.close()
+            self.pack = None
@@ -0,0 +1,96 @@
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+# The eight neighbouring offsets, orthogonal steps first
+NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+class FlowField:
+    """
+    Distance map from a single goal tile, shared by every creature heading for that goal
+    Each creature steps down the distance gradient instead of computing its own path.
+    """
+
+    def __init__(self, walkable, goal_x, goal_y, max_distance):
+        """
+        Flood the walkable tiles outwards from a goal with a breadth-first search
+        :param numpy.ndarray walkable: Boolean array indexed [x, y], True where movement is possible
+        :param int goal_x: Coordinate of the goal
+        :param int goal_y: Coordinate of the goal
+        :param int max_distance: Stop flooding after this many steps
+        """
+        self.goal_x = goal_x
+        self.goal_y = goal_y
+        self.max_distance = max_distance
+        self.width, self.height = walkable.shape
+        self.distance = np.full(walkable.shape, UNREACHABLE, dtype=np.int32)
+        self.distance[goal_x, goal_y] = 0
+
+        frontier = np.zeros(walkable.shape, dtype=bool)
+        frontier[goal_x, goal_y] = True
+        for step in range(1, max_distance + 1):
+            frontier = _expand(frontier) & walkable & (self.distance == UNREACHABLE)
+            if not frontier.any():
+                break
+            self.distance[frontier] = step
+
+    def get_distance(self, x, y):
+        """
+        :param int x:
+        :param int y:
+        :return int: Steps from (x, y) to the goal, or UNREACHABLE
+        """
+        return int(self.distance[x, y])
+
+    def next_step(self, x, y, is_occupied):
+        """
+        Choose the neighbouring tile that leads most directly downhill towards the goal
+        Ties are broken by straight-line distance to the goal.
+        :param int x: Current position
+        :param int y: Current position
+        :param is_occupied: Callable (x, y) -> bool, True where a creature blocks the tile
+        :return tuple: (x, y) of the next step, or None if no free tile is closer to the goal or (x, y) is
+            beyond the flooded distance
+        """
+        current = self.distance[x, y]
+        # Every tile on the edge of the flood would count as downhill from outside it
+        if current == UNREACHABLE:
+            return None
+
+        best = None
+        best_key = None
+        for dx, dy in NEIGHBOURS:
+            nx = x + dx
+            ny = y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+
+            distance = self.distance[nx, ny]
+            if distance >= current or is_occupied(nx, ny):
+                continue
+
+            key = (distance, (self.goal_x - nx) ** 2 + (self.goal_y - ny) ** 2)
+            if best_key is None or key < best_key:
+                best = (nx, ny)
+                best_key = key
+
+        return best
+
+
+def _expand(mask):
+    """
+    Grow a boolean mask by one tile in all eight directions
+    :param numpy.ndarray mask:
+    :return numpy.ndarray:
+    """
+    grown = mask.copy()
+    grown[1:, :] |= mask[:-1, :]
+    grown[:-1, :] |= mask[1:, :]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    grown[1:, 1:] |= mask[:-1, :-1]
+    grown[:-1, :-1] |= mask[1:, 1:]
+    grown[1:, :-1] |= mask[:-1, 1:]
+    grown[:-1, 1:] |= mask[1:, :-1]
+    return grown
@@ -1,16 +1,22 @@
-from random import randint
+import copy
+import random
 
-import libtcodpy as libtcod
+import numpy as np
+
+from backends import libtcod
 from components.stairs import Stairs
 from game_messages import Message
 from map_objects.entity import Entity
+from map_objects.entity_index import EntityList
 from map_objects.item_factory import ItemFactory
 from map_objects.monster_factory import MonsterFactory
 from map_objects.map_room import Room
+from map_objects.nav_grid import NavGrid
 from map_objects.spawner_factory import SpawnerFactory
-from map_objects.tile import Tile
-from random_utils import from_dungeon_level
+from map_objects.tile import TileGrid
+from random_utils import from_dungeon_level, GENERATION_STREAMS, RandomStreams
 from render_functions import RenderOrder
+from timing import instruments
 
 
 class GameMap:
@@ -18,22 +24,32 @@ class GameMap:
     Game Map
     Tracks location and state of all tiles
     Performs random map generation
+    Tile state is held in boolean arrays indexed [x, y]: block_move, block_sight and explored
+    version is bumped whenever blocking state changes, so data derived from the tiles can tell it is stale.
+    Everything random on the floor, from its rooms to its monsters' wandering, is drawn from its RandomStreams.
     """
 
-    def __init__(self, width, height, monster_dict, item_dict, dungeon_level=1):
+    def __init__(self, width, height, monster_dict, item_dict, dungeon_level=1, pathing='astar', seed=None):
         """
         Create a new Game Map
         :param width: Width of map in tiles
         :param height: Height of map in tiles
         :param monster_dict:
         :param dungeon_level:
+        :param str pathing: How monsters path towards the player, 'astar' or 'flow_field'
+        :param int seed: The game's seed, from which the floor's random streams are seeded; random if None
         """
         self.width = width
         self.height = height
+        self.pathing = pathing
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.version = 0
+        self._nav_grid = None
         self.tiles = self.initialize_tiles()
         self.monster_dict = monster_dict
         self.item_dict = item_dict
         self.dungeon_level = dungeon_level
+        self.random = RandomStreams(self.seed, dungeon_level)
 
         self.monster_chances = {}
         for key, settings in monster_dict.items():
@@ -43,11 +59,81 @@ class GameMap:
         for key, settings in item_dict.items():
             self.item_chances[key] = from_dungeon_level(settings['likelihood'], dungeon_level)
 
-    # noinspection PyUnusedLocal
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Native navigation data cannot be saved; it is rebuilt on first use after loading
+        state['_nav_grid'] = None
+        del state['tiles']
+        state['random'] = self.random.getstate()
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        # Games saved before the tile arrays hold a Tile for every tile, and none of the state added since
+        legacy_tiles = state.pop('tiles', None)
+        state.setdefault('pathing', 'astar')
+        state.setdefault('version', 0)
+        state.setdefault('_nav_grid', None)
+        self.__dict__.update(state)
+        if legacy_tiles is not None:
+            for name in ('block_move', 'block_sight', 'explored'):
+                setattr(self, name, np.array([[tile.saved[name] for tile in column] for column in legacy_tiles],
+                                             dtype=bool, order='F'))
+        # Games saved before floors were seeded get a seed of their own
+        if 'seed' not in state:
+            self.seed = random.getrandbits(32)
+        self.random = RandomStreams(self.seed, self.dungeon_level)
+        self.random.setstate(state.get('random', {}))
+        self.tiles = TileGrid(self)
+
+    @classmethod
+    def generate(cls, constants, dungeon_level, seed):
+        """
+        Make a level of the dungeon from the game's seed
+        The floor is drawn from its own random streams, so it is the same whichever process makes it and in
+        whatever order the levels are made.
+        :param dict constants: Game constants; only the map settings and monster and item tables are used
+        :param int dungeon_level:
+        :param int seed: The game's seed, or None for a random one
+        :return tuple: The GameMap, an EntityList of everything on it, the (x, y) the player starts at, and the
+            list of its Rooms
+        """
+        game_map = cls(constants['map_width'], constants['map_height'], constants['monster_dict'],
+                       constants['item_dict'], dungeon_level, constants['ai_pathing'], seed)
+        # Stands in for the player, whom make_map starts in the first room
+        start = Entity(0, 0, '@', libtcod.white, 'Player', blocks=True)
+        entities = EntityList([start])
+        rooms = game_map.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
+                                  constants['map_width'], constants['map_height'], start, entities)
+        entities.remove(start)
+        # The floor is made; only the streams drawn from in play are worth keeping, and saving
+        game_map.random.discard(*GENERATION_STREAMS)
+
+        return game_map, entities, (start.x, start.y), rooms
+
+    @property
+    def nav_grid(self):
+        """
+        The Navigation Grid shared by every pathing creature on this floor, built on first use
+        :return NavGrid:
+        """
+        if self._nav_grid is None:
+            self._nav_grid = NavGrid(self)
+        return self._nav_grid
+
     def initialize_tiles(self, default_block=True):
-        tiles = [[Tile(default_block) for y in range(self.height)] for x in range(self.width)]
+        """
+        Allocate the tile arrays, every tile starting unexplored
+        :param boolean default_block: Initial blocking (movement and sight) state of every tile
+        :return TileGrid: View allowing tiles[x][y] access to the arrays
+        """
+        # Column-major, so the transposed [y, x] arrays used for drawing are contiguous
+        self.block_move = np.full((self.width, self.height), default_block, dtype=bool, order='F')
+        self.block_sight = np.full((self.width, self.height), default_block, dtype=bool, order='F')
+        self.explored = np.zeros((self.width, self.height), dtype=bool, order='F')
+        self.version += 1
 
-        return tiles
+        return TileGrid(self)
 
     def make_map(self, max_rooms, room_min_size, room_max_size, map_width, map_height, player, entities):
         """
@@ -58,9 +144,11 @@ class GameMap:
         :param int map_width:
         :param int map_height:
         :param Entity player:
-        :param list entities:
+        :param EntityList entities:
+        :return list: The Rooms made
         """
 
+        rng = self.random['mapgen']
         rooms = []
         num_rooms = 0
         center_of_last_room_x = None
@@ -68,10 +156,10 @@ class GameMap:
 
         for r in range(max_rooms):
             # Generate a room
-            w = randint(room_min_size, room_max_size)
-            h = randint(room_min_size, room_max_size)
-            x = randint(0, map_width - w - 1)
-            y = randint(0, map_height - h - 1)
+            w = rng.randint(room_min_size, room_max_size)
+            h = rng.randint(room_min_size, room_max_size)
+            x = rng.randint(0, map_width - w - 1)
+            y = rng.randint(0, map_height - h - 1)
             new_room = Room(x, y, w, h)
 
             for other_room in rooms:
@@ -96,7 +184,7 @@ class GameMap:
 
                     (prev_x, prev_y) = rooms[num_rooms - 1].center()
                     # Randomly determine corridor arrangement.
-                    if randint(0, 1) == 1:
+                    if rng.randint(0, 1) == 1:
                         # Horizontal tunnel, then Vertical
                         self.create_h_tunnel(prev_x, new_x, prev_y)
                         self.create_v_tunnel(prev_y, new_y, new_x)
@@ -110,19 +198,25 @@ class GameMap:
                 rooms.append(new_room)
                 num_rooms += 1
 
+        if self.dungeon_level > 1:
+            # The player starts each floor below the first on the stairs back up
+            up_stairs = Entity(player.x, player.y, '<', libtcod.white, 'Stairs', render_order=RenderOrder.STAIRS,
+                               stairs=Stairs(self.dungeon_level - 1))
+            entities.append(up_stairs)
+
         stairs_component = Stairs(self.dungeon_level + 1)
         down_stairs = Entity(center_of_last_room_x, center_of_last_room_y, '>', libtcod.white, 'Stairs',
                              render_order=RenderOrder.STAIRS, stairs=stairs_component)
         entities.append(down_stairs)
 
+        return rooms
+
     def create_room(self, room):
         """
         Add a room to the map and set tiles in a room to be Passable
         :param Room room: a room-defining rectangle
         """
-        for x in range(room.x1 + 1, room.x2):
-            for y in range(room.y1 + 1, room.y2):
-                self.tiles[x][y].block(False)
+        self.set_blocked(room.x1 + 1, room.y1 + 1, room.x2 - 1, room.y2 - 1, False)
 
     def create_h_tunnel(self, x1, x2, y):
         """
@@ -131,8 +225,7 @@ class GameMap:
         :param int x2: End of Tunnel
         :param int y: The y position of the tunnel
         """
-        for x in range(min(x1, x2), max(x1, x2) + 1):
-            self.tiles[x][y].block(False)
+        self.set_blocked(min(x1, x2), y, max(x1, x2), y, False)
 
     def create_v_tunnel(self, y1, y2, x):
         """
@@ -141,8 +234,32 @@ class GameMap:
         :param int y2: End of Tunnel
         :param int x: X position of the tunnel
         """
-        for y in range(min(y1, y2), max(y1, y2) + 1):
-            self.tiles[x][y].block(False)
+        self.set_blocked(x, min(y1, y2), x, max(y1, y2), False)
+
+    def set_blocked(self, x1, y1, x2, y2, state=True):
+        """
+        Set the blocking (movement and sight) state of a rectangle of tiles
+        :param int x1: Left edge (inclusive)
+        :param int y1: Top edge (inclusive)
+        :param int x2: Right edge (inclusive)
+        :param int y2: Bottom edge (inclusive)
+        :param boolean state: The desired blocking state
+        """
+        self.block_move[x1:x2 + 1, y1:y2 + 1] = state
+        self.block_sight[x1:x2 + 1, y1:y2 + 1] = state
+        self.tiles_changed(x1, y1, x2, y2)
+
+    def tiles_changed(self, x1, y1, x2, y2):
+        """
+        Notify derived map data that a rectangle of tiles has been modified
+        :param int x1: Left edge (inclusive)
+        :param int y1: Top edge (inclusive)
+        :param int x2: Right edge (inclusive)
+        :param int y2: Bottom edge (inclusive)
+        """
+        self.version += 1
+        if self._nav_grid is not None:
+            self._nav_grid.refresh_region(x1, y1, x2, y2)
 
     def place_entities(self, room, entities, is_first_room):
         """
@@ -155,30 +272,36 @@ class GameMap:
         max_monsters_per_room = from_dungeon_level([[4, 1], [7, 4], [10, 6]], self.dungeon_level)
         max_items_per_room = from_dungeon_level([[1, 1], [2, 4]], self.dungeon_level)
 
-        room.monster_limit = randint(0, max_monsters_per_room)
-        number_of_items = randint(0, max_items_per_room)
+        spawning = self.random['spawning']
+        loot = self.random['loot']
+        room.monster_limit = spawning.randint(0, max_monsters_per_room)
+        number_of_items = loot.randint(0, max_items_per_room)
 
         if not is_first_room:
             monster_count = 0
-            while monster_count < room.monster_limit:
-                x, y = room.random_point()
+            # Deep enough, the smallest monster counts for more than one, and may not fit what is left of the limit
+            smallest = min((self.monster_dict[key]['monster_value'] for key, chance in self.monster_chances.items()
+                            if chance), default=room.monster_limit + 1)
+            while monster_count + smallest <= room.monster_limit:
+                x, y = room.random_point(spawning)
                 monster = MonsterFactory.get_monster(self.monster_dict, self.monster_chances,
-                                                     entities, x, y)
+                                                     entities, x, y, spawning)
                 if monster and monster_count + monster.count_value <= room.monster_limit:
                     entities.append(monster)
                     monster_count += monster.count_value
 
             # TODO: Clean This Up
-            if randint(0, 2) == 0:
-                x, y = room.random_point()
+            if spawning.randint(0, 2) == 0:
+                x, y = room.random_point(spawning)
                 spawner = SpawnerFactory.get_monster_spawner(self.monster_dict, self.monster_chances,
-                                                             entities, x, y, room)
-                entities.append(spawner)
+                                                             entities, x, y, room, spawning)
+                if spawner:
+                    entities.append(spawner)
 
         item_count = 0
         while item_count < number_of_items:
-            x, y = room.random_point()
-            item = ItemFactory.get_item(self.item_dict, self.item_chances, entities, x, y)
+            x, y = room.random_point(loot)
+            item = ItemFactory.get_item(self.item_dict, self.item_chances, entities, x, y, loot)
             if item and item_count + item.count_value <= number_of_items:
                 entities.append(item)
                 item_count += item.count_value
@@ -190,26 +313,86 @@ class GameMap:
         :param int y:
         :return boolean: True if tile blocks movement
         """
-        if self.tiles[x][y].block_move:
+        if self.block_move[x, y]:
             return True
 
         return False
 
-    def next_floor(self, player, message_log, constants):
+    def release_nav_grid(self):
+        """
+        Return the Navigation Grid's native handles; it is rebuilt on next use
+        """
+        if self._nav_grid is not None:
+            self._nav_grid.delete()
+            self._nav_grid = None
+
+    def next_floor(self, player, message_log, constants, prefetcher=None):
         """
         Prepare the next level of the dungeon
         :param Entity player: the Player (@)
         :param game_messages.MessageLog message_log:game message log
         :param dict constants: Game constants
+        :param map_objects.floor_prefetcher.FloorPrefetcher prefetcher: Takes the floor from here if it has been
+            made ahead of time; otherwise it is made now
         :return list: entities on map
         """
-        self.dungeon_level += 1
-        entities = [player]
-        self.tiles = self.initialize_tiles(True)
-        self.make_map(constants['max_rooms'], constants['room_min_size'], constants['room_max_size'],
-                      constants['map_width'], constants['map_height'], player, entities)
+        floor = None
+        if prefetcher is not None:
+            floor = prefetcher.take(self.dungeon_level + 1, self.seed)
+        if floor is None:
+            instruments.count('floors_generated')
+            floor = GameMap.generate(constants, self.dungeon_level + 1, self.seed)
+
+        game_map, entities, (player.x, player.y), rooms = floor
+        self.adopt(game_map)
+        entities.insert(0, player)
 
         player.fighter.heal(player.fighter.max_hp // 2)
         message_log.add_message(Message('You take a moment to rest and recover your strength.', libtcod.violet))
 
         return entities
+
+    def change_floor(self, dungeon_level, player, entities, message_log, constants, floors, prefetcher=None):
+        """
+        Take the stairs to another level of the dungeon, keeping the floor left behind
+        A floor visited before is brought back as it was left, with the player on the stairs leading back;
+        otherwise a new one is made as by next_floor.
+        :param int dungeon_level: The level the stairs lead to
+        :param Entity player: the Player (@)
+        :param EntityList entities: Everything on the floor being left, the player included
+        :param game_messages.MessageLog message_log:game message log
+        :param dict constants: Game constants
+        :param loader_functions.floor_cache.FloorCache floors: Floors left behind, by dungeon level
+        :param map_objects.floor_prefetcher.FloorPrefetcher prefetcher: Floors made ahead of time
+        :return EntityList: entities on the floor arrived at
+        """
+        self.release_nav_grid()
+        entities.remove(player)
+        # A copy holds the floor left behind; this map takes on the floor arrived at
+        floors.put(self.dungeon_level, copy.copy(self), entities)
+
+        floor = floors.take(dungeon_level)
+        if floor is None:
+            self.dungeon_level = dungeon_level - 1
+            return self.next_floor(player, message_log, constants, prefetcher)
+
+        previous_level = self.dungeon_level
+        stored_map, entities = floor
+        self.adopt(stored_map)
+        for entity in entities:
+            if entity.stairs and entity.stairs.floor == previous_level:
+                player.x, player.y = entity.x, entity.y
+                break
+        entities.insert(0, player)
+
+        return entities
+
+    def adopt(self, game_map):
+        """
+        Take on another map's floor
+        The version carries on from this map's, so nothing derived from the floor left behind is reused.
+        :param GameMap game_map: Not used again
+        """
+        self.release_nav_grid()
+        self.__setstate__(dict(game_map.__getstate__(), version=self.version + 1))
+
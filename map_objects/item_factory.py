@@ -1,4 +1,4 @@
-import libtcodpy as libtcod
+from backends import libtcod
 from components.equipable import Equippable
 from components.equipment import EquipmentSlots
 from components.item import Item
@@ -21,19 +21,20 @@ class ItemFactory:
              None: None}
 
     @staticmethod
-    def get_item(item_dict, item_chances, entities, x, y):
+    def get_item(item_dict, item_chances, entities, x, y, rng):
         """
         Select a random level-appropriate item from the available items, and add it to the map
         :param dictionary item_dict: Dictionary of all available pre-defined items
         :param dictionary item_chances: Item-generation probabilities for the current level
-        :param list entities: Items and Monsters already on the Map.
+        :param EntityList entities: Items and Monsters already on the Map.
         :param int x: X position on map
         :param int y: Y position on map
+        :param random.Random rng: Stream to choose the item from
         :return Entity: Item to be placed in dungeon
         """
-        if not any([entity for entity in entities if entity.x == x and entity.y == y]):
+        if not entities.tile_index.at(x, y):
             return ItemFactory.get_item_by_name(item_dict,
-                                                random_choice_from_dict(item_chances),
+                                                random_choice_from_dict(item_chances, rng),
                                                 x, y)
 
     @staticmethod
@@ -76,7 +77,7 @@ class ItemFactory:
                                   targeting_message=targeting_message,
                                   damage=damage,
                                   radius=radius,
-                                  range=effect_range)
+                                  maximum_range=effect_range)
         if item_choice.get('equippable'):
             slot = ItemFactory.slots.get(item_choice['equippable_parameters'].get('slot'))
             power_bonus = item_choice['equippable_parameters'].get('power_bonus')
@@ -143,7 +144,7 @@ class ItemFactory:
                                   targeting_message=targeting_message,
                                   damage=damage,
                                   radius=radius,
-                                  range=effect_range)
+                                  maximum_range=effect_range)
         if is_equippable:
             slot = ItemFactory.slots.get(equippable_parameters.get('slot'))
             power_bonus = equippable_parameters.get('power_bonus')
@@ -1,6 +1,3 @@
-from random import randint
-
-
 class Room:
     """
     Rectangles used to define Rooms on the map
@@ -30,22 +27,22 @@ class Room:
         return (self.x1 <= other.x2 and self.x2 >= other.x1 and
                 self.y1 <= other.y2 and self.y2 >= other.y1)
 
-    def random_point(self):
+    def random_point(self, rng):
         """
         Return a random point within the current rectangle
+        :param random.Random rng: Stream to draw from
         :return int, int: x-position, y-position within the rectangle
         """
-        x = randint(self.x1 + 1, self.x2 - 1)
-        y = randint(self.y1 + 1, self.y2 - 1)
+        x = rng.randint(self.x1 + 1, self.x2 - 1)
+        y = rng.randint(self.y1 + 1, self.y2 - 1)
         return x, y
 
     def monster_limit_reached(self, entities):
         """
         Check Room to see if it can support more monsters
-        :param dictionary entities:  Objects on the map
+        :param EntityList entities:  Objects on the map
         :return boolean: Number of Monsters in Room is at room Limit
         """
-        monster_count = sum([entity.count_value for entity in entities
-                             if self.x1 < entity.x < self.x2 and
-                             self.y1 < entity.y < self.y2])
+        monster_count = sum([entity.count_value for entity in
+                             entities.tile_index.in_rect(self.x1 + 1, self.y1 + 1, self.x2 - 1, self.y2 - 1)])
         return monster_count < self.monster_limit
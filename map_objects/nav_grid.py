@@ -0,0 +1,140 @@
+import numpy as np
+
+from backends import libtcod
+from backends.handles import handles
+from map_objects.flow_field import FlowField
+
+
+class NavGrid:
+    """
+    Walkability map shared by every pathing creature on a floor
+    Built once from the GameMap tiles, then patched one cell at a time when a tile changes or the
+    blocker layer of the floor's EntityIndex changes, rather than being rebuilt by every monster on
+    every turn.
+    """
+
+    def __init__(self, game_map, diagonal_cost=1.41):
+        """
+        Create the Navigation Grid for a Game Map
+        :param game_map.GameMap game_map: The map being navigated
+        :param float diagonal_cost: Cost of a diagonal step, 0.0 to prohibit diagonal moves
+        """
+        self.game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.entity_index = None
+        self.walkable = np.zeros((self.width, self.height), dtype=bool)
+        self._flow_field = None
+
+        self.map = handles.acquire_map(self.width, self.height)
+        self.refresh_region(0, 0, self.width - 1, self.height - 1)
+
+        # A single A* path shared by every caller; libtcod reads the map again on each compute
+        self.path = handles.acquire_path(self.map, diagonal_cost)
+
+    def refresh_tile(self, x, y):
+        """
+        Copy the state of one map tile into the Navigation Grid
+        :param int x:
+        :param int y:
+        """
+        block_move = self.game_map.block_move[x, y]
+        if self.walkable[x, y] == block_move:
+            self.walkable[x, y] = not block_move
+            self._flow_field = None
+
+        walkable = not block_move and not self.is_occupied(x, y)
+        libtcod.map_set_properties(self.map, x, y, not self.game_map.block_sight[x, y], walkable)
+
+    def refresh_region(self, x1, y1, x2, y2):
+        """
+        Copy the state of a rectangle of map tiles into the Navigation Grid
+        :param int x1: Left edge (inclusive)
+        :param int y1: Top edge (inclusive)
+        :param int x2: Right edge (inclusive)
+        :param int y2: Bottom edge (inclusive)
+        """
+        for y in range(y1, y2 + 1):
+            for x in range(x1, x2 + 1):
+                self.refresh_tile(x, y)
+
+    def bind(self, entities):
+        """
+        Follow the blocker layer of a floor's entities, patching cells as blockers come and go
+        :param EntityList entities: List of things and creatures on the map
+        """
+        index = entities.tile_index
+        if index is self.entity_index:
+            return
+
+        stale = set()
+        if self.entity_index is not None:
+            self.entity_index.blocker_listeners.remove(self.refresh_tile)
+            stale = set(self.entity_index.blockers)
+
+        self.entity_index = index
+        index.blocker_listeners.append(self.refresh_tile)
+        for x, y in stale | set(index.blockers):
+            self.refresh_tile(x, y)
+
+    def next_step(self, origin, target, max_length=25):
+        """
+        Find the first step along the shortest path between two entities
+        The cells of the origin and target are treated as open even though they hold blockers.
+        :param Entity origin: The creature that wants to move
+        :param Entity target: The thing or creature to move towards
+        :param int max_length: Paths this long or longer are rejected
+        :return tuple: (x, y) of the next step, or None if there is no usable path
+        """
+        opened = [cell for cell in {(origin.x, origin.y), (target.x, target.y)} if self.is_occupied(*cell)]
+        for x, y in opened:
+            libtcod.map_set_properties(self.map, x, y, not self.game_map.block_sight[x, y],
+                                       not self.game_map.block_move[x, y])
+
+        libtcod.path_compute(self.path, origin.x, origin.y, target.x, target.y)
+
+        step = None
+        if not libtcod.path_is_empty(self.path) and libtcod.path_size(self.path) < max_length:
+            x, y = libtcod.path_walk(self.path, True)
+            if x or y:
+                step = (x, y)
+
+        for x, y in opened:
+            self.refresh_tile(x, y)
+
+        return step
+
+    def flow_field(self, goal_x, goal_y, max_distance=25):
+        """
+        Distance map towards a goal over the map terrain, reused until the goal moves or a tile changes
+        Blocking entities are not part of the field; callers check occupancy as they step.
+        :param int goal_x: Coordinate of the goal
+        :param int goal_y: Coordinate of the goal
+        :param int max_distance: Number of steps to flood outwards from the goal
+        :return FlowField:
+        """
+        field = self._flow_field
+        if field is None or (field.goal_x, field.goal_y, field.max_distance) != (goal_x, goal_y, max_distance):
+            field = FlowField(self.walkable, goal_x, goal_y, max_distance)
+            self._flow_field = field
+        return field
+
+    def is_occupied(self, x, y):
+        """
+        :param int x:
+        :param int y:
+        :return boolean: True if a blocking entity stands on this cell
+        """
+        return self.entity_index is not None and self.entity_index.blocking_at(x, y) is not None
+
+    def delete(self):
+        """
+        Return the native map and path held by this grid to the handle pool
+        """
+        if self.entity_index is not None:
+            self.entity_index.blocker_listeners.remove(self.refresh_tile)
+            self.entity_index = None
+        handles.release(self.path)
+        handles.release(self.map)
+        self.path = None
+        self.map = None
@@ -1,4 +1,4 @@
-import libtcodpy as libtcod
+from backends import libtcod
 from components.spawner import MonsterSpawner
 from map_objects.entity import Entity
 from random_utils import random_choice_from_dict
@@ -7,20 +7,21 @@ from render_functions import RenderOrder
 
 class SpawnerFactory:
     @staticmethod
-    def get_monster_spawner(monster_dict, monster_chances, entities, x, y, room):
+    def get_monster_spawner(monster_dict, monster_chances, entities, x, y, room, rng):
         """
         Randomly Select a Monster from the available monsters, and set it in the map
         :param dictionary monster_dict: dictionary of all available pre-defined monsters
         :param dictionary monster_chances: Monster-generation probabilities for the current level
-        :param list entities: Items and Monsters already on the Map.
+        :param EntityList entities: Items and Monsters already on the Map.
         :param Room room: room
         :param int x: X position on map
         :param int y: Y position on map
+        :param random.Random rng: Stream to choose the monster from
         :return Entity: Monster to be placed in dungeon
         """
-        if not any([entity for entity in entities if entity.x == x and entity.y == y]):
+        if not entities.tile_index.at(x, y):
             return SpawnerFactory.get_monster_spawner_by_name(monster_dict,
-                                                              random_choice_from_dict(monster_chances),
+                                                              random_choice_from_dict(monster_chances, rng),
                                                               x, y, room)
 
     @staticmethod
@@ -1,21 +1,82 @@
 class Tile:
     """
     A Tile on a map.  It may or may not block movement and may or may not block line of sight
+    Tiles are views onto the GameMap tile arrays; changes made through them are written straight back
+    to the map.
     """
-    def __init__(self, block_move=False, block_sight=None):
-        self.block_move = block_move
+    __slots__ = ('game_map', 'x', 'y', 'saved')
 
-        if block_sight is None:
-            self.block_sight = block_move
-        else:
-            self.block_sight = block_sight
+    def __init__(self, game_map, x, y):
+        self.game_map = game_map
+        self.x = x
+        self.y = y
 
-        self.explored = False
+    def __setstate__(self, state):
+        # Saves made before the tile arrays pickled every Tile with its own block_move, block_sight and
+        # explored; GameMap.__setstate__ copies them into its arrays
+        self.game_map = None
+        self.saved = state
+
+    @property
+    def block_move(self):
+        return bool(self.game_map.block_move[self.x, self.y])
+
+    @block_move.setter
+    def block_move(self, state):
+        self.game_map.block_move[self.x, self.y] = state
+        self.game_map.tiles_changed(self.x, self.y, self.x, self.y)
+
+    @property
+    def block_sight(self):
+        return bool(self.game_map.block_sight[self.x, self.y])
+
+    @block_sight.setter
+    def block_sight(self, state):
+        self.game_map.block_sight[self.x, self.y] = state
+        self.game_map.tiles_changed(self.x, self.y, self.x, self.y)
+
+    @property
+    def explored(self):
+        return bool(self.game_map.explored[self.x, self.y])
+
+    @explored.setter
+    def explored(self, state):
+        self.game_map.explored[self.x, self.y] = state
 
     def block(self, state=True):
         """
         Set the blocking (movement and sight) state of this tile
         :param boolean state: The desired blocking state
         """
-        self.block_sight = state
-        self.block_move = state
+        self.game_map.set_blocked(self.x, self.y, self.x, self.y, state)
+
+
+class TileGrid:
+    """
+    Compatibility view that lets GameMap.tiles[x][y] address the map's tile arrays
+    """
+
+    def __init__(self, game_map):
+        self.game_map = game_map
+
+    def __len__(self):
+        return self.game_map.width
+
+    def __getitem__(self, x):
+        return TileColumn(self.game_map, x)
+
+
+class TileColumn:
+    """
+    A single column of a TileGrid
+    """
+
+    def __init__(self, game_map, x):
+        self.game_map = game_map
+        self.x = x
+
+    def __len__(self):
+        return self.game_map.height
+
+    def __getitem__(self, y):
+        return Tile(self.game_map, self.x, y)
@@ -1,4 +1,74 @@
-import libtcodpy as libtcod
+from collections import OrderedDict
+
+from backends import libtcod
+from backends.handles import handles
+from timing import instruments
+
+
+class MenuCache:
+    """
+    Menu windows drawn on off-screen consoles, kept for as long as they may be shown again
+    A window is keyed on everything drawn in it, so while a menu stays open and unchanged it is blitted
+    straight from its console.  Beyond max_size windows, the least recently shown is given back to the
+    handle pool.
+    """
+
+    def __init__(self, max_size=8):
+        """
+        :param int max_size: Number of windows to keep
+        """
+        self.max_size = max_size
+        self.windows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        :param tuple key: Everything drawn in the window
+        :return: The window's console, or None if it has to be drawn
+        """
+        window = self.windows.get(key)
+        if window is None:
+            self.misses += 1
+            instruments.count('menu_redraws')
+            return None
+
+        self.windows.move_to_end(key)
+        self.hits += 1
+        return window
+
+    def put(self, key, width, height):
+        """
+        Borrow a console to draw a window on, and keep it under a key
+        :return: A blank console of the window's size
+        """
+        window = self.windows[key] = handles.acquire_console(width, height)
+        while len(self.windows) > self.max_size:
+            handles.release(self.windows.popitem(last=False)[1])
+
+        return window
+
+    def clear(self):
+        """
+        Give every window back to the handle pool
+        """
+        while self.windows:
+            handles.release(self.windows.popitem()[1])
+
+    def stats(self):
+        """
+        :return dict: hits, misses, hit_rate and size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.windows)
+        }
+
+
+menu_cache = MenuCache()
 
 
 def menu(con, header, options, width, screen_width, screen_height):
@@ -14,25 +84,31 @@ def menu(con, header, options, width, screen_width, screen_height):
     if len(options) > 26:
         raise ValueError('Cannot have a menu with more than 26 options.')
 
-    # calculate total height for the header (after auto-wrap) and one line per option
-    header_height = libtcod.console_get_height_rect(con, 0, 0, width, screen_height, header)
-    height = len(options) + header_height
-
-    # create an off-screen console that represents the menu's window
-    window = libtcod.console_new(width, height)
-
-    # print the header with auto-wrap
-    libtcod.console_set_default_foreground(window, libtcod.white)
-    libtcod.console_print_rect_ex(window, 0, 0, width, height, libtcod.BKGND_NONE, libtcod.LEFT, header)
-
-    # print all the options
-    y = header_height
-    letter_index = ord('a')
-    for option_text in options:
-        text = '(' + chr(letter_index) + ')' + option_text
-        libtcod.console_print_ex(window, 0, y, libtcod.BKGND_NONE, libtcod.LEFT, text)
-        y += 1
-        letter_index += 1
+    # reuse the menu's window if it was last drawn with the same contents
+    key = ('menu', header, tuple(options), width, screen_height)
+    window = menu_cache.get(key)
+    if window is None:
+        # calculate total height for the header (after auto-wrap) and one line per option
+        header_height = libtcod.console_get_height_rect(con, 0, 0, width, screen_height, header)
+        height = len(options) + header_height
+
+        # an off-screen console that represents the menu's window
+        window = menu_cache.put(key, width, height)
+
+        # print the header with auto-wrap
+        libtcod.console_set_default_foreground(window, libtcod.white)
+        libtcod.console_print_rect_ex(window, 0, 0, width, height, libtcod.BKGND_NONE, libtcod.LEFT, header)
+
+        # print all the options
+        y = header_height
+        letter_index = ord('a')
+        for option_text in options:
+            text = '(' + chr(letter_index) + ')' + option_text
+            libtcod.console_print_ex(window, 0, y, libtcod.BKGND_NONE, libtcod.LEFT, text)
+            y += 1
+            letter_index += 1
+    else:
+        height = libtcod.console_get_height(window)
 
     # blit the contents of the "window" to the root console
     x = int(screen_width / 2 - width / 2)
@@ -133,25 +209,29 @@ def character_screen(player, character_screen_width, character_screen_height, sc
     :param int screen_width: Screen size
     :param int screen_height: Screen size
     """
-    window = libtcod.console_new(character_screen_width, character_screen_height)
-
-    libtcod.console_set_default_foreground(window, libtcod.white)
-
-    libtcod.console_print_rect_ex(window, 0, 1, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Character Information')
-    libtcod.console_print_rect_ex(window, 0, 2, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Level: {0}'.format(player.level.current_level))
-    libtcod.console_print_rect_ex(window, 0, 3, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Experience: {0}'.format(player.level.current_xp))
-    libtcod.console_print_rect_ex(window, 0, 4, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT,
-                                  'Experience to Level: {0}'.format(player.level.experience_to_next_level))
-    libtcod.console_print_rect_ex(window, 0, 6, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Maximum HP: {0}'.format(player.fighter.max_hp))
-    libtcod.console_print_rect_ex(window, 0, 7, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Attack: {0}'.format(player.fighter.power))
-    libtcod.console_print_rect_ex(window, 0, 8, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
-                                  libtcod.LEFT, 'Defense: {0}'.format(player.fighter.defense))
+    key = ('character', player.level.current_level, player.level.current_xp,
+           player.level.experience_to_next_level, player.fighter.max_hp, player.fighter.power,
+           player.fighter.defense, character_screen_width, character_screen_height)
+    window = menu_cache.get(key)
+    if window is None:
+        window = menu_cache.put(key, character_screen_width, character_screen_height)
+        libtcod.console_set_default_foreground(window, libtcod.white)
+
+        libtcod.console_print_rect_ex(window, 0, 1, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Character Information')
+        libtcod.console_print_rect_ex(window, 0, 2, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Level: {0}'.format(player.level.current_level))
+        libtcod.console_print_rect_ex(window, 0, 3, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Experience: {0}'.format(player.level.current_xp))
+        libtcod.console_print_rect_ex(window, 0, 4, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT,
+                                      'Experience to Level: {0}'.format(player.level.experience_to_next_level))
+        libtcod.console_print_rect_ex(window, 0, 6, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Maximum HP: {0}'.format(player.fighter.max_hp))
+        libtcod.console_print_rect_ex(window, 0, 7, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Attack: {0}'.format(player.fighter.power))
+        libtcod.console_print_rect_ex(window, 0, 8, character_screen_width, character_screen_height, libtcod.BKGND_NONE,
+                                      libtcod.LEFT, 'Defense: {0}'.format(player.fighter.defense))
 
     x = screen_width // 2 - character_screen_width // 2
     y = screen_height // 2 - character_screen_height // 2
@@ -1,4 +1,65 @@
-from random import randint
+import random
+
+# The streams of a floor: its rooms and corridors, the monsters and spawners placed on it, the items placed
+# on it, monsters wandering, and spawners picking where to spawn
+STREAMS = ('mapgen', 'spawning', 'loot', 'ai', 'spawners')
+# The streams only drawn from while a floor is made
+GENERATION_STREAMS = ('mapgen', 'spawning', 'loot')
+
+
+class RandomStreams:
+    """
+    Seeded random number generators for one level of the dungeon, one per subsystem
+    Each stream is seeded from the game's seed, the level and the stream's name, so a game's seed reproduces
+    every floor and every turn, floors can be made in any order or in parallel, and no subsystem draws
+    numbers meant for another.  Streams are created on first use.
+    """
+
+    def __init__(self, seed, dungeon_level):
+        """
+        :param int seed: The game's seed
+        :param int dungeon_level:
+        """
+        self.seed = seed
+        self.dungeon_level = dungeon_level
+        self.streams = {}
+
+    def __getitem__(self, name):
+        """
+        :param str name: One of STREAMS
+        :return random.Random:
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            if name not in STREAMS:
+                raise KeyError('No random stream named {0}'.format(name))
+            stream = self.streams[name] = random.Random('{0}:{1}:{2}'.format(self.seed, self.dungeon_level, name))
+        return stream
+
+    def discard(self, *names):
+        """
+        Drop streams that will not be drawn from again, so they are not saved
+        :param str names: Names from STREAMS
+        """
+        for name in names:
+            self.streams.pop(name, None)
+
+    def getstate(self):
+        """
+        :return dict: The state of each stream used so far, as lists, so it can be saved as JSON
+        """
+        state = {}
+        for name, stream in self.streams.items():
+            version, internal, gauss = stream.getstate()
+            state[name] = [version, list(internal), gauss]
+        return state
+
+    def setstate(self, state):
+        """
+        :param dict state: As returned by getstate
+        """
+        for name, (version, internal, gauss) in state.items():
+            self[name].setstate((version, tuple(internal), gauss))
 
 
 def from_dungeon_level(table, dungeon_level):
@@ -8,8 +69,8 @@ def from_dungeon_level(table, dungeon_level):
     return 0
 
 
-def random_choice_index(chances):
-    random_chance = randint(1, sum(chances))
+def random_choice_index(chances, rng):
+    random_chance = rng.randint(1, sum(chances))
 
     running_sum = 0
     choice = 0
@@ -21,8 +82,8 @@ def random_choice_index(chances):
         choice += 1
 
 
-def random_choice_from_dict(choice_dict):
+def random_choice_from_dict(choice_dict, rng):
     choices = list(choice_dict.keys())
     chances = list(choice_dict.values())
 
-    return choices[random_choice_index(chances)]
+    return choices[random_choice_index(chances, rng)]
@@ -1,8 +1,12 @@
 from enum import Enum
 
-import libtcodpy as libtcod
+import numpy as np
+
+from backends import libtcod
+from camera import Camera
 from game_states import GameStates
 from menus import character_screen, inventory_menu, level_up_menu
+from timing import instruments
 
 DISABLE_FOG_OF_WAR = False
 
@@ -14,21 +18,46 @@ class RenderOrder(Enum):
     ACTOR = 4
 
 
-def get_names_under_mouse(mouse, entities, fov_map):
-    x = mouse.cx
-    y = mouse.cy
+class PanelCache:
+    """
+    What the panel console was last drawn from, so it is only drawn again once that changes
+    """
+
+    def __init__(self):
+        self.key = None
+        self.rebuilds = 0
+        self.reuses = 0
+
+    def is_current(self, key):
+        """
+        :param tuple key: Change stamps and values the panel is drawn from
+        :return boolean: True if the panel already shows them; otherwise they are remembered as drawn
+        """
+        if key == self.key:
+            self.reuses += 1
+            return True
 
-    names = [entity.name.capitalize() for entity in entities
-             if entity.x == x and entity.y == y and libtcod.map_is_in_fov(fov_map, entity.x, entity.y)]
+        self.key = key
+        self.rebuilds += 1
+        return False
+
+
+def get_names_under_mouse(mouse, entities, fov_map, camera):
+    x, y = camera.to_map(mouse.cx, mouse.cy)
+
+    entities_under_mouse = entities.tile_index.at(x, y)
+    if not entities_under_mouse or not fov_map.is_in_fov(x, y):
+        return ''
+
+    names = [entity.name.capitalize() for entity in entities_under_mouse]
     names = ', '.join(names)
 
     return names
 
 
 def get_names_at_position(player, entities):
-    names = [entity.name.capitalize() for entity in entities
-             if entity.x == player.x and entity.y == player.y
-             and entity is not player]
+    names = [entity.name.capitalize() for entity in entities.tile_index.at(player.x, player.y)
+             if entity is not player]
     names = ', '.join(names)
 
     return names
@@ -50,11 +79,12 @@ def render_bar(panel, x, y, total_width, name, value, maximum, bar_color, back_c
 
 
 # noinspection PyShadowingNames
+@instruments.timed('render_all')
 def render_all(con, panel, entities, player,
                game_map, fov_map, fov_recompute,
                message_log, screen_width, screen_height,
                bar_width, panel_height, panel_y,
-               mouse, colors, game_state):
+               mouse, colors, game_state, screen_buffer=None, panel_cache=None, camera=None):
     """
     Draws all entities in the list
     :param con: The console to draw on
@@ -73,42 +103,76 @@ def render_all(con, panel, entities, player,
     :param libtcod.mouse mouse:
     :param colors: Dictionary of Colors for use with game_map
     :param game_state: Current GameState
+    :param ScreenBuffer screen_buffer: Previous frame of the map area, so only changed cells are written; without
+        one the whole map is drawn on con and blitted
+    :param PanelCache panel_cache: What the panel was last drawn from, so it is only redrawn on a change; without
+        one it is redrawn every frame
+    :param Camera camera: The part of the map drawn above the panel; without one the map is drawn from its top
+        left corner.  fov_recompute must be set whenever it has moved.
     """
-    # Draw all the tiles in the game map
-    if fov_recompute:
-        for y in range(game_map.height):
-            for x in range(game_map.width):
-                visible = libtcod.map_is_in_fov(fov_map, x, y)
-                wall = game_map.tiles[x][y].block_sight
-
-                if visible or DISABLE_FOG_OF_WAR:
-                    if wall:
-                        libtcod.console_set_char_background(con, x, y,
-                                                            colors.get('light_wall'),
-                                                            libtcod.BKGND_SET)
-                    else:
-                        libtcod.console_set_char_background(con, x, y,
-                                                            colors.get('light_ground'),
-                                                            libtcod.BKGND_SET)
-                    game_map.tiles[x][y].explored = True
-
-                elif game_map.tiles[x][y].explored:
-                    if wall:
-                        libtcod.console_set_char_background(con, x, y,
-                                                            colors.get('dark_wall'),
-                                                            libtcod.BKGND_SET)
-                    else:
-                        libtcod.console_set_char_background(con, x, y,
-                                                            colors.get('dark_ground'),
-                                                            libtcod.BKGND_SET)
-
-    # Draw entities in the list
-    entities_in_render_order = sorted(entities, key=lambda x: x.render_order.value)
-    for entity in entities_in_render_order:
-        draw_entity(con, entity, fov_map, game_map)
-
-    libtcod.console_blit(con, 0, 0, screen_width, screen_height, 0, 0, 0)
+    if camera is None:
+        camera = Camera(screen_width, panel_y)
+
+    if screen_buffer is not None:
+        render_map_changes(screen_buffer, con, entities, game_map, fov_map, fov_recompute, colors, camera)
+    else:
+        # Draw the tiles in view as a single background fill
+        if fov_recompute:
+            background = get_map_background(game_map, get_visible(game_map, fov_map), colors, screen_width,
+                                            screen_height, camera)
+            libtcod.console_fill_background(con, background[..., 0].ravel(), background[..., 1].ravel(),
+                                            background[..., 2].ravel())
+
+        # Draw entities in view
+        in_view = entities_in_view(entities, game_map, camera)
+        for entity in in_view:
+            draw_entity(con, entity, fov_map, game_map, camera)
+
+        libtcod.console_blit(con, 0, 0, screen_width, screen_height, 0, 0, 0)
+        # The tiles are only redrawn when the view changes, so glyphs are erased once shown
+        clear_all(con, in_view, camera)
+
+    names = (get_names_under_mouse(mouse, entities, fov_map, camera), get_names_at_position(player, entities))
+    panel_key = (message_log.version, player.fighter.version, player.fighter.max_hp, game_map.version,
+                 game_map.dungeon_level, player.treasure_value, names)
+    if panel_cache is None or instruments.overlay or not panel_cache.is_current(panel_key):
+        instruments.count('panel_redraws')
+        render_panel(panel, message_log, player, game_map, names, bar_width)
+
+        if instruments.overlay:
+            render_phase_overlay(panel, screen_width, instruments.phases.rolling_ms())
+
+    libtcod.console_blit(panel, 0, 0, screen_width, panel_height, 0, 0, panel_y)
+
+    # Draw Inventory Menu
+    if game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
+        if game_state == GameStates.SHOW_INVENTORY:
+            inventory_title = 'Press the key next to an item to use it, or Esc to cancel.\n'
+        else:
+            inventory_title = 'Press the key next to an item to drop it, or Esc to cancel.\n'
 
+        inventory_menu(con, inventory_title, player, 50, screen_width, screen_height)
+    elif game_state == GameStates.LEVEL_UP:
+        level_up_menu(con, 'Level Up!  Choose a stat to raise:', player, 40, screen_width, screen_height)
+    elif game_state == GameStates.CHARACTER_SCREEN:
+        character_screen(player, 30, 10, screen_width, screen_height)
+
+    # Menus are drawn over the map straight onto the root console
+    if screen_buffer is not None and game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY,
+                                                    GameStates.LEVEL_UP, GameStates.CHARACTER_SCREEN):
+        screen_buffer.invalidate()
+
+
+def render_panel(panel, message_log, player, game_map, names, bar_width):
+    """
+    Draw the message log and the player's status on the panel
+    :param panel: information panel
+    :param MessageLog message_log:
+    :param Entity player: The player entity
+    :param game_map: The map the player is on
+    :param tuple names: Names under the mouse and at the player's position
+    :param bar_width:
+    """
     # Clear Player Status and Message Log
     libtcod.console_set_default_background(panel, libtcod.black)
     libtcod.console_clear(panel)
@@ -129,55 +193,134 @@ def render_all(con, panel, entities, player,
                              'Treasure: {0}'.format(player.treasure_value))
 
     libtcod.console_set_default_foreground(panel, libtcod.light_gray)
-    libtcod.console_print_ex(panel, 1, 0, libtcod.BKGND_NONE, libtcod.LEFT,
-                             get_names_under_mouse(mouse, entities, fov_map))
-    libtcod.console_print_ex(panel, 1, 0, libtcod.BKGND_NONE, libtcod.LEFT,
-                             get_names_at_position(player, entities))
+    for name in names:
+        libtcod.console_print_ex(panel, 1, 0, libtcod.BKGND_NONE, libtcod.LEFT, name)
 
-    libtcod.console_blit(panel, 0, 0, screen_width, panel_height, 0, 0, panel_y)
 
-    # Draw Inventory Menu
-    if game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
-        if game_state == GameStates.SHOW_INVENTORY:
-            inventory_title = 'Press the key next to an item to use it, or Esc to cancel.\n'
-        else:
-            inventory_title = 'Press the key next to an item to drop it, or Esc to cancel.\n'
+def render_map_changes(screen_buffer, con, entities, game_map, fov_map, fov_recompute, colors, camera):
+    """
+    Compose the map and the entities on it into a ScreenBuffer and write the cells that changed to the root console
+    :param ScreenBuffer screen_buffer: The map area as last written
+    :param con: Off-screen console used when most of the map has changed
+    :param entities: List of Entity objects
+    :param game_map: The map of Tiles to draw
+    :param fov_map: The map holding Field of View information
+    :param fov_recompute: Whether the Field of View, and so the map background, may have changed
+    :param colors: Dictionary of Colors for use with game_map
+    :param Camera camera: The part of the map to draw
+    """
+    if fov_recompute:
+        screen_buffer.set_background(get_map_background(game_map, get_visible(game_map, fov_map), colors,
+                                                        screen_buffer.width, screen_buffer.height, camera))
 
-        inventory_menu(con, inventory_title, player, 50, screen_width, screen_height)
-    elif game_state == GameStates.LEVEL_UP:
-        level_up_menu(con, 'Level Up!  Choose a stat to raise:', player, 40, screen_width, screen_height)
-    elif game_state == GameStates.CHARACTER_SCREEN:
-        character_screen(player, 30, 10, screen_width, screen_height)
+    screen_buffer.clear_entities()
+    for entity in entities_in_view(entities, game_map, camera):
+        if DISABLE_FOG_OF_WAR or fov_map.is_in_fov(entity.x, entity.y) or (
+                entity.stairs and game_map.explored[entity.x, entity.y]):
+            screen_buffer.put(*camera.to_screen(entity.x, entity.y), entity.char, entity.color)
+
+    screen_buffer.present(con)
+
+
+def entities_in_view(entities, game_map, camera):
+    """
+    :return list: The entities within the camera's window, in render order
+    """
+    in_view = entities.tile_index.in_rect(*camera.bounds(game_map.width, game_map.height))
+
+    return sorted(in_view, key=lambda x: x.render_order.value)
+
+
+def get_visible(game_map, fov_map):
+    """
+    Tiles to draw lit, marking them explored
+    :return numpy.ndarray: Boolean array indexed [x, y]
+    """
+    if DISABLE_FOG_OF_WAR:
+        visible = np.ones((game_map.width, game_map.height), dtype=bool, order='F')
+        game_map.explored |= visible
+    else:
+        visible = fov_map.visible
+        fov_map.mark_explored()
+
+    return visible
+
+
+def render_phase_overlay(panel, width, phase_ms):
+    """
+    Show rolling per-phase milliseconds in the right-hand corner of the panel
+    :param panel: information panel
+    :param int width: width (in chars) of the panel
+    :param dict phase_ms: Mean milliseconds per frame of each phase
+    """
+    x = width - 18
+    libtcod.console_set_default_foreground(panel, libtcod.light_green)
+    libtcod.console_print_ex(panel, x, 0, libtcod.BKGND_SET, libtcod.LEFT,
+                             '{0:<11}{1:>6.2f}'.format('frame ms', sum(phase_ms.values())))
+    for y, phase in enumerate(sorted(phase_ms), 1):
+        libtcod.console_print_ex(panel, x, y, libtcod.BKGND_SET, libtcod.LEFT,
+                                 '{0:<11}{1:>6.2f}'.format(phase[:11], phase_ms[phase]))
+
+
+def get_map_background(game_map, visible, colors, width, height, camera):
+    """
+    Compose the background colour of every console cell from the tile arrays in the camera's window
+    :param game_map: The map of Tiles to draw
+    :param numpy.ndarray visible: Boolean array indexed [x, y] of tiles in the Field of View
+    :param colors: Dictionary of Colors for use with game_map
+    :param int width: Width (in chars) of the console
+    :param int height: Height (in chars) of the console
+    :param Camera camera: The part of the map to draw
+    :return numpy.ndarray: RGB array indexed [y, x], black where nothing has been explored
+    """
+    background = np.zeros((height, width, 3), dtype=np.int32)
+
+    x1, y1, x2, y2 = camera.bounds(game_map.width, game_map.height)
+    x2, y2 = min(x2 + 1, x1 + width), min(y2 + 1, y1 + height)
+    map_width, map_height = x2 - x1, y2 - y1
+    wall = game_map.block_sight[x1:x2, y1:y2].T[..., np.newaxis]
+    lit = visible[x1:x2, y1:y2].T[..., np.newaxis]
+    explored = game_map.explored[x1:x2, y1:y2].T[..., np.newaxis]
+
+    background[:map_height, :map_width] = np.select(
+        [lit & wall, lit, explored & wall, explored],
+        [tuple(colors.get('light_wall')), tuple(colors.get('light_ground')),
+         tuple(colors.get('dark_wall')), tuple(colors.get('dark_ground'))])
+
+    return background
 
 
-def clear_all(con, entities):
+def clear_all(con, entities, camera):
     """
     Erases, from screen, all entities in the list
     :param con: The console to draw on
     :param entities: List of Entity objects
+    :param Camera camera: The part of the map drawn on con
     """
     for entity in entities:
-        clear_entity(con, entity)
+        clear_entity(con, entity, camera)
 
 
-def draw_entity(con, entity, fov_map, game_map):
+def draw_entity(con, entity, fov_map, game_map, camera):
     """
     Draw the character that represents this object
     :param con: The console to draw on
     :param entity: Entity object to clear
     :param fov_map: The map holding Field of View information
     :param game_map: The map holding game tiles
+    :param Camera camera: The part of the map drawn on con
     """
-    if DISABLE_FOG_OF_WAR or libtcod.map_is_in_fov(fov_map, entity.x, entity.y) or (
-            entity.stairs and game_map.tiles[entity.x][entity.y].explored):
+    if DISABLE_FOG_OF_WAR or fov_map.is_in_fov(entity.x, entity.y) or (
+            entity.stairs and game_map.explored[entity.x, entity.y]):
         libtcod.console_set_default_foreground(con, entity.color)
-        libtcod.console_put_char(con, entity.x, entity.y, entity.char, libtcod.BKGND_NONE)
+        libtcod.console_put_char(con, *camera.to_screen(entity.x, entity.y), entity.char, libtcod.BKGND_NONE)
 
 
-def clear_entity(con, entity):
+def clear_entity(con, entity, camera):
     """
     Erase, from the screen, an object representation
     :param con: The console to draw on
     :param entity: Entity object to clear
+    :param Camera camera: The part of the map drawn on con
     """
-    libtcod.console_put_char(con, entity.x, entity.y, ' ', libtcod.BKGND_NONE)
+    libtcod.console_put_char(con, *camera.to_screen(entity.x, entity.y), ' ', libtcod.BKGND_NONE)
@@ -0,0 +1,150 @@
+import numpy as np
+
+from backends import libtcod
+from timing import instruments
+
+# Share of the cells changing in a frame above which the whole area is written in one go
+FULL_WRITE_SHARE = 0.5
+
+
+class ScreenBuffer:
+    """
+    Double-buffered characters, foreground and background colours for an area at the top left of the root console
+    A frame is composed into the back buffers, compared with the frame last written, and only the cells
+    that differ are written to the root console.  Unless the background was replaced, only the cells
+    entities were drawn in this frame or the last are compared.  Arrays are indexed [y, x].
+    """
+
+    def __init__(self, width, height):
+        """
+        :param int width: Width of the area in cells
+        :param int height: Height of the area in cells
+        """
+        self.width = width
+        self.height = height
+
+        self.char = np.full((height, width), ord(' '), dtype=np.int32)
+        self.fg = np.full((height, width, 3), 255, dtype=np.uint8)
+        self.bg = np.zeros((height, width, 3), dtype=np.uint8)
+
+        self.shown_char = np.empty_like(self.char)
+        self.shown_fg = np.empty_like(self.fg)
+        self.shown_bg = np.empty_like(self.bg)
+        self.compare_all = True
+        self.invalidate()
+
+        # Cells entities are drawn in, and cells they were drawn in last frame
+        self.entity_cells = []
+        self.dirty = []
+
+        self.frames = 0
+        self.cells_written = 0
+        self.full_writes = 0
+        self.last_cells_written = 0
+
+    def invalidate(self):
+        """
+        Forget what the root console holds, so the next frame is written in full
+        Needed once anything else has drawn over the area, such as a menu.
+        """
+        self.shown_char.fill(-1)
+        self.compare_all = True
+
+    def set_background(self, background):
+        """
+        :param numpy.ndarray background: RGB array of the area indexed [y, x]
+        """
+        self.bg[...] = background
+        self.compare_all = True
+
+    def clear_entities(self):
+        """
+        Blank the cells entities were drawn in, leaving their background
+        """
+        for x, y in self.entity_cells:
+            self.char[y, x] = ord(' ')
+        self.dirty.extend(self.entity_cells)
+        self.entity_cells = []
+
+    def put(self, x, y, char, color):
+        """
+        Draw a character over the background of a cell
+        :param int x:
+        :param int y:
+        :param str char:
+        :param libtcod.Color color: Foreground colour
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.char[y, x] = ord(char) if isinstance(char, str) else char
+            self.fg[y, x] = (color.r, color.g, color.b)
+            self.entity_cells.append((x, y))
+
+    @instruments.timed('ScreenBuffer.present')
+    def present(self, con):
+        """
+        Write the cells that changed since the last frame to the root console
+        When most of the area changed it is filled into con and blitted instead.
+        :param con: Off-screen console at least as large as the area
+        :return int: Number of cells written
+        """
+        if self.compare_all:
+            changed = ((self.char != self.shown_char) | (self.fg != self.shown_fg).any(axis=2) |
+                       (self.bg != self.shown_bg).any(axis=2))
+            ys, xs = np.nonzero(changed)
+        else:
+            cells = set(self.dirty)
+            cells.update(self.entity_cells)
+            cells = [(x, y) for x, y in cells if self.char[y, x] != self.shown_char[y, x] or
+                     (self.fg[y, x] != self.shown_fg[y, x]).any()]
+            xs = np.array([x for x, y in cells], dtype=np.intp)
+            ys = np.array([y for x, y in cells], dtype=np.intp)
+        count = len(xs)
+
+        if count > FULL_WRITE_SHARE * self.width * self.height:
+            self.write_all(con)
+            count = self.width * self.height
+        else:
+            for x, y, char, fg, bg in zip(xs.tolist(), ys.tolist(), self.char[ys, xs].tolist(),
+                                          self.fg[ys, xs].tolist(), self.bg[ys, xs].tolist()):
+                libtcod.console_put_char_ex(0, x, y, char, libtcod.Color(*fg), libtcod.Color(*bg))
+
+        self.shown_char[ys, xs] = self.char[ys, xs]
+        self.shown_fg[ys, xs] = self.fg[ys, xs]
+        self.shown_bg[ys, xs] = self.bg[ys, xs]
+        self.compare_all = False
+        self.dirty = []
+
+        self.frames += 1
+        self.cells_written += count
+        self.last_cells_written = count
+        instruments.count('cells_written', count)
+        return count
+
+    def write_all(self, con):
+        width, height = libtcod.console_get_width(con), libtcod.console_get_height(con)
+
+        char = np.full((height, width), ord(' '), dtype=np.int32)
+        fg = np.zeros((height, width, 3), dtype=np.int32)
+        bg = np.zeros((height, width, 3), dtype=np.int32)
+        char[:self.height, :self.width] = self.char
+        fg[:self.height, :self.width] = self.fg
+        bg[:self.height, :self.width] = self.bg
+
+        libtcod.console_fill_char(con, char.ravel())
+        libtcod.console_fill_foreground(con, fg[..., 0].ravel(), fg[..., 1].ravel(), fg[..., 2].ravel())
+        libtcod.console_fill_background(con, bg[..., 0].ravel(), bg[..., 1].ravel(), bg[..., 2].ravel())
+        libtcod.console_blit(con, 0, 0, self.width, self.height, 0, 0, 0)
+
+        self.full_writes += 1
+
+    def stats(self):
+        """
+        :return dict: frames, cells_written, cells_per_frame, full_writes and last_cells_written
+        """
+        return {
+            'frames': self.frames,
+            'cells_written': self.cells_written,
+            'cells_per_frame': self.cells_written / self.frames if self.frames else 0.0,
+            'full_writes': self.full_writes,
+            'last_cells_written': self.last_cells_written
+        }
@@ -0,0 +1,183 @@
+"""
+Monte Carlo balance simulator
+Plays many seeded headless games with the scripted bot across a pool of worker processes, to show how
+the monster and item tables in settings/ play out: how deep games get, how long the player survives,
+what kills are made and which items get used.  Each worker loads the settings once; every finished
+game is folded into one report as it comes in.
+
+Run from the repository root:
+    python -m simulation.balance --games 1000 --workers 8 --seed 1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from backends import libtcod  # noqa: E402
+from engine import play_game  # noqa: E402
+from loader_functions.initialize_new_game import get_constants, get_game_variables  # noqa: E402
+from simulation.bot import BotController  # noqa: E402
+
+# Settings and consoles of a worker process, loaded once by init_worker
+worker = {}
+
+
+def init_worker(max_turns, floor_turn_limit):
+    """
+    Load the game settings and create the consoles a worker's games are played on
+    :param int max_turns: Player turns after which a game is stopped
+    :param int floor_turn_limit: Turns the bot spends on a floor before heading for the stairs regardless
+    """
+    constants = get_constants()
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'])
+
+    worker['constants'] = constants
+    worker['con'] = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    worker['panel'] = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+    worker['max_turns'] = max_turns
+    worker['floor_turn_limit'] = floor_turn_limit
+
+
+def play_one(seed):
+    """
+    Play one game in a worker process
+    :param int seed: The game's seed, which replays the game when set in settings/game.json
+    :return dict: seed, depth, turns, died, kills and items_used
+    """
+    constants = dict(worker['constants'], seed=seed)
+    player, entities, game_map, message_log, game_state = get_game_variables(constants)
+    bot = BotController(worker['max_turns'], worker['floor_turn_limit'])
+
+    play_game(player, entities, game_map, message_log, game_state, worker['con'], worker['panel'], constants,
+              controller=bot)
+
+    return {
+        'seed': seed,
+        'depth': game_map.dungeon_level,
+        'turns': bot.turns,
+        'died': bot.died,
+        'kills': bot.kills,
+        'items_used': bot.items_used
+    }
+
+
+class BalanceReport:
+    """
+    Running totals over finished games
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.deaths = 0
+        self.turns = 0
+        self.depths = {}
+        self.death_turns = []
+        self.kills = {}
+        self.items_used = {}
+
+    def add(self, result):
+        """
+        Fold one game's result into the totals
+        :param dict result: As returned by play_one
+        """
+        self.games += 1
+        self.turns += result['turns']
+        self.depths[result['depth']] = self.depths.get(result['depth'], 0) + 1
+        if result['died']:
+            self.deaths += 1
+            self.death_turns.append(result['turns'])
+
+        for name, count in result['kills'].items():
+            self.kills[name] = self.kills.get(name, 0) + count
+        for name, count in result['items_used'].items():
+            self.items_used[name] = self.items_used.get(name, 0) + count
+
+    def summary(self):
+        """
+        :return dict: The totals, with means per game
+        """
+        games = max(self.games, 1)
+        death_turns = sorted(self.death_turns)
+        return {
+            'games': self.games,
+            'deaths': self.deaths,
+            'death_rate': self.deaths / games,
+            'mean_depth': sum(depth * count for depth, count in self.depths.items()) / games,
+            'max_depth': max(self.depths) if self.depths else 0,
+            'depths': {str(depth): self.depths[depth] for depth in sorted(self.depths)},
+            'mean_turns': self.turns / games,
+            'median_turns_survived': death_turns[len(death_turns) // 2] if death_turns else None,
+            'kills': {name: {'total': count, 'per_game': count / games}
+                      for name, count in sorted(self.kills.items(), key=lambda item: -item[1])},
+            'items_used': {name: {'total': count, 'per_game': count / games}
+                           for name, count in sorted(self.items_used.items(), key=lambda item: -item[1])}
+        }
+
+    def format(self):
+        summary = self.summary()
+        lines = [
+            '{0} games, {1} deaths ({2:.1%}), mean depth {3:.2f}, max depth {4}'.format(
+                summary['games'], summary['deaths'], summary['death_rate'], summary['mean_depth'],
+                summary['max_depth']),
+            'mean turns {0:.0f}, median turns survived by those who died {1}'.format(
+                summary['mean_turns'], summary['median_turns_survived']),
+            '',
+            'depth reached'
+        ]
+        lines.extend('  {0:>3} {1:>7}'.format(depth, count) for depth, count in summary['depths'].items())
+
+        for title, table in (('kills by monster', summary['kills']), ('items used', summary['items_used'])):
+            lines.extend(['', '{0:<24} {1:>8} {2:>9}'.format(title, 'total', 'per game')])
+            lines.extend('  {0:<22} {1:>8} {2:>9.2f}'.format(name, entry['total'], entry['per_game'])
+                         for name, entry in table.items())
+
+        return '\n'.join(lines)
+
+
+def run(games, workers, seed, max_turns, floor_turn_limit):
+    """
+    Play seeded games on a process pool, gathering results as each game finishes
+    :param int games: Number of games, seeded seed to seed + games - 1
+    :param int workers: Worker processes
+    :return tuple: The BalanceReport and the elapsed seconds
+    """
+    report = BalanceReport()
+    progress_every = max(games // 10, 1)
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(max_turns, floor_turn_limit)) as pool:
+        for result in pool.imap_unordered(play_one, range(seed, seed + games)):
+            report.add(result)
+            if report.games % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print('{0:>6}/{1} games  {2:.1f} games/s  {3:.0f} turns/s'.format(
+                    report.games, games, report.games / elapsed, report.turns / elapsed), flush=True)
+
+    return report, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play many seeded headless games and report on game balance')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=1, help='seed of the first game; each game adds one')
+    parser.add_argument('--max-turns', type=int, default=3000, help='player turns after which a game is stopped')
+    parser.add_argument('--floor-turn-limit', type=int, default=200,
+                        help='turns spent on a floor before heading for the stairs regardless')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    report, elapsed = run(args.games, args.workers, args.seed, args.max_turns, args.floor_turn_limit)
+    print('\n{0:.1f} s on {1} workers\n'.format(elapsed, args.workers))
+    print(report.format())
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(dict(report.summary(), elapsed_s=elapsed, workers=args.workers), json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+from collections import deque
+
+from equipment_slots import EquipmentSlots
+from game_states import GameStates
+from item_functions import heal
+
+# Every step a creature can take, orthogonal steps first
+STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+class BotController:
+    """
+    Scripted player for headless games
+    Explores each floor, fights whatever it meets, picks up and uses items, then takes the stairs.  It
+    answers play_game with the same action dicts handle_keys and handle_mouse produce.
+    """
+
+    def __init__(self, max_turns, floor_turn_limit=500, heal_below=0.5):
+        """
+        :param int max_turns: Player turns to play before ending the game
+        :param int floor_turn_limit: Turns spent on a floor before heading for the stairs regardless
+        :param float heal_below: Fraction of maximum HP under which a healing item is used
+        """
+        self.max_turns = max_turns
+        self.floor_turn_limit = floor_turn_limit
+        self.heal_below = heal_below
+
+        self.turns = 0
+        self.floors = 0
+        self.died = False
+        self.pending = []
+        self.dungeon_level = None
+        self.floor_turns = 0
+        self.route = []
+        self.monsters = {}
+        self.carried = []
+        self.kills = {}
+        self.items_used = {}
+
+    def next_actions(self, game_state, player, entities, game_map, fov_map):
+        """
+        Decide what to do next
+        :return tuple: (action, mouse_action), or None once the game is over or the turn budget spent
+        """
+        if game_map.dungeon_level != self.dungeon_level:
+            if self.dungeon_level is not None:
+                self.floors += 1
+            self.dungeon_level = game_map.dungeon_level
+            self.floor_turns = 0
+            self.route = []
+            self.monsters = {}
+
+        self.observe(player, entities)
+
+        if game_state == GameStates.PLAYER_DEAD:
+            self.died = True
+            return None
+
+        if self.pending:
+            return self.pending.pop(0)
+
+        if game_state == GameStates.LEVEL_UP:
+            return {'level_up': 'hp'}, {}
+        elif game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY, GameStates.CHARACTER_SCREEN):
+            return {'exit': True}, {}
+        elif game_state == GameStates.TARGETING:
+            target = self.nearest_monster(player, entities, fov_map)
+            if target:
+                return {}, {'left_click': (target.x, target.y)}
+            return {}, {'right_click': (player.x, player.y)}
+        elif game_state != GameStates.PLAYERS_TURN:
+            return {}, {}
+
+        if self.turns >= self.max_turns:
+            return None
+
+        self.turns += 1
+        self.floor_turns += 1
+        return self.choose_action(player, entities, game_map, fov_map), {}
+
+    def observe(self, player, entities):
+        """
+        Count the monsters killed and the items used up since the last call
+        Monsters are remembered by name while they live, as a corpse takes a new one.  The bot never
+        drops anything, so an item that leaves the inventory has been used.
+        """
+        for entity in entities:
+            if entity.ai and entity.fighter and id(entity) not in self.monsters:
+                self.monsters[id(entity)] = (entity, entity.name)
+
+        for key, (entity, name) in list(self.monsters.items()):
+            if entity.fighter is None:
+                self.kills[name] = self.kills.get(name, 0) + 1
+                del self.monsters[key]
+
+        for item in self.carried:
+            if item not in player.inventory.items:
+                self.items_used[item.name] = self.items_used.get(item.name, 0) + 1
+        self.carried = list(player.inventory.items)
+
+    def choose_action(self, player, entities, game_map, fov_map):
+        """
+        :return dict: The action for a player turn
+        """
+        if player.fighter.hp < player.fighter.max_hp * self.heal_below:
+            index = self.find_item(player, lambda item: item.item.use_function is heal)
+            if index is not None:
+                return self.use_item(index)
+
+        monster = self.nearest_monster(player, entities, fov_map)
+        if monster:
+            dx, dy = monster.x - player.x, monster.y - player.y
+            if max(abs(dx), abs(dy)) == 1:
+                return {'move': (dx, dy)}
+
+            index = self.find_item(player, lambda item: item.item.use_function not in (None, heal))
+            if index is not None and player.distance_to(monster) <= 4:
+                return self.use_item(index)
+
+            step = self.step_towards(player, entities, game_map, {(monster.x, monster.y)})
+            if step:
+                return {'move': step}
+
+        index = self.find_item(player, lambda item: item.equippable and self.slot_free(player, item))
+        if index is not None:
+            return self.use_item(index)
+
+        can_carry = len(player.inventory.items) < player.inventory.capacity
+        if can_carry and any(entity.item for entity in entities.tile_index.at(player.x, player.y)):
+            return {'pickup': True}
+
+        if can_carry:
+            items = {(entity.x, entity.y) for entity in entities
+                     if entity.item and fov_map.is_in_fov(entity.x, entity.y)}
+            step = self.step_towards(player, entities, game_map, items)
+            if step:
+                return {'move': step}
+
+        # Only ever down; the stairs back up lead to floors already explored
+        stairs = [entity for entity in entities if entity.stairs and entity.stairs.floor > game_map.dungeon_level and
+                  game_map.explored[entity.x, entity.y]]
+        if stairs and self.floor_turns > self.floor_turn_limit:
+            return self.head_for_stairs(player, entities, game_map, stairs[0])
+
+        step = self.explore(player, entities, game_map)
+        if step:
+            return {'move': step}
+
+        if stairs:
+            return self.head_for_stairs(player, entities, game_map, stairs[0])
+
+        return {'wait': True}
+
+    def head_for_stairs(self, player, entities, game_map, stairs):
+        if (player.x, player.y) == (stairs.x, stairs.y):
+            return {'take_stairs': True}
+
+        step = self.step_towards(player, entities, game_map, {(stairs.x, stairs.y)})
+        if step:
+            return {'move': step}
+        return {'wait': True}
+
+    def explore(self, player, entities, game_map):
+        """
+        Follow a route towards the nearest unexplored floor, planning a new one when it is used up
+        :return tuple: (dx, dy) of the next step, or None once everything reachable has been seen
+        """
+        if self.route:
+            x, y = self.route[0]
+            if game_map.explored[self.route[-1]] or entities.tile_index.blocking_at(x, y):
+                self.route = []
+
+        if not self.route:
+            self.route = find_route(game_map, entities, (player.x, player.y),
+                                    lambda x, y: not game_map.explored[x, y])
+            if not self.route:
+                return None
+
+        x, y = self.route.pop(0)
+        return x - player.x, y - player.y
+
+    def step_towards(self, player, entities, game_map, goals):
+        """
+        :param set goals: Cells to head for
+        :return tuple: (dx, dy) of the first step of the shortest route to any goal, or None
+        """
+        if not goals:
+            return None
+
+        route = find_route(game_map, entities, (player.x, player.y), lambda x, y: (x, y) in goals)
+        if not route:
+            return None
+
+        self.route = []
+        x, y = route[0]
+        return x - player.x, y - player.y
+
+    def use_item(self, index):
+        """
+        Open the inventory, then choose an item on the next call
+        """
+        self.pending.append(({'inventory_index': index}, {}))
+        return {'show_inventory': True}
+
+    @staticmethod
+    def nearest_monster(player, entities, fov_map):
+        monsters = [entity for entity in entities
+                    if entity.ai and entity.fighter and fov_map.is_in_fov(entity.x, entity.y)]
+        if not monsters:
+            return None
+        return min(monsters, key=player.distance_to)
+
+    @staticmethod
+    def find_item(player, wanted):
+        """
+        :return int: Inventory index of the first item matching a test, or None
+        """
+        for index, item in enumerate(player.inventory.items):
+            if wanted(item):
+                return index
+        return None
+
+    @staticmethod
+    def slot_free(player, item):
+        """
+        :return boolean: True if nothing is equipped in the slot an equippable item goes in
+        """
+        if item.equippable.slot == EquipmentSlots.MAIN_HAND:
+            return player.equipment.main_hand is None
+        return player.equipment.off_hand is None
+
+
+def find_route(game_map, entities, start, is_goal):
+    """
+    Breadth-first search over open floor for the nearest cell passing a test
+    Cells holding a blocking entity are only entered when they are the goal.
+    :param GameMap game_map:
+    :param EntityList entities:
+    :param tuple start: (x, y) to search from
+    :param is_goal: Callable taking x and y
+    :return list: Cells from the first step up to the goal, empty if no goal is reachable
+    """
+    block_move = game_map.block_move
+    came_from = {start: None}
+    frontier = deque([start])
+
+    while frontier:
+        x, y = frontier.popleft()
+        if (x, y) != start and is_goal(x, y):
+            route = []
+            cell = (x, y)
+            while cell != start:
+                route.append(cell)
+                cell = came_from[cell]
+            route.reverse()
+            return route
+
+        for dx, dy in STEPS:
+            cell = (x + dx, y + dy)
+            if cell in came_from or not (0 <= cell[0] < game_map.width and 0 <= cell[1] < game_map.height):
+                continue
+            if block_move[cell]:
+                continue
+            if entities.tile_index.blocking_at(*cell) and not is_goal(*cell):
+                continue
+            came_from[cell] = (x, y)
+            frontier.append(cell)
+
+    return []
@@ -0,0 +1,115 @@
+"""
+Headless simulation driver
+Plays games with the scripted bot through the real game loop, without a window or any waiting on input,
+and reports how fast the loop runs: turns and floors per second, and where the time goes.  When the
+player dies a new game is started, until the turn budget is spent.
+
+Run from the repository root:
+    python -m simulation.driver --seed 1 --turns 5000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from backends import libtcod  # noqa: E402
+from backends.handles import handles  # noqa: E402
+from engine import play_game  # noqa: E402
+from loader_functions.initialize_new_game import get_constants, get_game_variables  # noqa: E402
+from simulation.bot import BotController  # noqa: E402
+from timing import instruments  # noqa: E402
+
+
+def simulate(turns, seed, floor_turn_limit=500):
+    """
+    Play games with the bot until the turn budget is spent
+    :param int turns: Player turns to play across every game
+    :param int seed: Seed for the random module
+    :param int floor_turn_limit: Turns the bot spends on a floor before heading for the stairs regardless
+    :return dict: turns, floors, games, deaths, deepest level, elapsed seconds, and the phases, timers and
+        counters recorded by the instruments
+    """
+    random.seed(seed)
+    constants = get_constants()
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], constants['window_title'])
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+
+    instruments.reset()
+    instruments.enable()
+    results = {'turns': 0, 'floors': 0, 'games': 0, 'deaths': 0, 'deepest_level': 1}
+
+    start = time.perf_counter()
+    while results['turns'] < turns:
+        player, entities, game_map, message_log, game_state = get_game_variables(constants)
+        bot = BotController(turns - results['turns'], floor_turn_limit)
+        play_game(player, entities, game_map, message_log, game_state, con, panel, constants, controller=bot)
+
+        results['games'] += 1
+        results['turns'] += bot.turns
+        results['floors'] += bot.floors
+        results['deaths'] += bot.died
+        results['deepest_level'] = max(results['deepest_level'], game_map.dungeon_level)
+        if bot.turns == 0:
+            break
+    results['elapsed_s'] = time.perf_counter() - start
+    results.update(instruments.report())
+
+    handles.close()
+    libtcod.console_delete(panel)
+    libtcod.console_delete(con)
+
+    return results
+
+
+def format_report(results):
+    elapsed = results['elapsed_s']
+    turns = max(results['turns'], 1)
+    lines = [
+        '{0} turns, {1} floors, {2} games, {3} deaths, deepest level {4}'.format(
+            results['turns'], results['floors'], results['games'], results['deaths'], results['deepest_level']),
+        '{0:.2f} s  {1:.1f} turns/s  {2:.3f} floors/s'.format(
+            elapsed, results['turns'] / elapsed, results['floors'] / elapsed),
+        '',
+        '{0:<12} {1:>10} {2:>10} {3:>8} {4:>7}'.format('phase', 'total ms', 'ms/turn', 'calls', 'share')
+    ]
+
+    total = sum(phase['total_s'] for phase in results['phases'].values()) or 1.0
+    for name, phase in sorted(results['phases'].items(), key=lambda item: -item[1]['total_s']):
+        lines.append('{0:<12} {1:>10.1f} {2:>10.3f} {3:>8} {4:>6.1f}%'.format(
+            name, 1000.0 * phase['total_s'], 1000.0 * phase['total_s'] / turns, phase['calls'],
+            100.0 * phase['total_s'] / total))
+
+    if results['timers']:
+        lines.extend(['', '{0:<24} {1:>10} {2:>10} {3:>8} {4:>9}'.format('timer', 'total ms', 'ms/turn', 'calls',
+                                                                      'ms/call')])
+        for name, timer in sorted(results['timers'].items(), key=lambda item: -item[1]['total_s']):
+            lines.append('{0:<24} {1:>10.1f} {2:>10.3f} {3:>8} {4:>9.4f}'.format(
+                name, 1000.0 * timer['total_s'], 1000.0 * timer['total_s'] / turns, timer['calls'],
+                timer['mean_ms']))
+
+    if results['counters']:
+        lines.extend([''] + ['{0:<24} {1:>10}'.format(name, value)
+                             for name, value in sorted(results['counters'].items())])
+
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play headless games with a scripted bot and time the game loop')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--turns', type=int, default=5000, help='player turns to play across every game')
+    parser.add_argument('--floor-turn-limit', type=int, default=500,
+                        help='turns spent on a floor before heading for the stairs regardless')
+    parser.add_argument('--export', help='also write the timings to this .json or .csv file')
+    args = parser.parse_args()
+
+    print(format_report(simulate(args.turns, args.seed, args.floor_turn_limit)))
+    if args.export:
+        instruments.export(args.export)
+
+
+if __name__ == '__main__':
+    main()
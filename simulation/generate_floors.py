@@ -0,0 +1,194 @@
+"""
+Batch dungeon generator
+Makes many seeded floors with GameMap.generate across a pool of worker processes, as the game would make
+them, and reports how long they took and what they hold: rooms, monsters, items and spawners, for each
+dungeon level asked for.  Floors can be written to a dungeon pack, for prebuilt seeded dungeons, or only
+measured, for checking a change to the generator against many maps.  Each worker loads the settings
+once, and makes and compresses its floors itself, so only finished floors pass between processes.
+A pack made with the game's own settings is played by naming it as dungeon_pack in settings/game.json.
+
+Run from the repository root:
+    python -m simulation.generate_floors --floors 100000 --levels 1 4 8 --workers 8 --seed 1 --pack floors.rlp
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+from benchmarks.arguments import parse_size  # noqa: E402
+from loader_functions.dungeon_pack import encode_floor, PackWriter  # noqa: E402
+from loader_functions.initialize_new_game import get_constants  # noqa: E402
+from map_objects.floor_prefetcher import floor_settings  # noqa: E402
+from map_objects.game_map import GameMap  # noqa: E402
+
+# Settings of a worker process, loaded once by init_worker
+worker = {}
+
+# Counts kept for every floor, by what the report calls them
+FLOOR_COUNTS = ('rooms', 'monsters', 'items', 'spawners', 'entities')
+
+
+def load_constants(width, height):
+    """
+    Load the game settings
+    :param int width: Map width, or None for the one in the settings
+    :param int height: Map height, or None for the one in the settings
+    :return dict: Game constants
+    """
+    constants = get_constants()
+    if width and height:
+        constants = dict(constants, map_width=width, map_height=height)
+    return constants
+
+
+def init_worker(width, height, encode):
+    """
+    Load the game settings
+    :param bool encode: Compress each floor for a dungeon pack
+    """
+    worker['constants'] = load_constants(width, height)
+    worker['encode'] = encode
+
+
+def generate_one(job):
+    """
+    Make one floor in a worker process
+    :param tuple job: The game's seed and the dungeon level
+    :return dict: seed, level, seconds taken to make it, the counts in FLOOR_COUNTS, the player's start, and
+        the floor encoded for a dungeon pack, or None
+    """
+    seed, dungeon_level = job
+
+    start = time.perf_counter()
+    game_map, entities, player_start, rooms = GameMap.generate(worker['constants'], dungeon_level, seed)
+    seconds = time.perf_counter() - start
+
+    return {
+        'seed': seed,
+        'level': dungeon_level,
+        'seconds': seconds,
+        'rooms': len(rooms),
+        'monsters': sum(1 for entity in entities if entity.ai),
+        'items': sum(1 for entity in entities if entity.item),
+        'spawners': sum(1 for entity in entities if entity.spawner),
+        'entities': len(entities),
+        'start': player_start,
+        'data': encode_floor(game_map, entities) if worker['encode'] else None
+    }
+
+
+class GenerationReport:
+    """
+    Running totals over finished floors, by dungeon level
+    """
+
+    def __init__(self):
+        self.floors = 0
+        self.bytes = 0
+        self.levels = {}
+
+    def add(self, result):
+        """
+        Fold one floor's result into the totals
+        :param dict result: As returned by generate_one
+        """
+        self.floors += 1
+        if result['data'] is not None:
+            self.bytes += len(result['data'])
+
+        level = self.levels.setdefault(result['level'], {'floors': 0, 'seconds': [],
+                                                         'counts': {name: [] for name in FLOOR_COUNTS}})
+        level['floors'] += 1
+        level['seconds'].append(result['seconds'])
+        for name in FLOOR_COUNTS:
+            level['counts'][name].append(result[name])
+
+    def format(self, elapsed, workers):
+        seconds = sorted(second for level in self.levels.values() for second in level['seconds'])
+        lines = [
+            '{0} floors in {1:.1f} s on {2} workers: {3:.0f} floors/s'.format(self.floors, elapsed, workers,
+                                                                             self.floors / elapsed),
+            'generation ms  mean {0:.2f}  p50 {1:.2f}  p95 {2:.2f}  max {3:.2f}'.format(
+                1000 * sum(seconds) / max(len(seconds), 1), 1000 * percentile(seconds, 0.5),
+                1000 * percentile(seconds, 0.95), 1000 * percentile(seconds, 1.0)),
+        ]
+        if self.bytes:
+            lines.append('pack {0} bytes, {1:.0f} bytes per floor'.format(self.bytes, self.bytes / self.floors))
+
+        lines.extend(['', '{0:>5} {1:>8} {2:>8}  {3}'.format(
+            'level', 'floors', 'mean ms', '  '.join('{0:>22}'.format(name + ' mean/min/max')
+                                                    for name in FLOOR_COUNTS))])
+        for dungeon_level in sorted(self.levels):
+            level = self.levels[dungeon_level]
+            counts = ('{0:>6.1f}/{1:>4}/{2:>4}'.format(sum(values) / len(values), min(values), max(values))
+                      for values in level['counts'].values())
+            lines.append('{0:>5} {1:>8} {2:>8.2f}  {3}'.format(
+                dungeon_level, level['floors'], 1000 * sum(level['seconds']) / level['floors'],
+                '  '.join('{0:>22}'.format(count) for count in counts)))
+
+        return '\n'.join(lines)
+
+
+def percentile(values, fraction):
+    """
+    :param list values: Sorted
+    :param float fraction: 0.0 to 1.0
+    """
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def run(floors, levels, seed, workers, pack_path, width=None, height=None):
+    """
+    Make floors on a process pool, gathering results as each floor is finished
+    :param int floors: Number of floors; each seed from seed upwards makes one floor at each level in turn
+    :param list levels: Dungeon levels to make floors at
+    :param str pack_path: Dungeon pack to write the floors to, or None to only measure them
+    :return tuple: The GenerationReport and the elapsed seconds
+    """
+    jobs = ((seed + index // len(levels), levels[index % len(levels)]) for index in range(floors))
+    report = GenerationReport()
+    pack = PackWriter(pack_path, floor_settings(load_constants(width, height))) if pack_path else None
+    progress_every = max(floors // 10, 1)
+    # Big enough chunks that passing jobs between processes costs little next to making the floors
+    chunk_size = max(min(floors // (workers * 16), 64), 1)
+
+    start = time.perf_counter()
+    try:
+        with Pool(workers, initializer=init_worker, initargs=(width, height, pack is not None)) as pool:
+            for result in pool.imap_unordered(generate_one, jobs, chunk_size):
+                report.add(result)
+                if pack is not None:
+                    pack.add(result['seed'], result['level'], result['data'], result['start'])
+                if report.floors % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print('{0:>8}/{1} floors  {2:.0f} floors/s'.format(report.floors, floors,
+                                                                       report.floors / elapsed), flush=True)
+    finally:
+        if pack is not None:
+            pack.close()
+
+    return report, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Make many seeded floors in parallel and report on them')
+    parser.add_argument('--floors', type=int, default=1000)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1])
+    parser.add_argument('--seed', type=int, default=1, help='seed of the first floors; each seed adds one')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--size', type=parse_size, help='map size, such as 200x200, instead of the settings\'')
+    parser.add_argument('--pack', help='write the floors to this dungeon pack')
+    args = parser.parse_args()
+
+    width, height = args.size or (None, None)
+    report, elapsed = run(args.floors, args.levels, args.seed, args.workers, args.pack, width, height)
+
+    print(report.format(elapsed, args.workers))
+
+
+if __name__ == '__main__':
+    main()
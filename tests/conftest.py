@@ -0,0 +1,24 @@
+"""
+Tests run against the headless console backend, from the repository root so the settings files are found.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+os.environ.setdefault('ROGUELIKE_BACKEND', 'headless')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture
+def constants():
+    from loader_functions.initialize_new_game import get_constants
+    return get_constants()
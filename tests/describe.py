@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def describe(value, depth=0):
+    """
+    :return: A comparable copy of a saved object's state, leaving out back references and derived data
+    """
+    if depth > 6:
+        return '...'
+    if isinstance(value, np.ndarray):
+        return value.shape, value.tobytes()
+    if hasattr(value, 'r') and hasattr(value, 'g'):
+        return value.r, value.g, value.b
+    if callable(value) and not hasattr(value, '__dict__'):
+        return getattr(value, '__name__', repr(value))
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return type(value).__name__, tuple(sorted(
+            (name, describe(attribute, depth + 1)) for name, attribute in value.__dict__.items()
+            if name not in ('owner', 'entity_index', 'tiles', '_nav_grid', 'version', 'random')))
+    if isinstance(value, (list, tuple)):
+        return tuple(describe(item, depth + 1) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, describe(item, depth + 1)) for key, item in value.items()))
+    return value
+
+
+def describe_game(player, entities, game_map, message_log, game_state):
+    """
+    :return: A comparable copy of a saved game, as describe gives
+    """
+    return (entities.index(player), describe(list(entities)), describe(game_map), describe(message_log),
+            game_state)
@@ -0,0 +1,85 @@
+import os
+
+from loader_functions.autosave import Autosaver
+from loader_functions.floor_cache import FloorCache
+from loader_functions.initialize_new_game import get_game_variables
+from loader_functions.save_format import read_manifest, read_save
+from map_objects.game_map import GameMap
+from tests.describe import describe, describe_game
+
+
+def autosave(autosaver, *game, floors=None):
+    autosaver.start(*game, floors=floors)
+    while not autosaver.step():
+        pass
+    autosaver.wait()
+    assert autosaver.poll() is None
+
+
+def test_autosave_writes_the_floors_left_behind(constants, tmp_path):
+    path = str(tmp_path / 'savegame.sav')
+    directory = str(tmp_path / 'floors')
+    game = get_game_variables(dict(constants, seed=6))
+    floors = FloorCache(max_floors=1)
+    loaded = FloorCache()
+    try:
+        left = {level: GameMap.generate(constants, level, 6)[:2] for level in (2, 3)}
+        expected = {level: (describe(game_map), describe(list(entities)))
+                    for level, (game_map, entities) in left.items()}
+        for level, (game_map, entities) in left.items():
+            floors.put(level, game_map, entities)
+        autosaver = Autosaver(path, 0, 0.0, directory)
+
+        autosave(autosaver, *game, floors=floors)
+        first_tag = read_manifest(path)['floor_set']
+        autosave(autosaver, *game, floors=floors)
+        tag = read_manifest(path)['floor_set']
+
+        assert tag != first_tag
+        assert os.listdir(directory) == [tag]
+        assert read_save(path)[0].name == 'Player'
+        loaded.load(directory, tag)
+        assert {level: (describe(game_map), describe(list(entities)))
+                for level, (game_map, entities) in ((level, loaded.take(level)) for level in (2, 3))} == expected
+    finally:
+        floors.close()
+        loaded.close()
+
+
+def test_cancelled_autosave_writes_nothing(constants, tmp_path):
+    path = str(tmp_path / 'savegame.sav')
+    directory = str(tmp_path / 'floors')
+    game = get_game_variables(dict(constants, seed=6))
+    floors = FloorCache()
+    try:
+        floors.put(2, *GameMap.generate(constants, 2, 6)[:2])
+        autosaver = Autosaver(path, 0, 0.0, directory)
+
+        autosaver.start(*game, floors=floors)
+        autosaver.step()
+        autosaver.cancel()
+        autosaver.wait()
+
+        assert not os.path.exists(path)
+        assert not os.path.exists(directory)
+    finally:
+        floors.close()
+
+
+def test_autosave_of_a_large_floor_keeps_to_the_budget(constants, tmp_path):
+    width = height = 1000
+    max_rooms = constants['max_rooms'] * width * height // (80 * 43)
+    game = get_game_variables(dict(constants, map_width=width, map_height=height, max_rooms=max_rooms, seed=4))
+    budget = constants['autosave_budget_ms'] / 1000.0
+    path = str(tmp_path / 'savegame.sav')
+
+    # Anything else running only adds to a frame, so the quickest of a few autosaves is the one measured
+    longest_steps = []
+    for attempt in range(5):
+        autosaver = Autosaver(path, 0, budget)
+        autosave(autosaver, *game)
+        longest_steps.append(autosaver.longest_step)
+
+    assert len(game[1]) > 4000
+    assert min(longest_steps) <= budget
+    assert describe_game(*read_save(path)) == describe_game(*game)
@@ -0,0 +1,83 @@
+import pytest
+
+from loader_functions.dungeon_pack import encode_floor, open_pack, PackReader, PackWriter
+from loader_functions.initialize_new_game import get_game_variables
+from map_objects.floor_prefetcher import floor_settings, FloorPrefetcher
+from map_objects.game_map import GameMap
+from simulation import generate_floors
+from tests.describe import describe
+
+
+@pytest.fixture
+def pack_path(tmp_path, constants):
+    path = str(tmp_path / 'floors.rlp')
+    pack = PackWriter(path, floor_settings(constants))
+    for seed in (5, 6):
+        for dungeon_level in (1, 2):
+            game_map, entities, player_start, rooms = GameMap.generate(constants, dungeon_level, seed)
+            pack.add(seed, dungeon_level, encode_floor(game_map, entities), player_start)
+    pack.close()
+    return path
+
+
+def test_pack_holds_generated_floors(constants, pack_path):
+    pack = PackReader(pack_path)
+    try:
+        assert len(pack) == 4 and pack.made_with(floor_settings(constants))
+        for seed in (5, 6):
+            for dungeon_level in (1, 2):
+                game_map, entities, player_start, rooms = GameMap.generate(constants, dungeon_level, seed)
+                packed_map, packed_entities, packed_start = pack.read(seed, dungeon_level)
+                assert describe(packed_map) == describe(game_map)
+                assert describe(list(packed_entities)) == describe(list(entities))
+                assert packed_start == player_start
+    finally:
+        pack.close()
+
+
+def test_generate_floors_writes_playable_pack(tmp_path, constants):
+    path = str(tmp_path / 'floors.rlp')
+    generate_floors.run(4, [1, 2], 20, 1, path)
+
+    pack = open_pack(path, floor_settings(constants))
+    try:
+        game_map, entities, player_start, rooms = pack.take(2, 21)
+    finally:
+        pack.close()
+
+    assert player_start == GameMap.generate(constants, 2, 21)[2]
+    assert not game_map.is_blocked(*player_start)
+
+
+def test_new_game_starts_on_packed_floor(constants, pack_path):
+    player, entities, game_map, message_log, game_state = get_game_variables(
+        dict(constants, seed=None, dungeon_pack=pack_path))
+
+    assert game_map.seed in (5, 6)
+    expected_map, expected_entities, player_start, rooms = GameMap.generate(constants, 1, game_map.seed)
+    assert (player.x, player.y) == player_start
+    assert describe(game_map) == describe(expected_map)
+
+
+def test_prefetcher_takes_packed_floors(constants, pack_path):
+    prefetcher = FloorPrefetcher(dict(constants, dungeon_pack=pack_path), 0)
+    try:
+        prefetcher.prefetch(2, 6)
+        assert prefetcher.take(2, 6)[2] == GameMap.generate(constants, 2, 6)[2]
+        # Floors the pack does not hold are made as usual
+        assert prefetcher.take(3, 6) is None
+    finally:
+        prefetcher.close()
+
+    assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+
+
+def test_pack_made_with_other_settings_is_not_played(constants, pack_path):
+    other_constants = dict(constants, seed=5, room_max_size=constants['room_max_size'] + 2, dungeon_pack=pack_path)
+    assert open_pack(pack_path, floor_settings(other_constants)) is None
+
+    player, entities, game_map, message_log, game_state = get_game_variables(other_constants)
+
+    expected_map, expected_entities, player_start, rooms = GameMap.generate(other_constants, 1, 5)
+    assert (player.x, player.y) == player_start
+    assert describe(game_map) == describe(expected_map)
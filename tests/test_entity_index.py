@@ -0,0 +1,103 @@
+import pickle
+import random
+
+from backends import libtcod
+from map_objects.entity import Entity, get_blocking_entities_at_location
+from map_objects.entity_index import EntityList
+from map_objects.game_map import GameMap
+
+
+def assert_indexed(entities):
+    """
+    Check the tile index against a scan of the list
+    """
+    index = entities.tile_index
+    cells = {}
+    blockers = {}
+    for entity in entities:
+        assert entity.entity_index is index
+        cells.setdefault((entity.x, entity.y), []).append(entity)
+        if entity.blocks:
+            blockers.setdefault((entity.x, entity.y), []).append(entity)
+
+    assert {cell: sorted(map(id, bucket)) for cell, bucket in index.cells.items()} == \
+        {cell: sorted(map(id, bucket)) for cell, bucket in cells.items()}
+    assert {cell: sorted(map(id, bucket)) for cell, bucket in index.blockers.items()} == \
+        {cell: sorted(map(id, bucket)) for cell, bucket in blockers.items()}
+    for (x, y), bucket in blockers.items():
+        assert get_blocking_entities_at_location(entities, x, y) in bucket
+
+
+def make_entity(rng, width, height):
+    return Entity(rng.randrange(width), rng.randrange(height), 'k', libtcod.white, 'Kobold', blocks=rng.random() < 0.5)
+
+
+def test_index_follows_moves_and_list_changes(constants):
+    game_map, entities, start, rooms = GameMap.generate(constants, 3, 5)
+    assert_indexed(entities)
+
+    rng = random.Random(1)
+    removed = []
+    for step in range(2000):
+        action = rng.randrange(8)
+        if action == 0 and entities:
+            entity = rng.choice(entities)
+            entity.move(rng.randint(-1, 1), rng.randint(-1, 1))
+        elif action == 1 and entities:
+            rng.choice(entities).set_position(rng.randrange(game_map.width), rng.randrange(game_map.height))
+        elif action == 2 and entities:
+            entity = rng.choice(entities)
+            entity.blocks = not entity.blocks
+        elif action == 3 and entities:
+            entity = rng.choice(entities)
+            entities.remove(entity)
+            removed.append(entity)
+        elif action == 4 and entities:
+            removed.append(entities.pop(rng.randrange(len(entities))))
+        elif action == 5:
+            entities.insert(rng.randrange(len(entities) + 1), make_entity(rng, game_map.width, game_map.height))
+        elif action == 6 and len(entities) > 2:
+            entities[0:2] = [make_entity(rng, game_map.width, game_map.height)]
+        elif action == 7:
+            entities.append(removed.pop() if removed else make_entity(rng, game_map.width, game_map.height))
+
+        # Entities taken off the list no longer report to its index
+        for entity in removed:
+            entity.move(1, 0)
+        assert_indexed(entities)
+
+
+def test_entity_moves_between_lists():
+    first = EntityList([Entity(1, 1, 'o', libtcod.white, 'Orc', blocks=True)])
+    second = EntityList()
+    entity = first.pop()
+    second.append(entity)
+    entity.move(1, 1)
+
+    assert_indexed(first)
+    assert_indexed(second)
+    assert get_blocking_entities_at_location(second, 2, 2) is entity
+    assert get_blocking_entities_at_location(first, 2, 2) is None
+
+
+def test_index_is_rebuilt_after_pickling(constants):
+    game_map, entities, start, rooms = GameMap.generate(constants, 2, 9)
+
+    loaded = pickle.loads(pickle.dumps(entities))
+
+    assert isinstance(loaded, EntityList)
+    assert [(entity.x, entity.y, entity.name) for entity in loaded] == \
+        [(entity.x, entity.y, entity.name) for entity in entities]
+    assert_indexed(loaded)
+
+
+def test_entity_saved_before_indexing():
+    entity = Entity.__new__(Entity)
+    entity.__setstate__({'x': 4, 'y': 7, 'char': 'T', 'color': libtcod.white, 'name': 'Troll', 'blocks': True,
+                         'fighter': None, 'ai': None})
+    entities = EntityList([entity])
+
+    assert (entity.x, entity.y, entity.blocks) == (4, 7, True)
+    assert get_blocking_entities_at_location(entities, 4, 7) is entity
+    entity.move(1, 0)
+    assert_indexed(entities)
@@ -0,0 +1,125 @@
+import os
+import shutil
+
+import pytest
+
+from loader_functions import data_loaders
+from loader_functions.floor_cache import FloorCache
+from loader_functions.initialize_new_game import get_game_variables
+from loader_functions.save_format import read_manifest, Snapshot
+from map_objects.game_map import GameMap
+from tests.describe import describe
+
+
+@pytest.fixture
+def floors():
+    floors = FloorCache(max_floors=2)
+    yield floors
+    floors.close()
+
+
+def make_floors(constants, levels, seed=4):
+    return {level: GameMap.generate(constants, level, seed)[:2] for level in levels}
+
+
+def describe_floor(floor):
+    game_map, entities = floor
+    return describe(game_map), describe(list(entities))
+
+
+def test_spilled_floors_come_back_as_left(constants, floors):
+    made = make_floors(constants, range(1, 7))
+    expected = {level: describe_floor(floor) for level, floor in made.items()}
+    for level, (game_map, entities) in made.items():
+        floors.put(level, game_map, entities)
+
+    assert floors.stats()['in_memory'] == 2
+    assert floors.stats()['on_disk'] == 4
+    assert sorted(os.listdir(floors.directory)) == ['floor{0}.sav'.format(level) for level in range(1, 5)]
+
+    for level in (2, 6, 1, 5, 3, 4):
+        floor = floors.take(level)
+        assert describe_floor(floor) == expected[level]
+        assert level not in floors
+    assert floors.stats()['hits'] == 2 and floors.stats()['reads'] == 4
+    assert os.listdir(floors.directory) == []
+    assert floors.take(1) is None
+
+
+def test_memory_ceiling_spills_floors(constants):
+    made = make_floors(constants, (1, 2, 3))
+    floors = FloorCache(max_floors=4, max_bytes=1)
+    try:
+        for level, (game_map, entities) in made.items():
+            floors.put(level, game_map, entities)
+        assert floors.stats()['in_memory'] == 0 and floors.stats()['on_disk'] == 3
+    finally:
+        floors.close()
+
+
+def test_saved_floors_load_with_their_save(constants, floors, tmp_path):
+    made = make_floors(constants, (1, 2, 3))
+    expected = {level: describe_floor(floor) for level, floor in made.items()}
+    for level, (game_map, entities) in made.items():
+        floors.put(level, game_map, entities)
+    directory = str(tmp_path / 'floors')
+
+    tag = floors.save(directory)
+    loaded = FloorCache()
+    try:
+        loaded.load(directory, tag)
+        assert {level: describe_floor(loaded.take(level)) for level in (1, 2, 3)} == expected
+        # Saves of the loaded game carry on its generations
+        assert loaded.save(directory) == '{0}-{1}'.format(floors.game_id, floors.generation + 1)
+    finally:
+        loaded.close()
+
+
+def test_interrupted_save_leaves_the_previous_floors(constants, floors, tmp_path, monkeypatch):
+    for level, (game_map, entities) in make_floors(constants, (1, 2, 3)).items():
+        floors.put(level, game_map, entities)
+    directory = str(tmp_path / 'floors')
+    tag = floors.save(directory)
+    saved = sorted(os.listdir(os.path.join(directory, tag)))
+
+    def fail(self, path, fsync=True):
+        raise OSError('disk full')
+    monkeypatch.setattr(Snapshot, 'write', fail)
+    with pytest.raises(OSError):
+        floors.save(directory)
+
+    assert os.listdir(directory) == [tag]
+    assert sorted(os.listdir(os.path.join(directory, tag))) == saved
+
+
+def test_save_game_is_not_loaded_with_another_games_floors(constants, floors, tmp_path, monkeypatch):
+    first_game = get_game_variables(dict(constants, seed=1))
+    second_game = get_game_variables(dict(constants, seed=2))
+    first_floor = make_floors(constants, (2,), seed=1)[2]
+    monkeypatch.chdir(tmp_path)
+
+    floors.put(2, *first_floor)
+    data_loaders.save_game(*first_game, floors)
+    first_tag = read_manifest(data_loaders.SAVE_FILE)['floor_set']
+    assert os.listdir(data_loaders.FLOOR_DIRECTORY) == [first_tag]
+
+    first_floors = str(tmp_path / 'first_floors')
+    shutil.copytree(os.path.join(data_loaders.FLOOR_DIRECTORY, first_tag), first_floors)
+
+    # A new game removes the floors saved, and a save of it records floors of its own
+    floors.clear()
+    data_loaders.delete_saved_floors()
+    assert os.listdir(data_loaders.FLOOR_DIRECTORY) == []
+    data_loaders.save_game(*second_game, floors)
+    second_tag = read_manifest(data_loaders.SAVE_FILE)['floor_set']
+    assert second_tag.split('-')[0] != first_tag.split('-')[0]
+
+    # Floors the first game left behind, as if removing them had been interrupted, are not loaded
+    shutil.copytree(first_floors, os.path.join(data_loaders.FLOOR_DIRECTORY, first_tag))
+    loaded = FloorCache()
+    try:
+        data_loaders.load_game(loaded)
+        assert 2 not in loaded
+        assert loaded.game_id == second_tag.split('-')[0]
+    finally:
+        loaded.close()
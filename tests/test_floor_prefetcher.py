@@ -0,0 +1,70 @@
+from concurrent.futures import Future, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from map_objects.floor_prefetcher import FloorPrefetcher
+from map_objects.game_map import GameMap
+from tests.describe import describe
+
+
+def describe_floor(floor):
+    game_map, entities, player_start, rooms = floor
+    return describe(game_map), describe(list(entities)), player_start
+
+
+def test_prefetched_floor_is_the_one_made_at_the_stairs(constants):
+    prefetcher = FloorPrefetcher(constants)
+    try:
+        prefetcher.prefetch(2, 8)
+        wait([prefetcher.futures[(2, 8)]])
+
+        floor = prefetcher.take(2, 8)
+    finally:
+        prefetcher.close()
+
+    assert describe_floor(floor) == describe_floor(GameMap.generate(constants, 2, 8))
+    assert (prefetcher.hits, prefetcher.misses) == (1, 0)
+
+
+def test_unfinished_floor_is_abandoned(constants):
+    prefetcher = FloorPrefetcher(constants)
+    future = Future()
+    prefetcher.futures[(2, 8)] = future
+
+    assert prefetcher.take(2, 8) is None
+    assert future.cancelled()
+    assert not prefetcher.futures
+    assert (prefetcher.hits, prefetcher.misses) == (0, 1)
+
+
+def test_floor_not_asked_for_is_missed(constants):
+    prefetcher = FloorPrefetcher(constants)
+    future = Future()
+    future.set_result(GameMap.generate(constants, 2, 8))
+    prefetcher.futures[(2, 8)] = future
+
+    # The seed differs, as it would for a floor of another game
+    assert prefetcher.take(2, 9) is None
+    assert (prefetcher.hits, prefetcher.misses) == (0, 1)
+
+
+def test_dead_worker_is_replaced(constants):
+    prefetcher = FloorPrefetcher(constants)
+    try:
+        prefetcher.prefetch(2, 8)
+        broken_executor = prefetcher.executor
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+        prefetcher.futures[(2, 8)] = future
+        prefetcher.futures[(3, 8)] = Future()
+
+        assert prefetcher.take(2, 8) is None
+        assert prefetcher.executor is None and not prefetcher.futures
+        assert prefetcher.misses == 1
+
+        prefetcher.prefetch(3, 8)
+        assert prefetcher.executor is not None and prefetcher.executor is not broken_executor
+        wait([prefetcher.futures[(3, 8)]])
+        assert describe_floor(prefetcher.take(3, 8)) == describe_floor(GameMap.generate(constants, 3, 8))
+    finally:
+        broken_executor.shutdown()
+        prefetcher.close()
@@ -0,0 +1,35 @@
+import numpy as np
+
+from map_objects.flow_field import FlowField, UNREACHABLE
+
+
+def free(x, y):
+    return False
+
+
+def test_steps_down_the_corridor():
+    walkable = np.ones((40, 1), dtype=bool)
+    field = FlowField(walkable, 0, 0, 24)
+
+    assert field.get_distance(24, 0) == 24
+    assert field.next_step(24, 0, free) == (23, 0)
+    assert field.next_step(5, 0, lambda x, y: (x, y) == (4, 0)) is None
+
+
+def test_no_step_beyond_the_flooded_distance():
+    walkable = np.ones((40, 1), dtype=bool)
+    field = FlowField(walkable, 0, 0, 24)
+
+    # A creature 25 or more steps away is left to move in a straight line, as move_astar leaves it
+    assert field.get_distance(25, 0) == UNREACHABLE
+    assert field.next_step(25, 0, free) is None
+    assert field.next_step(30, 0, free) is None
+
+
+def test_no_step_from_a_walled_off_tile():
+    walkable = np.ones((9, 9), dtype=bool)
+    walkable[:, 4] = False
+    field = FlowField(walkable, 4, 0, 24)
+
+    assert field.next_step(4, 5, free) is None
+    assert field.next_step(4, 3, free) == (4, 2)
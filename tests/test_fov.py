@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from fov_shadowcasting import compute_fov
+from map_objects.game_map import GameMap
+
+
+@pytest.mark.parametrize('radius', [1, 5, 10])
+@pytest.mark.parametrize('density', [0.0, 0.1, 0.3, 0.5])
+def test_fov_stays_within_its_radius_on_random_maps(radius, density):
+    rng = np.random.default_rng(int(density * 10) + radius)
+    for trial in range(40):
+        width, height = rng.integers(1, 30, size=2)
+        transparent = np.asfortranarray(rng.random((width, height)) >= density)
+        x, y = rng.integers(width), rng.integers(height)
+
+        visible = compute_fov(transparent, x, y, radius)
+
+        offset_x, offset_y = np.nonzero(visible)
+        assert ((offset_x - x) ** 2 + (offset_y - y) ** 2 <= radius * radius).all()
+        assert visible[x, y]
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_dark_walls_hide_only_the_walls(constants, seed):
+    game_map, entities, (x, y), rooms = GameMap.generate(constants, 1, seed)
+    transparent = ~game_map.block_sight
+
+    for entity in list(entities)[:10] + [None]:
+        viewer_x, viewer_y = (x, y) if entity is None else (entity.x, entity.y)
+        for radius in (constants['fov_radius'], 0):
+            lit_walls = compute_fov(transparent, viewer_x, viewer_y, radius)
+            dark_walls = compute_fov(transparent, viewer_x, viewer_y, radius, light_walls=False)
+            assert lit_walls.any() and (lit_walls & ~transparent).any()
+            assert np.array_equal(dark_walls, lit_walls & transparent)
+
+
+def test_open_floor_is_a_disc():
+    transparent = np.ones((21, 21), dtype=bool, order='F')
+
+    visible = compute_fov(transparent, 10, 10, 5)
+    offset_x, offset_y = np.nonzero(visible)
+    assert ((offset_x - 10) ** 2 + (offset_y - 10) ** 2 <= 25).all()
+    assert visible.sum() == sum(1 for dx in range(-5, 6) for dy in range(-5, 6) if dx * dx + dy * dy <= 25)
+
+
+def test_pillar_casts_a_shadow_behind_it():
+    transparent = np.ones((11, 3), dtype=bool, order='F')
+    transparent[5, 1] = False
+
+    visible = compute_fov(transparent, 1, 1)
+    assert visible[5, 1] and not visible[6:, 1].any()
+    assert visible[:, 0].all() and visible[:, 2].all()
+
+
+def test_walled_in_viewer_sees_only_the_walls():
+    transparent = np.ones((9, 9), dtype=bool, order='F')
+    transparent[3:6, 3:6] = False
+    transparent[4, 4] = True
+
+    assert compute_fov(transparent, 4, 4).sum() == 9
+    assert compute_fov(transparent, 4, 4, light_walls=False).sum() == 1
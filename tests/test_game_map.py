@@ -0,0 +1,40 @@
+from map_objects.entity_index import EntityList
+from map_objects.game_map import GameMap
+from map_objects.item_factory import ItemFactory
+from map_objects.map_room import Room
+from map_objects.spawner_factory import SpawnerFactory
+
+
+def test_place_entities_stops_when_no_monster_fits_the_limit(constants):
+    for seed in range(20):
+        game_map = GameMap(80, 43, constants['monster_dict'], constants['item_dict'], 1, seed=seed)
+        # Only trolls, which count for more than any room's limit on the first floors
+        game_map.monster_chances = {key: 1 if key == 'troll' else 0 for key in constants['monster_dict']}
+        room = Room(10, 10, 8, 8)
+        entities = EntityList()
+
+        game_map.place_entities(room, entities, False)
+
+        assert room.monster_limit < constants['monster_dict']['troll']['monster_value']
+        assert not [entity for entity in entities if entity.ai]
+
+
+def test_place_entities_leaves_out_a_spawner_on_an_occupied_tile(constants, monkeypatch):
+    get_monster_spawner = SpawnerFactory.get_monster_spawner
+    occupied = []
+
+    def spawner_on_occupied_tile(monster_dict, monster_chances, entities, x, y, room, rng):
+        entities.append(ItemFactory.get_item_by_name(constants['item_dict'], 'healing_potion', x, y))
+        occupied.append((x, y))
+        return get_monster_spawner(monster_dict, monster_chances, entities, x, y, room, rng)
+
+    monkeypatch.setattr(SpawnerFactory, 'get_monster_spawner', staticmethod(spawner_on_occupied_tile))
+    for seed in range(20):
+        game_map = GameMap(80, 43, constants['monster_dict'], constants['item_dict'], 1, seed=seed)
+        entities = EntityList()
+
+        game_map.place_entities(Room(10, 10, 8, 8), entities, False)
+
+        assert None not in entities
+        assert not [entity for entity in entities if entity.spawner]
+    assert occupied
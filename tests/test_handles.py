@@ -0,0 +1,10 @@
+from backends.handles import handles
+from benchmarks import soak
+
+
+def test_soak_releases_every_handle(capsys):
+    # Start from an empty pool, so handles other tests left in use are not counted
+    handles.close()
+
+    assert soak.run(soak.WARMUP_FLOORS + 2, 3, 1)
+    assert 'no leaked handles' in capsys.readouterr().out
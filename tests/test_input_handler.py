@@ -0,0 +1,45 @@
+from backends import libtcod
+from game_states import GameStates
+from input_handler import InputQueue
+
+
+def test_mouse_movement_is_collapsed_into_the_latest_position():
+    libtcod.reset()
+    for cx, cy in ((3, 4), (5, 6), (7, 8)):
+        libtcod.push_mouse(cx, cy)
+    libtcod.push_char('g')
+    libtcod.push_mouse(9, 10, lbutton_pressed=True)
+    libtcod.push_mouse(11, 12)
+    queue = InputQueue()
+
+    queue.fill(0)
+
+    assert libtcod.pending_events() == 0
+    # Only the key press and the click are queued; moves just update the cursor
+    assert queue.pending() == 2
+    assert (queue.mouse.cx, queue.mouse.cy) == (11, 12)
+    assert queue.next_actions(GameStates.PLAYERS_TURN) == ({'pickup': True}, {})
+    assert queue.next_actions(GameStates.PLAYERS_TURN) == ({}, {'left_click': (9, 10)})
+    assert queue.next_actions(GameStates.PLAYERS_TURN) == ({}, {})
+
+
+def test_queued_keys_are_read_for_the_state_they_are_acted_on_in():
+    libtcod.reset()
+    libtcod.push_char('i')
+    libtcod.push_char('a')
+    queue = InputQueue()
+
+    queue.fill(0)
+
+    assert queue.next_actions(GameStates.PLAYERS_TURN) == ({'show_inventory': True}, {})
+    assert queue.next_actions(GameStates.SHOW_INVENTORY) == ({'inventory_index': 0}, {})
+
+
+def test_nothing_queued_after_the_timeout():
+    libtcod.reset()
+    queue = InputQueue()
+
+    queue.fill(0)
+
+    assert queue.pending() == 0
+    assert queue.next_actions(GameStates.PLAYERS_TURN) == ({}, {})
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from components.ai import ConfusedMonster
+from death_functions import kill_monster
+from fov_functions import initialize_fov, recompute_fov
+from item_functions import cast_confuse
+from loader_functions.initialize_new_game import get_game_variables
+from map_objects.item_factory import ItemFactory
+from map_objects.monster_factory import MonsterFactory
+
+
+@pytest.fixture
+def game(constants):
+    player, entities, game_map, message_log, game_state = get_game_variables(dict(constants, seed=3))
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    recompute_fov(fov_map, player.x, player.y, constants['fov_radius'], constants['fov_light_walls'],
+                  constants['fov_algorithm'])
+    # An empty floor tile in view beside the player
+    x, y = next((player.x + dx, player.y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if not game_map.is_blocked(player.x + dx, player.y + dy)
+                and not entities.tile_index.at(player.x + dx, player.y + dy))
+    return player, entities, fov_map, x, y
+
+
+def test_confuse_skips_items_under_the_target(constants, game):
+    player, entities, fov_map, x, y = game
+    # The potion was there first, so it comes first on the tile
+    potion = ItemFactory.get_item_by_name(constants['item_dict'], 'healing_potion', x, y)
+    orc = MonsterFactory.get_monster_by_name(constants['monster_dict'], 'orc', x, y)
+    entities.extend([potion, orc])
+
+    results = cast_confuse(player, entities=entities, fov_map=fov_map, target_x=x, target_y=y)
+
+    assert results[0]['consumed']
+    assert isinstance(orc.ai, ConfusedMonster) and orc.ai.owner is orc
+    assert potion.ai is None
+
+
+def test_confuse_finds_no_target_in_a_corpse(constants, game):
+    player, entities, fov_map, x, y = game
+    orc = MonsterFactory.get_monster_by_name(constants['monster_dict'], 'orc', x, y)
+    entities.append(orc)
+    kill_monster(orc)
+
+    results = cast_confuse(player, entities=entities, fov_map=fov_map, target_x=x, target_y=y)
+
+    assert not results[0]['consumed']
+    assert results[0]['message'].text == 'There is no valid target at that location.'
+    assert orc.ai is None
+
+
+@pytest.mark.parametrize('make_scroll', [
+    lambda item_dict, entities, x, y: ItemFactory.get_item_by_name(item_dict, 'lightning_scroll', x, y),
+    lambda item_dict, entities, x, y: ItemFactory.get_item(item_dict, {'lightning_scroll': 1}, entities, x, y,
+                                                           random.Random(1))
+])
+def test_lightning_scroll_strikes_within_its_range(constants, game, make_scroll):
+    player, entities, fov_map, x, y = game
+    scroll = make_scroll(constants['item_dict'], entities, x, y)
+    player.inventory.add_item(scroll)
+    orc = MonsterFactory.get_monster_by_name(constants['monster_dict'], 'orc', x, y)
+    entities.append(orc)
+
+    results = player.inventory.use(scroll, entities=entities, fov_map=fov_map)
+
+    assert results[0]['consumed'] and results[0]['target'] is orc
+    assert scroll not in player.inventory.items
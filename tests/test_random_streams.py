@@ -0,0 +1,52 @@
+import json
+import random
+
+from loader_functions.initialize_new_game import get_game_variables
+from loader_functions.save_format import read_save, write_save
+from map_objects.game_map import GameMap
+from random_utils import RandomStreams, STREAMS
+from tests.describe import describe
+
+
+def describe_floor(floor):
+    game_map, entities, player_start, rooms = floor
+    return describe(game_map), describe(list(entities)), player_start
+
+
+def test_floors_are_the_same_in_any_order(constants):
+    levels = range(1, 6)
+    forwards = {level: describe_floor(GameMap.generate(constants, level, 12)) for level in levels}
+    # Nothing drawn from the random module in between changes a floor
+    random.seed(99)
+    backwards = {level: describe_floor(GameMap.generate(constants, level, 12)) for level in reversed(levels)}
+
+    assert forwards == backwards
+    assert len({floor[0] for floor in forwards.values()}) == len(levels)
+    assert describe_floor(GameMap.generate(constants, 3, 13)) != forwards[3]
+
+
+def test_stream_state_is_kept_as_json():
+    streams = RandomStreams(4, 2)
+    for name in STREAMS[:3]:
+        streams[name].random()
+
+    restored = RandomStreams(4, 2)
+    restored.setstate(json.loads(json.dumps(streams.getstate())))
+
+    assert sorted(restored.streams) == sorted(STREAMS[:3])
+    assert [restored[name].random() for name in STREAMS] == [streams[name].random() for name in STREAMS]
+
+
+def test_streams_carry_on_after_a_save(constants, tmp_path):
+    player, entities, game_map, message_log, game_state = get_game_variables(dict(constants, seed=21))
+    for draws, name in enumerate(('ai', 'spawners'), 1):
+        for draw in range(draws):
+            game_map.random[name].random()
+    path = str(tmp_path / 'savegame.sav')
+    write_save(path, player, entities, game_map, message_log, game_state)
+
+    loaded_map = read_save(path)[2]
+
+    assert sorted(loaded_map.random.streams) == sorted(game_map.random.streams)
+    assert ([loaded_map.random[name].random() for name in STREAMS] ==
+            [game_map.random[name].random() for name in STREAMS])
@@ -0,0 +1,82 @@
+import pytest
+
+from backends import libtcod
+from components.fighter import Fighter
+from fov_functions import initialize_fov, recompute_fov
+from game_messages import Message, MessageLog
+from game_states import GameStates
+from map_objects.entity import Entity
+from map_objects.game_map import GameMap
+from render_functions import PanelCache, render_all, RenderOrder
+from screen_buffer import ScreenBuffer
+
+
+@pytest.fixture
+def frame(constants):
+    game_map, entities, (x, y), rooms = GameMap.generate(constants, 1, 3)
+    player = Entity(x, y, '@', libtcod.white, 'Player', blocks=True, render_order=RenderOrder.ACTOR,
+                    fighter=Fighter(100, 1, 2))
+    entities.append(player)
+    fov_map = initialize_fov(game_map, constants['fov_cache_size'])
+    recompute_fov(fov_map, x, y, constants['fov_radius'], constants['fov_light_walls'], constants['fov_algorithm'])
+    message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
+    con = libtcod.console_new(constants['screen_width'], constants['screen_height'])
+    panel = libtcod.console_new(constants['screen_width'], constants['panel_height'])
+    return con, panel, entities, player, game_map, fov_map, message_log
+
+
+def render(constants, frame, fov_recompute=True, mouse=None, screen_buffer=None, panel_cache=None):
+    con, panel, entities, player, game_map, fov_map, message_log = frame
+    render_all(con, panel, entities, player, game_map, fov_map, fov_recompute, message_log,
+               constants['screen_width'], constants['screen_height'], constants['bar_width'],
+               constants['panel_height'], constants['panel_y'], mouse or libtcod.Mouse(), constants['colors'],
+               GameStates.PLAYERS_TURN, screen_buffer, panel_cache)
+
+
+def test_entity_leaves_no_glyph_behind(constants, frame):
+    con, panel, entities, player, game_map, fov_map, message_log = frame
+    x, y = player.x, player.y
+    step = next((dx, dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if not game_map.is_blocked(x + dx, y + dy) and not entities.tile_index.at(x + dx, y + dy))
+
+    for screen_buffer in (None, ScreenBuffer(constants['screen_width'], constants['panel_y'])):
+        libtcod.console_init_root(constants['screen_width'], constants['screen_height'], 'test')
+        player.set_position(x, y)
+
+        for fov_recompute in (True, False):
+            render(constants, frame, fov_recompute, screen_buffer=screen_buffer)
+            assert chr(libtcod.console_get_char(0, player.x, player.y)) == '@'
+            # Moved without the view changing, as a monster's move would be
+            player.move(*step)
+
+        assert chr(libtcod.console_get_char(0, x, y)) != '@'
+
+
+def test_panel_is_drawn_again_only_when_what_it_shows_changes(constants, frame):
+    con, panel, entities, player, game_map, fov_map, message_log = frame
+    libtcod.console_init_root(constants['screen_width'], constants['screen_height'], 'test')
+    panel_cache = PanelCache()
+
+    def panel_text():
+        return '\n'.join(libtcod.console_get_text(panel))
+
+    render(constants, frame, panel_cache=panel_cache)
+    render(constants, frame, False, panel_cache=panel_cache)
+    assert (panel_cache.rebuilds, panel_cache.reuses) == (1, 1)
+
+    message_log.add_message(Message('Panel test'))
+    render(constants, frame, False, panel_cache=panel_cache)
+    assert panel_cache.rebuilds == 2 and 'Panel test' in panel_text()
+
+    player.fighter.take_damage(7)
+    render(constants, frame, False, panel_cache=panel_cache)
+    assert panel_cache.rebuilds == 3 and 'HP: 93/100' in panel_text()
+
+    # The names under the mouse are part of what the panel shows
+    mouse = libtcod.Mouse()
+    mouse.cx, mouse.cy = player.x, player.y
+    render(constants, frame, False, mouse, panel_cache=panel_cache)
+    assert panel_cache.rebuilds == 4 and 'Player' in panel_text()
+
+    render(constants, frame, False, mouse, panel_cache=panel_cache)
+    assert (panel_cache.rebuilds, panel_cache.reuses) == (4, 2)
@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import pytest
+
+from components.ai import ConfusedMonster
+from game_messages import Message
+from game_states import GameStates
+from loader_functions.data_loaders import load_game, load_game_shelve, save_game_shelve
+from loader_functions.initialize_new_game import get_game_variables
+from loader_functions.save_format import read_save, write_save
+from map_objects.entity import get_blocking_entities_at_location
+from tests.describe import describe_game
+
+# A shelve save written by save_game before the binary format, tile arrays and tile index
+BASELINE_SAVE = os.path.join(os.path.dirname(__file__), 'fixtures', 'baseline_save', 'savegame')
+
+@pytest.fixture
+def game(constants):
+    player, entities, game_map, message_log, game_state = get_game_variables(dict(constants, seed=11))
+    message_log.add_message(Message('Saved'))
+    player.fighter.take_damage(9)
+    game_map.explored[player.x - 3:player.x + 4, player.y - 2:player.y + 3] = True
+    # An AI set aside by confusion is saved along with the one replacing it
+    monster = next(entity for entity in entities if entity.ai)
+    monster.ai = ConfusedMonster(monster.ai, 4)
+    monster.ai.owner = monster
+    game_map.random['ai'].random()
+    return player, entities, game_map, message_log, game_state
+
+
+@pytest.mark.parametrize('compress, mmap', [(True, False), (False, False), (False, True)])
+def test_save_round_trip(tmp_path, game, compress, mmap):
+    path = str(tmp_path / 'savegame.sav')
+    write_save(path, *game, compress=compress)
+
+    loaded = read_save(path, mmap)
+
+    assert describe_game(*loaded) == describe_game(*game)
+    player, entities, game_map, message_log, game_state = loaded
+    assert player.equipment.main_hand is player.inventory.items[0]
+    assert get_blocking_entities_at_location(entities, player.x, player.y) is player
+    # Play carries on drawing the same numbers
+    assert game_map.random['ai'].random() == game[2].random['ai'].random()
+
+
+def test_shelve_round_trip(tmp_path, game):
+    path = str(tmp_path / 'savegame')
+    save_game_shelve(*game, path=path)
+
+    assert describe_game(*load_game_shelve(path)) == describe_game(*game)
+
+
+def test_baseline_save_loads():
+    player, entities, game_map, message_log, game_state = load_game_shelve(BASELINE_SAVE)
+
+    assert (player.name, player.x, player.y) == ('Player', 54, 6)
+    assert (player.fighter.hp, player.fighter.max_hp, player.fighter.xp) == (93, 100, 35)
+    assert [item.name for item in player.inventory.items] == ['Dagger', 'Healing Potion']
+    assert player.equipment.main_hand is player.inventory.items[0]
+    assert len(entities) == 24
+    assert get_blocking_entities_at_location(entities, player.x, player.y) is player
+
+    assert (game_map.width, game_map.height, game_map.dungeon_level) == (80, 43, 1)
+    assert game_map.block_move.shape == (80, 43) and game_map.block_move.flags.f_contiguous
+    assert not game_map.is_blocked(player.x, player.y)
+    assert game_map.explored.sum() == 160
+    assert game_map.tiles[player.x][player.y].explored
+    assert message_log.messages[-1].text == 'Baseline save'
+    assert tuple(message_log.messages[-1].color) == (255, 255, 0)
+    assert game_state == GameStates.PLAYERS_TURN
+
+
+def test_baseline_save_moves_to_binary_format(tmp_path):
+    game = load_game_shelve(BASELINE_SAVE)
+    path = str(tmp_path / 'savegame.sav')
+    write_save(path, *game)
+
+    assert describe_game(*read_save(path)) == describe_game(*game)
+
+
+def test_load_game_falls_back_to_shelve(tmp_path, monkeypatch):
+    for extension in ('.dat', '.dir'):
+        shutil.copy(BASELINE_SAVE + extension, str(tmp_path / ('savegame' + extension)))
+    monkeypatch.chdir(tmp_path)
+
+    player, entities, game_map, message_log, game_state = load_game()
+
+    assert (player.x, player.y, game_map.dungeon_level) == (54, 6, 1)
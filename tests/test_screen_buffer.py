@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from backends import libtcod
+from screen_buffer import ScreenBuffer
+
+WIDTH = 20
+HEIGHT = 10
+
+
+@pytest.fixture
+def con():
+    libtcod.reset()
+    libtcod.console_init_root(WIDTH, HEIGHT, 'test')
+    return libtcod.console_new(WIDTH, HEIGHT)
+
+
+@pytest.fixture
+def screen_buffer(con):
+    screen_buffer = ScreenBuffer(WIDTH, HEIGHT)
+    background = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    background[:, :, 2] = 100
+    screen_buffer.set_background(background)
+    screen_buffer.put(3, 4, '@', libtcod.white)
+    screen_buffer.present(con)
+    return screen_buffer
+
+
+def test_first_frame_is_written_in_full(con, screen_buffer):
+    assert screen_buffer.stats()['full_writes'] == 1
+    assert screen_buffer.last_cells_written == WIDTH * HEIGHT
+    assert chr(libtcod.console_get_char(0, 3, 4)) == '@'
+    assert tuple(libtcod.console_get_char_background(0, 0, 0)) == (0, 0, 100)
+
+
+def test_unchanged_frame_writes_nothing(con, screen_buffer):
+    screen_buffer.set_background(screen_buffer.bg.copy())
+    screen_buffer.clear_entities()
+    screen_buffer.put(3, 4, '@', libtcod.white)
+
+    assert screen_buffer.present(con) == 0
+
+
+def test_moved_entity_writes_only_its_old_and_new_cells(con, screen_buffer):
+    screen_buffer.clear_entities()
+    screen_buffer.put(4, 4, '@', libtcod.white)
+
+    assert screen_buffer.present(con) == 2
+    assert chr(libtcod.console_get_char(0, 3, 4)) == ' '
+    assert chr(libtcod.console_get_char(0, 4, 4)) == '@'
+    assert tuple(libtcod.console_get_char_background(0, 3, 4)) == (0, 0, 100)
+
+
+def test_changed_background_writes_only_the_changed_cells(con, screen_buffer):
+    background = screen_buffer.bg.copy()
+    background[1, 2] = (200, 0, 0)
+    background[8, 15] = (0, 200, 0)
+    screen_buffer.set_background(background)
+    screen_buffer.clear_entities()
+    screen_buffer.put(3, 4, '@', libtcod.white)
+
+    assert screen_buffer.present(con) == 2
+    assert tuple(libtcod.console_get_char_background(0, 2, 1)) == (200, 0, 0)
+    assert tuple(libtcod.console_get_char_background(0, 15, 8)) == (0, 200, 0)
+
+
+def test_invalidated_frame_is_written_in_full(con, screen_buffer):
+    # Something else, such as a menu, drew over the area
+    libtcod.console_put_char_ex(0, 10, 5, 'M', libtcod.white, libtcod.black)
+    screen_buffer.invalidate()
+
+    assert screen_buffer.present(con) == WIDTH * HEIGHT
+    assert chr(libtcod.console_get_char(0, 10, 5)) == ' '
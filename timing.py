@@ -0,0 +1,215 @@
+"""
+Timing instrumentation
+PhaseTimer splits the game loop into named phases; Instrumentation adds named timers around functions
+and event counters, and exports everything as JSON or CSV.  The shared `instruments` starts disabled,
+in which case a timed function costs one attribute check on top of the call.
+
+Setting ROGUELIKE_PROFILE to a .json or .csv file path turns it on for a session and writes the
+results there on exit; ROGUELIKE_PROFILE_OVERLAY=1 also shows rolling per-phase milliseconds in the
+panel.
+"""
+import csv
+import functools
+import json
+import os
+import time
+from collections import deque
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall-clock time spent in named phases of the game loop
+    Starting a phase ends the one before it.  A disabled timer ignores every call, so the game loop can
+    time itself unconditionally.
+    """
+
+    def __init__(self, enabled=True, window=60):
+        """
+        :param boolean enabled: Record timings; a disabled timer does nothing
+        :param int window: Frames the rolling per-phase times are averaged over
+        """
+        self.enabled = enabled
+        self.window = window
+        self.totals = {}
+        self.calls = {}
+        self.phase = None
+        self.started = 0.0
+        self.frame = {}
+        self.recent = {}
+
+    def start(self, phase):
+        """
+        End the current phase and begin timing another
+        :param str phase: Name of the phase
+        """
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        if self.phase is not None:
+            self._record(now)
+        self.phase = phase
+        self.started = now
+
+    def stop(self):
+        """
+        End the current phase
+        """
+        if self.enabled and self.phase is not None:
+            self._record(time.perf_counter())
+            self.phase = None
+
+    def end_frame(self):
+        """
+        Close the current frame, adding the time each phase took in it to the rolling window
+        """
+        if not self.enabled:
+            return
+
+        # The phase running across the frame boundary is split between frames but counted once
+        now = time.perf_counter()
+        if self.phase is not None:
+            self._record(now, entered=False)
+        self.started = now
+
+        for phase in self.totals:
+            self.recent.setdefault(phase, deque(maxlen=self.window)).append(self.frame.get(phase, 0.0))
+        self.frame.clear()
+
+    def rolling_ms(self):
+        """
+        :return dict: For each phase, mean milliseconds per frame over the last window of frames
+        """
+        return {phase: 1000.0 * sum(times) / len(times) for phase, times in self.recent.items()}
+
+    def report(self):
+        """
+        :return dict: For each phase, total seconds, number of times entered and mean milliseconds
+        """
+        return {phase: {'total_s': total,
+                        'calls': self.calls[phase],
+                        'mean_ms': 1000.0 * total / self.calls[phase]}
+                for phase, total in self.totals.items()}
+
+    def reset(self):
+        self.totals.clear()
+        self.calls.clear()
+        self.frame.clear()
+        self.recent.clear()
+        self.phase = None
+
+    def _record(self, now, entered=True):
+        elapsed = now - self.started
+        self.totals[self.phase] = self.totals.get(self.phase, 0.0) + elapsed
+        self.calls[self.phase] = self.calls.get(self.phase, 0) + entered
+        self.frame[self.phase] = self.frame.get(self.phase, 0.0) + elapsed
+
+
+class Instrumentation:
+    """
+    Game loop phases, named function timers and counters for one session
+    """
+
+    def __init__(self, enabled=False, window=60):
+        """
+        :param boolean enabled: Record anything at all
+        :param int window: Frames the overlay's rolling phase times are averaged over
+        """
+        self.enabled = enabled
+        self.overlay = False
+        self.phases = PhaseTimer(enabled, window)
+        self.timers = {}
+        self.counters = {}
+        self.export_path = None
+
+    def enable(self, enabled=True, overlay=False):
+        """
+        :param boolean enabled: Start or stop recording
+        :param boolean overlay: Show rolling phase times in the panel
+        """
+        self.enabled = enabled
+        self.overlay = enabled and overlay
+        self.phases.enabled = enabled
+
+    def timed(self, name):
+        """
+        Decorator timing every call of a function under a name
+        :param str name: Timer name, such as 'BasicMonster.take_turn'
+        """
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    timer = self.timers.get(name)
+                    if timer is None:
+                        timer = self.timers[name] = [0.0, 0]
+                    timer[0] += time.perf_counter() - start
+                    timer[1] += 1
+
+            return wrapper
+
+        return decorate
+
+    def count(self, name, amount=1):
+        """
+        :param str name: Counter name
+        :param int amount: Amount to add
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        """
+        :return dict: phases and timers, each with total_s, calls and mean_ms, and counters
+        """
+        return {
+            'phases': self.phases.report(),
+            'timers': {name: {'total_s': total, 'calls': calls, 'mean_ms': 1000.0 * total / calls}
+                       for name, (total, calls) in self.timers.items()},
+            'counters': dict(self.counters)
+        }
+
+    def rows(self):
+        """
+        :return list: (kind, name, total_ms, calls, mean_ms) for every phase, timer and counter
+        """
+        report = self.report()
+        rows = []
+        for kind in ('phases', 'timers'):
+            for name, entry in sorted(report[kind].items()):
+                rows.append((kind[:-1], name, 1000.0 * entry['total_s'], entry['calls'], entry['mean_ms']))
+        for name, value in sorted(report['counters'].items()):
+            rows.append(('counter', name, '', value, ''))
+        return rows
+
+    def export(self, path):
+        """
+        Write the session's results, as CSV if the path ends in .csv and as JSON otherwise
+        :param str path:
+        """
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(('kind', 'name', 'total_ms', 'calls', 'mean_ms'))
+                writer.writerows(self.rows())
+        else:
+            with open(path, 'w') as json_file:
+                json.dump(self.report(), json_file, indent=2)
+
+    def reset(self):
+        self.phases.reset()
+        self.timers.clear()
+        self.counters.clear()
+
+
+instruments = Instrumentation()
+
+if os.environ.get('ROGUELIKE_PROFILE'):
+    instruments.enable(overlay=os.environ.get('ROGUELIKE_PROFILE_OVERLAY') == '1')
+    instruments.export_path = os.environ['ROGUELIKE_PROFILE']